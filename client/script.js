@@ -110,7 +110,6 @@ class VideoSubtitleApp {
 
     async uploadAndTranslate() {
         const formData = new FormData();
-        formData.append("file", this.selectedFile);
         formData.append(
             "source_lang",
             document.getElementById("sourceLang").value
@@ -120,6 +119,8 @@ class VideoSubtitleApp {
             document.getElementById("targetLang").value
         );
         if (this.jobId) formData.append("job_id", this.jobId);
+        // Fichier en dernier: le serveur valide les champs avant de le recevoir
+        formData.append("file", this.selectedFile);
 
         try {
             const response = await fetch(
@@ -134,8 +135,10 @@ class VideoSubtitleApp {
                 throw new Error(`Erreur serveur: ${response.status}`);
             }
 
-            const result = await response.json();
+            const job = await response.json();
+            this.jobId = job.job_id;
 
+            const result = await this.waitForJob(job.job_id);
             await this.showResults(result);
         } catch (error) {
             throw new Error(
@@ -144,6 +147,26 @@ class VideoSubtitleApp {
         }
     }
 
+    async waitForJob(jobId) {
+        // Le traitement est asynchrone: on interroge l'état du job jusqu'à la fin
+        while (true) {
+            const response = await fetch(`${this.apiUrl}/jobs/${jobId}`);
+            if (!response.ok) {
+                throw new Error(`Erreur serveur: ${response.status}`);
+            }
+
+            const job = await response.json();
+            if (job.status === "completed") {
+                return job.result;
+            }
+            if (job.status === "failed" || job.status === "cancelled") {
+                throw new Error(job.error || "Le traitement a échoué");
+            }
+
+            await this.delay(2000);
+        }
+    }
+
     openWebSocket(jobId) {
         const wsUrl = this.apiUrl.replace("http", "ws") + `/ws/${jobId}`;
         this.ws = new WebSocket(wsUrl);
@@ -154,10 +177,12 @@ class VideoSubtitleApp {
         this.ws.onmessage = (event) => {
             try {
                 const msg = JSON.parse(event.data);
-                if (msg.type === "started") {
+                if (msg.type === "queued") {
+                    this.updateProgress(5, "En file d'attente...");
+                } else if (msg.type === "started") {
                     this.updateProgress(10, "Upload en cours...");
                 } else if (msg.type === "progress") {
-                    const { step, percent } = msg.data || {};
+                    const { step, percent, eta } = msg.data || {};
                     const stepToText = {
                         audio_extraction: "Extraction de l'audio...",
                         transcription: "Transcription avec Whisper...",
@@ -166,10 +191,11 @@ class VideoSubtitleApp {
                         combination: "Intégration à la vidéo...",
                     };
                     if (typeof percent === "number") {
-                        this.updateProgress(
-                            percent,
-                            stepToText[step] || "En cours..."
-                        );
+                        let text = stepToText[step] || "En cours...";
+                        if (typeof eta === "number") {
+                            text += ` (~${Math.ceil(eta)}s restantes)`;
+                        }
+                        this.updateProgress(percent, text);
                     }
 
                     // bascule d'états visuels
@@ -1,111 +1,528 @@
+import asyncio
 import os
 import uuid
+from typing import Any, Dict, Optional
 
 from config.settings import settings
 from fastapi import (
     APIRouter,
-    File,
-    Form,
     HTTPException,
-    UploadFile,
+    Request,
     WebSocket,
     WebSocketDisconnect,
 )
-from fastapi.responses import FileResponse
-from services.video_processor import VideoProcessor
-from utils.exceptions import FileValidationError, VideoProcessingError
+from fastapi.responses import FileResponse, PlainTextResponse, RedirectResponse
+from services.video_processor import get_video_processor
+from utils import metrics, profiler
+from utils.checkpoints import checkpoint_store
+from utils.exceptions import (
+    FileTooLargeError,
+    FileValidationError,
+    JobQueueFullError,
+    StorageFullError,
+)
+from utils.executors import run_in_thread
+from utils.job_manager import Job, job_manager
 from utils.progress_manager import progress_manager
+from utils.state_backend import state_backend
+from utils.storage_manager import storage_manager
+from utils.transcript_cache import transcript_cache
+from utils.translation_cache import translation_cache
 from utils.validators import (
+    parse_language_list,
     sanitize_filename,
+    save_video_upload,
     validate_language_code,
     validate_video_file,
 )
 
 router = APIRouter()
-video_processor = VideoProcessor()
 
+# Jauges lues à chaque scrape de /metrics
+metrics.registry.callback(
+    "dubsy_jobs",
+    "Jobs connus de ce worker, par statut",
+    lambda: {(status,): n for status, n in job_manager.status_counts().items()},
+    ["status"],
+)
+metrics.registry.callback(
+    "dubsy_job_queue_size", "Jobs en attente d'un worker", job_manager.queue_size
+)
+metrics.registry.callback(
+    "dubsy_websocket_subscribers",
+    "Connexions WebSocket de suivi ouvertes",
+    progress_manager.subscriber_count,
+)
+metrics.registry.callback(
+    "dubsy_websocket_watched_jobs",
+    "Jobs suivis par au moins une connexion WebSocket",
+    progress_manager.watched_jobs,
+)
+metrics.registry.callback(
+    "dubsy_storage_bytes",
+    "Octets des fichiers produits présents dans WORK_DIR",
+    lambda: storage_manager.stats()["bytes"],
+)
+metrics.registry.callback(
+    "dubsy_storage_reserved_bytes",
+    "Octets réservés par les jobs actifs et pas encore écrits",
+    lambda: storage_manager.stats()["reserved_bytes"],
+)
+metrics.registry.callback(
+    "dubsy_storage_files",
+    "Fichiers produits présents dans WORK_DIR",
+    lambda: storage_manager.stats()["files"],
+)
+metrics.registry.callback(
+    "dubsy_storage_evictions_total",
+    "Fichiers supprimés par expiration ou pour respecter le quota",
+    lambda: storage_manager.evictions,
+    type="counter",
+)
 
-@router.post("/upload-and-translate")
-async def upload_and_translate(
-    file: UploadFile = File(...),
-    source_lang: str = Form(...),
-    target_lang: str = Form(...),
-    subtitle_type: str = Form("hard"),  # "hard" ou "soft"
-    job_id: str = Form(None),
-):
-    """Endpoint pour uploader une vidéo et générer une vidéo avec sous-titres"""
 
-    temp_video_path = None
+# Formulaire documenté pour /docs: le corps est lu en flux par la route
+UPLOAD_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["source_lang", "target_lang", "file"],
+                    "properties": {
+                        "source_lang": {"type": "string"},
+                        "target_lang": {
+                            "type": "string",
+                            "description": '"fr" ou "fr,es,de"',
+                        },
+                        "subtitle_type": {
+                            "type": "string",
+                            "enum": ["hard", "soft"],
+                            "default": "hard",
+                        },
+                        "job_id": {"type": "string"},
+                        "profile": {"type": "boolean", "default": False},
+                        "profile_cpu": {"type": "boolean", "default": False},
+                        # En dernier: les champs qui le précèdent sont
+                        # validés avant la réception de la vidéo
+                        "file": {"type": "string", "format": "binary"},
+                    },
+                }
+            }
+        },
+    }
+}
 
-    try:
-        # Validation du fichier
-        validate_video_file(file)
 
-        # Validation des langues
-        if not validate_language_code(source_lang):
-            raise HTTPException(
-                status_code=400, detail=f"Code de langue source invalide: {source_lang}"
-            )
+def _upload_options(fields: Dict[str, str], complete: bool = True) -> Dict[str, Any]:
+    """Valide les champs du formulaire d'upload.
 
-        if not validate_language_code(target_lang):
+    Avec ``complete=False`` (champs reçus avant le fichier), seuls les
+    champs présents sont vérifiés.
+    """
+    source_lang = fields.get("source_lang")
+    if source_lang is None and complete:
+        raise HTTPException(status_code=400, detail="Langue source manquante")
+    if source_lang is not None and not validate_language_code(source_lang):
+        raise HTTPException(
+            status_code=400, detail=f"Code de langue source invalide: {source_lang}"
+        )
+
+    # Une ou plusieurs langues cibles, séparées par des virgules
+    target_langs = None
+    if "target_lang" in fields or complete:
+        target_langs = parse_language_list(fields.get("target_lang", ""))
+        if not target_langs:
+            raise HTTPException(status_code=400, detail="Langue cible manquante")
+        if len(target_langs) > settings.MAX_TARGET_LANGUAGES:
             raise HTTPException(
-                status_code=400, detail=f"Code de langue cible invalide: {target_lang}"
+                status_code=400,
+                detail=f"Trop de langues cibles. Maximum: {settings.MAX_TARGET_LANGUAGES}",
             )
+        for lang in target_langs:
+            if not validate_language_code(lang):
+                raise HTTPException(
+                    status_code=400, detail=f"Code de langue cible invalide: {lang}"
+                )
+
+    # Validation du type de sous-titres
+    subtitle_type = fields.get("subtitle_type", "hard")
+    if subtitle_type not in ["hard", "soft"]:
+        subtitle_type = "hard"
+
+    profile_cpu = _form_bool(fields.get("profile_cpu"))
+    return {
+        "source_lang": source_lang,
+        "target_langs": target_langs,
+        "subtitle_type": subtitle_type,
+        "profile": _form_bool(fields.get("profile")) or profile_cpu,
+        "profile_cpu": profile_cpu,
+    }
+
 
-        # Validation du type de sous-titres
-        if subtitle_type not in ["hard", "soft"]:
-            subtitle_type = "hard"
+def _form_bool(value: Optional[str]) -> bool:
+    return (value or "").lower() in ("1", "true", "on", "yes")
 
-        # Sauvegarder le fichier temporairement
-        safe_filename = sanitize_filename(file.filename)
-        temp_filename = f"temp_{uuid.uuid4().hex}_{safe_filename}"
-        temp_video_path = os.path.join(settings.TEMP_DIR, temp_filename)
 
-        # Lire et sauvegarder le fichier
-        content = await file.read()
+def _upload_reservation(upload_size: int, options: Dict[str, Any]) -> int:
+    """Place pour l'entrée et les vidéos produites (une par langue en hard,
+    une seule en soft), estimées à la taille de l'entrée; langues encore
+    inconnues: le maximum autorisé"""
+    if options["subtitle_type"] == "soft":
+        outputs = 1
+    else:
+        outputs = len(options["target_langs"] or ()) or settings.MAX_TARGET_LANGUAGES
+    return min(upload_size, settings.MAX_FILE_SIZE) * (1 + outputs)
 
-        # Vérifier la taille
-        if len(content) > settings.MAX_FILE_SIZE:
+
+@router.post("/upload-and-translate", openapi_extra=UPLOAD_FORM)
+async def upload_and_translate(request: Request):
+    """Endpoint pour uploader une vidéo et mettre en file son traitement.
+
+    Le formulaire est lu en flux et la vidéo écrite directement dans
+    WORK_DIR: les champs envoyés avant le fichier sont validés, et l'espace
+    réservé, avant d'en recevoir le premier octet.
+    """
+
+    temp_video_path = None
+    safe_filename = None
+    reserved_for = None  # job dont l'espace disque est réservé
+    submitted = False
+
+    async def check_job_id(job_id: str) -> None:
+        if await job_manager.find(job_id):
+            raise HTTPException(status_code=409, detail=f"Job déjà existant: {job_id}")
+
+    try:
+        # Refus anticipé si la taille annoncée dépasse déjà la limite
+        content_length = request.headers.get("content-length")
+        try:
+            content_length = int(content_length) if content_length else None
+            if content_length is not None and content_length < 0:
+                raise ValueError(content_length)
+        except ValueError:
             raise HTTPException(
-                status_code=413,
-                detail=f"Fichier trop volumineux. Taille maximum: {settings.MAX_FILE_SIZE // (1024 * 1024)}MB",
+                status_code=400, detail="En-tête Content-Length invalide"
             )
+        if content_length and content_length > settings.MAX_FILE_SIZE + 1024 * 1024:
+            raise FileTooLargeError(
+                f"Fichier trop volumineux. Taille maximum: {settings.MAX_FILE_SIZE // (1024 * 1024)}MB"
+            )
+
+        async def open_upload(fields: Dict[str, str], filename: str) -> str:
+            nonlocal temp_video_path, safe_filename, reserved_for
+            validate_video_file(filename)
+            options = _upload_options(fields, complete=False)
+            job_id = fields.get("job_id") or uuid.uuid4().hex
+            await check_job_id(job_id)
+            await run_in_thread(
+                storage_manager.admit,
+                job_id,
+                _upload_reservation(content_length or settings.MAX_FILE_SIZE, options),
+            )
+            reserved_for = job_id
+
+            safe_filename = sanitize_filename(filename)
+            temp_filename = f"temp_{uuid.uuid4().hex}_{safe_filename}"
+            temp_video_path = os.path.join(settings.WORK_DIR, temp_filename)
+            return temp_video_path
+
+        fields, _, media = await save_video_upload(request, open_upload)
+        options = _upload_options(fields)
+        job_id = fields.get("job_id") or reserved_for
+        if job_id != reserved_for:
+            # job_id envoyé après le fichier: réservation reprise sous ce nom
+            await check_job_id(job_id)
+            await run_in_thread(storage_manager.finish_job, reserved_for)
+            reserved_for = None
+            await run_in_thread(
+                storage_manager.admit,
+                job_id,
+                _upload_reservation(os.path.getsize(temp_video_path), options),
+            )
+            reserved_for = job_id
+        await run_in_thread(storage_manager.register, temp_video_path, job_id)
+
+        # Mettre le traitement en file d'attente (pipeline complet)
+        job = await job_manager.submit(
+            job_id,
+            _process_job,
+            {
+                "filename": safe_filename,
+                "video_path": temp_video_path,
+                "source_lang": options["source_lang"],
+                "target_langs": options["target_langs"],
+                "subtitle_type": options["subtitle_type"],
+                "duration": media.get("duration"),
+                "source_hash": media["sha256"],
+                "profile": options["profile"],
+                "profile_cpu": options["profile_cpu"],
+            },
+            on_discard=_discard_job,
+        )
+        submitted = True
+        await progress_manager.send(
+            job.id, "queued", {"queue_size": job_manager.queue_size()}
+        )
+
+        return {
+            "message": "Vidéo reçue, traitement en file d'attente",
+            "job_id": job.id,
+            "status": job.status,
+        }
+
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except FileValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except StorageFullError as e:
+        raise HTTPException(status_code=507, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur interne: {str(e)}")
 
-        with open(temp_video_path, "wb") as buffer:
-            buffer.write(content)
+    finally:
+        # Nettoyage du fichier d'entrée si le job n'a pas été accepté
+        if not submitted and temp_video_path and os.path.exists(temp_video_path):
+            get_video_processor().cleanup_temp_file(temp_video_path)
+        if reserved_for and not submitted:
+            await run_in_thread(storage_manager.finish_job, reserved_for)
 
-        # Traiter la vidéo (pipeline complet)
-        # notifier le démarrage
-        if job_id:
-            await progress_manager.send(job_id, "started", {"filename": safe_filename})
 
-        result = await video_processor.process_video(
-            temp_video_path, source_lang, target_lang, subtitle_type, job_id=job_id
+async def _process_job(job: Job) -> Dict[str, Any]:
+    """Exécute le pipeline complet pour un job de la file d'attente"""
+    params = job.params
+    profile = (
+        profiler.JobProfile(job.id, cpu=params.get("profile_cpu", False))
+        if params.get("profile")
+        else None
+    )
+    succeeded = False
+    try:
+        with profiler.activate(profile):
+            result = await get_video_processor().process_video(
+                params["video_path"],
+                params["source_lang"],
+                params["target_langs"],
+                params["subtitle_type"],
+                job_id=job.id,
+                source_hash=params.get("source_hash"),
+                checkpoint_id=params.get("checkpoint_id", job.id),
+                resume=params.get("resume", False),
+            )
+        succeeded = True
+
+        # Les autres workers sauront où télécharger ces fichiers
+        await run_in_thread(
+            state_backend.save_artifacts,
+            job.id,
+            sorted(
+                {
+                    os.path.basename(path)
+                    for language in result["languages"].values()
+                    for path in (language["srt_file"], language["video_with_subtitles"])
+                }
+            ),
+            settings.INSTANCE_URL,
         )
 
-        response = {
+        return {
             "message": "Traduction et intégration terminées avec succès",
             "srt_file_path": result["srt_file"],
             "video_with_subtitles": result["video_with_subtitles"],
             "segments_count": result["segments_count"],
             "subtitle_type": result["subtitle_type"],
+            "target_langs": result["target_langs"],
+            "languages": {
+                lang: {
+                    "srt_file_path": language["srt_file"],
+                    "video_with_subtitles": language["video_with_subtitles"],
+                    "segments_count": language["segments_count"],
+                }
+                for lang, language in result["languages"].items()
+            },
             "status": result["status"],
         }
-        if job_id:
-            await progress_manager.send(job_id, "completed", response)
-        return response
 
-    except FileValidationError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except VideoProcessingError as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Nettoyage du fichier d'entrée, sauf s'il permet une reprise
+        await run_in_thread(_release_input, job, succeeded)
+        # Profil écrit aussi (surtout) quand le job échoue ou est annulé
+        if profile:
+            await _save_profile(job, profile)
+        # Les fichiers produits deviennent évinçables (TTL, quota)
+        await run_in_thread(storage_manager.finish_job, job.id)
+
+
+async def _save_profile(job: Job, profile: "profiler.JobProfile") -> None:
+    try:
+        paths = await run_in_thread(profile.save, settings.WORK_DIR)
+        for path in paths:
+            await run_in_thread(storage_manager.register, path, job.id)
+        await run_in_thread(
+            state_backend.save_artifacts,
+            job.id,
+            [os.path.basename(path) for path in paths],
+            settings.INSTANCE_URL,
+        )
+        print(f"⏱ Profil du job {job.id}: {', '.join(paths)}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur interne: {str(e)}")
+        print(f"⚠ Job {job.id}: profil non enregistré ({e})")
+
+
+def _release_input(job: Job, succeeded: bool) -> None:
+    """Supprime la vidéo d'entrée, ou la range dans le point de reprise du job
+    interrompu pour ``POST /jobs/{id}/retry``"""
+    video_path = job.params["video_path"]
+    if not os.path.exists(video_path):
+        return
+    checkpoint_id = job.params.get("checkpoint_id", job.id)
+    if not succeeded and checkpoint_store.keep_source(checkpoint_id, video_path):
+        storage_manager.forget(video_path)
+        return
+    get_video_processor().cleanup_temp_file(video_path)
+
+
+def _discard_job(job: Job) -> None:
+    """Job annulé avant de démarrer: le fichier d'entrée est encore là"""
+    get_video_processor().cleanup_temp_file(job.params["video_path"])
+    storage_manager.finish_job(job.id)
+
+
+@router.get("/jobs")
+async def list_jobs(status: Optional[str] = None):
+    """Liste les jobs connus, du plus récent au plus ancien"""
+    return {
+        "jobs": [job.to_dict() for job in await job_manager.list(status)],
+        "queue_size": job_manager.queue_size(),
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Retourne l'état et le résultat d'un job"""
+    job = await job_manager.find(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job non trouvé")
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}/profile")
+async def download_profile(job_id: str, request: Request, kind: str = "trace"):
+    """Trace (Chrome Trace Event JSON) ou profil cProfile d'un job profilé"""
+    job = await job_manager.find(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job non trouvé")
+    if not job.params.get("profile"):
+        raise HTTPException(status_code=404, detail="Profilage non demandé")
+    if kind not in ("trace", "cpu"):
+        raise HTTPException(status_code=400, detail="kind: trace ou cpu")
+    if not job.is_finished:
+        raise HTTPException(status_code=409, detail="Profil disponible à la fin du job")
+
+    if kind == "trace":
+        filename, media_type = profiler.trace_filename(job.id), "application/json"
+    else:
+        filename, media_type = profiler.cpu_filename(job.id), "application/octet-stream"
+    file_path = await _downloadable_path(request, filename, "Profil non trouvé")
+    if isinstance(file_path, RedirectResponse):
+        return file_path
+    return FileResponse(path=file_path, filename=filename, media_type=media_type)
 
-    finally:
-        # Nettoyage du fichier d'entrée
-        if temp_video_path and os.path.exists(temp_video_path):
-            video_processor.cleanup_temp_file(temp_video_path)
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Annule un job en attente ou en cours et libère ses ressources"""
+    job = await job_manager.find(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job non trouvé")
+    if job.is_finished:
+        raise HTTPException(
+            status_code=409, detail=f"Job déjà terminé (statut: {job.status})"
+        )
+
+    job = await _cancel(job)
+    return job.to_dict()
+
+
+@router.post("/jobs/{job_id}/retry")
+async def retry_job(job_id: str):
+    """Relance un job en échec ou interrompu depuis son point de reprise"""
+    job = await job_manager.find(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job non trouvé")
+    if job.status not in ("failed", "cancelled"):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Seul un job en échec ou annulé peut être relancé (statut: {job.status})",
+        )
+
+    checkpoint_id = job.params.get("checkpoint_id", job.id)
+    for other in await job_manager.list():
+        if not other.is_finished and other.params.get("checkpoint_id") == checkpoint_id:
+            raise HTTPException(
+                status_code=409, detail=f"Reprise déjà en cours: {other.id}"
+            )
+    video_path = await run_in_thread(checkpoint_store.source_path, checkpoint_id)
+    if not video_path:
+        raise HTTPException(
+            status_code=410, detail="Point de reprise expiré ou supprimé"
+        )
+
+    retry_id = uuid.uuid4().hex
+    admitted = False
+    try:
+        # Admission: place pour les vidéos produites, comme à l'upload
+        outputs = (
+            len(job.params["target_langs"])
+            if job.params["subtitle_type"] == "hard"
+            else 1
+        )
+        await run_in_thread(
+            storage_manager.admit, retry_id, os.path.getsize(video_path) * outputs
+        )
+        admitted = True
+        retry = await job_manager.submit(
+            retry_id,
+            _process_job,
+            {
+                **job.params,
+                "video_path": video_path,
+                "checkpoint_id": checkpoint_id,
+                "resume": True,
+                "retry_of": job.id,
+            },
+            on_discard=_discard_job,
+        )
+        await progress_manager.send(
+            retry.id, "queued", {"queue_size": job_manager.queue_size()}
+        )
+    except JobQueueFullError as e:
+        if admitted:
+            await run_in_thread(storage_manager.finish_job, retry_id)
+        raise HTTPException(status_code=503, detail=str(e))
+    except StorageFullError as e:
+        raise HTTPException(status_code=507, detail=str(e))
+
+    return {
+        "message": "Job relancé depuis son point de reprise",
+        "job_id": retry.id,
+        "retry_of": job.id,
+        "status": retry.status,
+    }
+
+
+async def _cancel(job: Job) -> Job:
+    """Annulation demandée: le point de reprise du job est abandonné aussi"""
+    job = await job_manager.cancel(job.id)
+    await run_in_thread(
+        checkpoint_store.discard, job.params.get("checkpoint_id", job.id)
+    )
+    return job
 
 
 @router.websocket("/ws/{job_id}")
@@ -118,29 +535,102 @@ async def ws_progress(websocket: WebSocket, job_id: str):
     except WebSocketDisconnect:
         progress_manager.disconnect(job_id, websocket)
 
+    if settings.CANCEL_ON_DISCONNECT:
+        await _cancel_if_abandoned(job_id)
+
+
+async def _cancel_if_abandoned(job_id: str) -> None:
+    """Annule le job si personne ne s'est reconnecté après le délai de grâce"""
+    await asyncio.sleep(settings.CANCEL_ON_DISCONNECT_GRACE)
+    job = await job_manager.find(job_id)
+    if job and not job.is_finished and not progress_manager.has_subscribers(job_id):
+        print(f"🔌 Job {job_id}: plus aucun abonné, annulation")
+        await _cancel(job)
+
 
 @router.get("/download-video/{filename}")
-async def download_video(filename: str):
+async def download_video(filename: str, request: Request):
     """Endpoint pour télécharger la vidéo avec sous-titres"""
     safe_filename = sanitize_filename(filename)
-    file_path = os.path.join(settings.TEMP_DIR, safe_filename)
+    file_path = await _downloadable_path(
+        request, safe_filename, "Fichier vidéo non trouvé"
+    )
+    if isinstance(file_path, RedirectResponse):
+        return file_path
 
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Fichier vidéo non trouvé")
-
-    return FileResponse(path=file_path, filename=safe_filename, media_type="video/mp4")
+    # Les soft subs peuvent être produits en MKV
+    media_type = "video/x-matroska" if safe_filename.endswith(".mkv") else "video/mp4"
+    return FileResponse(path=file_path, filename=safe_filename, media_type=media_type)
 
 
 @router.get("/download-srt/{filename}")
-async def download_srt(filename: str):
+async def download_srt(filename: str, request: Request):
     """Endpoint pour télécharger le fichier SRT"""
     safe_filename = sanitize_filename(filename)
-    file_path = os.path.join(settings.TEMP_DIR, safe_filename)
+    file_path = await _downloadable_path(
+        request, safe_filename, "Fichier SRT non trouvé"
+    )
+    if isinstance(file_path, RedirectResponse):
+        return file_path
+
+    return FileResponse(path=file_path, filename=safe_filename, media_type="text/plain")
 
+
+async def _downloadable_path(
+    request: Request, safe_filename: str, not_found: str
+) -> str | RedirectResponse:
+    """Chemin d'un fichier de WORK_DIR dont l'accès est rafraîchi.
+
+    410 si le fichier a été évincé; redirection vers l'instance qui le
+    détient s'il a été produit sur une autre machine.
+    """
+    file_path = os.path.join(settings.WORK_DIR, safe_filename)
     if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Fichier SRT non trouvé")
+        artifact = await run_in_thread(state_backend.get_artifact, safe_filename)
+        if storage_manager.is_evicted(safe_filename) or (
+            artifact and artifact["evicted_at"]
+        ):
+            raise HTTPException(
+                status_code=410,
+                detail="Fichier supprimé (durée de conservation dépassée)",
+            )
+        if artifact and artifact["url"] and artifact["url"] != settings.INSTANCE_URL:
+            url = artifact["url"] + request.url.path
+            if request.url.query:
+                url += "?" + request.url.query
+            return RedirectResponse(url, status_code=307)
+        raise HTTPException(status_code=404, detail=not_found)
 
-    return FileResponse(path=file_path, filename=safe_filename, media_type="text/plain")
+    await run_in_thread(storage_manager.touch, safe_filename)
+    return file_path
+
+
+@router.get("/storage/stats")
+async def storage_stats():
+    """Occupation de WORK_DIR par les fichiers produits"""
+    return await run_in_thread(storage_manager.stats)
+
+
+@router.get("/metrics")
+async def metrics_endpoint():
+    """Métriques de ce processus au format texte Prometheus"""
+    if not metrics.registry.enabled:
+        raise HTTPException(status_code=404, detail="Métriques désactivées")
+    # Les jauges de stockage interrogent l'état partagé
+    return PlainTextResponse(
+        await run_in_thread(metrics.registry.render),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Compteurs des caches (appels API évités)"""
+    return {
+        "translations": await run_in_thread(translation_cache.stats),
+        "transcripts": await run_in_thread(transcript_cache.stats),
+        "checkpoints": await run_in_thread(checkpoint_store.stats),
+    }
 
 
 @router.get("/health")
@@ -0,0 +1,432 @@
+"""Traitement par lots: un dossier de vidéos ou un manifeste CSV/JSONL.
+
+Usage (depuis ``server/``)::
+
+    python cli.py batch /archives/videos --source-lang en --target-lang fr,es
+    python cli.py batch manifest.csv --cpu-jobs 1 --api-jobs 6 --output-dir out/
+
+Un manifeste décrit une vidéo par ligne: ``path``, et optionnellement
+``source_lang``, ``target_langs`` (``fr,es``) et ``subtitle_type``; les
+valeurs absentes reprennent les options de la ligne de commande. Les
+éléments terminés sont notés dans ``--state``: relancer la même commande
+après un arrêt reprend là où le lot s'était arrêté.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import shutil
+import statistics
+import time
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from config.settings import settings
+from utils.checkpoints import local_checkpoint_id
+
+MANIFEST_FIELDS = ("path", "source_lang", "target_langs", "subtitle_type")
+
+
+class BatchItem:
+    """Une vidéo du lot et ses paramètres de traitement"""
+
+    def __init__(
+        self,
+        path: str,
+        name: str,
+        source_lang: str,
+        target_langs: List[str],
+        subtitle_type: str,
+    ) -> None:
+        self.path = path
+        self.name = name  # Chemin relatif sans extension, pour les sorties
+        self.source_lang = source_lang
+        self.target_langs = target_langs
+        self.subtitle_type = subtitle_type
+
+    @property
+    def key(self) -> str:
+        """Identifie l'élément dans le fichier d'état"""
+        return "|".join(
+            (
+                self.path,
+                self.source_lang,
+                ",".join(self.target_langs),
+                self.subtitle_type,
+            )
+        )
+
+
+def load_items(source: str, defaults: Dict[str, Any]) -> List[BatchItem]:
+    """Éléments d'un dossier (récursif) ou d'un manifeste ``.csv``/``.jsonl``.
+
+    Lève ``ValueError`` à la première ligne invalide: mieux vaut échouer
+    avant de lancer une nuit de traitement.
+    """
+    if os.path.isdir(source):
+        rows = (
+            (str(index), {"path": path})
+            for index, path in enumerate(_scan_videos(source), 1)
+        )
+        root = source
+    elif source.endswith(".csv"):
+        rows = _read_csv(source)
+        root = os.path.dirname(os.path.abspath(source))
+    elif source.endswith(".jsonl"):
+        rows = _read_jsonl(source)
+        root = os.path.dirname(os.path.abspath(source))
+    else:
+        raise ValueError(f"Source non reconnue (dossier, .csv ou .jsonl): {source}")
+
+    return [_make_item(line, row, root, defaults) for line, row in rows]
+
+
+def _scan_videos(directory: str) -> Iterator[str]:
+    for dirpath, dirnames, filenames in os.walk(os.path.abspath(directory)):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1].lower() in settings.ALLOWED_EXTENSIONS:
+                yield os.path.join(dirpath, filename)
+
+
+def _read_csv(path: str) -> Iterator:
+    with open(path, newline="", encoding="utf-8") as f:
+        for line, row in enumerate(csv.DictReader(f), 2):
+            yield str(line), {k.strip(): (v or "").strip() for k, v in row.items()}
+
+
+def _read_jsonl(path: str) -> Iterator:
+    with open(path, encoding="utf-8") as f:
+        for line, raw in enumerate(f, 1):
+            if raw.strip():
+                try:
+                    yield str(line), json.loads(raw)
+                except ValueError as e:
+                    raise ValueError(f"Ligne {line}: JSON invalide ({e})")
+
+
+def _make_item(
+    line: str, row: Dict[str, Any], root: str, defaults: Dict[str, Any]
+) -> BatchItem:
+    from utils.validators import parse_language_list, validate_language_code
+
+    if not row.get("path"):
+        raise ValueError(f"Ligne {line}: chemin manquant")
+    path = row["path"]
+    path = os.path.abspath(os.path.join(root, path))
+
+    source_lang = row.get("source_lang") or defaults["source_lang"]
+    targets = row.get("target_langs") or row.get("target_lang")
+    if isinstance(targets, list):
+        targets = ",".join(targets)
+    target_langs = parse_language_list(targets or defaults["target_lang"])
+    subtitle_type = row.get("subtitle_type") or defaults["subtitle_type"]
+
+    for lang in [source_lang, *target_langs]:
+        if not validate_language_code(lang):
+            raise ValueError(f"Ligne {line}: code de langue invalide: {lang}")
+    if not target_langs:
+        raise ValueError(f"Ligne {line}: langue cible manquante")
+    if subtitle_type not in ("hard", "soft"):
+        raise ValueError(f"Ligne {line}: type de sous-titres invalide: {subtitle_type}")
+
+    relative = os.path.relpath(path, os.path.abspath(root))
+    if relative.startswith(".."):
+        relative = os.path.basename(path)
+    return BatchItem(
+        path,
+        os.path.splitext(relative)[0],
+        source_lang,
+        target_langs,
+        subtitle_type,
+    )
+
+
+class BatchState:
+    """Journal des éléments traités (JSON lines, une ligne par issue).
+
+    Chaque ligne est écrite et synchronisée sur disque dès la fin de
+    l'élément; une ligne tronquée par un arrêt brutal est ignorée.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.completed: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for raw in f:
+                    try:
+                        record = json.loads(raw)
+                    except ValueError:
+                        continue
+                    if record.get("status") == "completed":
+                        self.completed.add(record["key"])
+                    else:
+                        self.completed.discard(record.get("key"))
+
+    def record(self, item: BatchItem, status: str, **details: Any) -> None:
+        record = {
+            "key": item.key,
+            "path": item.path,
+            "status": status,
+            "finished_at": time.time(),
+            **details,
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if status == "completed":
+            self.completed.add(item.key)
+
+
+class BatchRunner:
+    """Exécute les éléments d'un lot avec des limites CPU et API séparées.
+
+    ``cpu_jobs`` borne les étapes ffmpeg simultanées (extraction audio,
+    gravure, multiplexage), ``api_jobs`` les jobs simultanément en
+    transcription/traduction; ``jobs`` vidéos sont en cours au plus.
+    """
+
+    def __init__(
+        self,
+        state: BatchState,
+        cpu_jobs: int,
+        api_jobs: int,
+        jobs: Optional[int] = None,
+        output_dir: Optional[str] = None,
+    ) -> None:
+        self.state = state
+        self.cpu_jobs = cpu_jobs
+        self.api_jobs = api_jobs
+        self.jobs = jobs or cpu_jobs + api_jobs
+        self.output_dir = output_dir
+        self.results: List[Dict[str, Any]] = []
+        self.failed = 0
+        self.skipped = 0
+
+    async def run(self, items: List[BatchItem]) -> None:
+        from services.video_processor import VideoProcessor
+
+        processor = VideoProcessor(
+            cpu_slots=asyncio.Semaphore(self.cpu_jobs),
+            api_slots=asyncio.Semaphore(self.api_jobs),
+        )
+        pending = [item for item in items if item.key not in self.state.completed]
+        self.skipped = len(items) - len(pending)
+        if self.skipped:
+            print(f"⏭ {self.skipped} élément(s) déjà traité(s), ignoré(s)")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, item in enumerate(pending, 1):
+            queue.put_nowait((index, item))
+        self._total = len(pending)
+
+        workers = [
+            asyncio.create_task(self._worker(processor, queue))
+            for _ in range(min(self.jobs, len(pending)))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _worker(self, processor, queue: asyncio.Queue) -> None:
+        while not queue.empty():
+            index, item = queue.get_nowait()
+            await self._process(processor, index, item)
+
+    async def _process(self, processor, index: int, item: BatchItem) -> None:
+        progress = f"[{index}/{self._total}] {item.path}"
+        started = time.perf_counter()
+        try:
+            if not os.path.isfile(item.path):
+                raise FileNotFoundError("Fichier introuvable")
+            input_bytes = os.path.getsize(item.path)
+            result = await processor.process_video(
+                item.path,
+                item.source_lang,
+                item.target_langs,
+                subtitle_type=item.subtitle_type,
+                checkpoint_id=local_checkpoint_id(
+                    item.path,
+                    item.source_lang,
+                    item.target_langs,
+                    item.subtitle_type,
+                ),
+                resume=True,
+            )
+            outputs = await self._collect_outputs(item, result)
+        except Exception as e:
+            self.failed += 1
+            self.state.record(item, "failed", error=str(e))
+            print(f"❌ {progress}: {e}")
+            return
+
+        seconds = time.perf_counter() - started
+        media_seconds = (result.get("audio_extraction") or {}).get(
+            "media_duration"
+        ) or result["original_transcript"].get("duration", 0)
+        self.results.append(
+            {
+                "seconds": seconds,
+                "media_seconds": media_seconds or 0,
+                "input_bytes": input_bytes,
+            }
+        )
+        self.state.record(
+            item,
+            "completed",
+            seconds=round(seconds, 2),
+            media_seconds=media_seconds,
+            outputs=outputs,
+        )
+        print(f"✅ {progress} ({seconds:.1f}s)")
+
+    async def _collect_outputs(
+        self, item: BatchItem, result: Dict[str, Any]
+    ) -> Dict[str, Dict[str, str]]:
+        """Chemins des sorties par langue, déplacées dans ``output_dir`` si demandé"""
+        from utils.executors import run_in_thread
+
+        outputs: Dict[str, Dict[str, str]] = {}
+        moved: Dict[str, str] = {}
+        for lang, language in result["languages"].items():
+            files = {
+                "srt": language["srt_file"],
+                "video": language["video_with_subtitles"],
+            }
+            if self.output_dir:
+                for kind, path in files.items():
+                    if path not in moved:
+                        moved[path] = await run_in_thread(
+                            self._move_output, item, lang, kind, path
+                        )
+                    files[kind] = moved[path]
+            outputs[lang] = files
+        return outputs
+
+    def _move_output(self, item: BatchItem, lang: str, kind: str, path: str) -> str:
+        from utils.storage_manager import storage_manager
+
+        extension = os.path.splitext(path)[1]
+        # En soft, une seule vidéo porte toutes les langues
+        suffix = "subs" if kind == "video" and item.subtitle_type == "soft" else lang
+        destination = os.path.abspath(
+            os.path.join(self.output_dir, f"{item.name}.{suffix}{extension}")
+        )
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        shutil.move(path, destination)
+        storage_manager.forget(path)
+        return destination
+
+    def print_summary(self, wall_seconds: float) -> None:
+        done = len(self.results)
+        print("=" * 50)
+        print(
+            f"📊 Lot: {done} traité(s), {self.failed} en échec, "
+            f"{self.skipped} déjà fait(s)"
+        )
+        hours = wall_seconds / 3600
+        print(
+            f"⏱ Durée: {_format_duration(wall_seconds)}"
+            + (f" ({done / hours:.1f} vidéos/h)" if done and hours else "")
+        )
+        if not done:
+            return
+        media = sum(r["media_seconds"] for r in self.results)
+        read = sum(r["input_bytes"] for r in self.results)
+        latencies = sorted(r["seconds"] for r in self.results)
+        print(
+            f"🎞 Média: {_format_duration(media)} traitées "
+            f"({media / wall_seconds:.1f}x temps réel), "
+            f"{read / 1e9:.2f} GB lus ({read / 1e6 / wall_seconds:.1f} MB/s)"
+        )
+        p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+        print(
+            f"⏲ Par vidéo: médiane {statistics.median(latencies):.1f}s, "
+            f"p95 {p95:.1f}s, max {latencies[-1]:.1f}s"
+        )
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return (
+        f"{hours}h{minutes:02d}m{seconds:02d}s"
+        if hours
+        else f"{minutes}m{seconds:02d}s"
+    )
+
+
+async def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="cli.py batch", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("source", help="Dossier de vidéos, ou manifeste .csv/.jsonl")
+    parser.add_argument("--source-lang", default=settings.DEFAULT_SOURCE_LANG)
+    parser.add_argument(
+        "--target-lang",
+        default=settings.DEFAULT_TARGET_LANG,
+        help="Langue(s) cible(s) par défaut, séparées par des virgules",
+    )
+    parser.add_argument("--subtitle-type", choices=["hard", "soft"], default="hard")
+    parser.add_argument(
+        "--cpu-jobs",
+        type=int,
+        default=1,
+        help="Étapes ffmpeg simultanées (chacune utilise ENCODE_CPU_BUDGET cœurs)",
+    )
+    parser.add_argument(
+        "--api-jobs",
+        type=int,
+        default=4,
+        help="Vidéos simultanément en transcription/traduction",
+    )
+    parser.add_argument(
+        "--jobs", type=int, help="Vidéos en cours au plus (défaut: cpu + api)"
+    )
+    parser.add_argument(
+        "--state",
+        default="dubsy_batch_state.jsonl",
+        help="Fichier d'état: les éléments terminés y sont ignorés à la relance",
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="Déplacer les sorties ici (<nom>.<langue>.srt/.mp4) au lieu de WORK_DIR",
+    )
+    args = parser.parse_args(argv)
+
+    from utils.executors import shutdown_executors
+
+    try:
+        settings.validate()
+        items = load_items(
+            args.source,
+            {
+                "source_lang": args.source_lang,
+                "target_lang": args.target_lang,
+                "subtitle_type": args.subtitle_type,
+            },
+        )
+    except (OSError, ValueError) as e:
+        print(f"❌ Erreur: {e}")
+        return
+
+    print(f"📦 {len(items)} vidéo(s) — état: {args.state}")
+    runner = BatchRunner(
+        BatchState(args.state),
+        max(1, args.cpu_jobs),
+        max(1, args.api_jobs),
+        args.jobs,
+        args.output_dir,
+    )
+    started = time.perf_counter()
+    try:
+        await runner.run(items)
+    finally:
+        runner.print_summary(time.perf_counter() - started)
+        shutdown_executors()
@@ -0,0 +1,249 @@
+"""Serveur factice compatible OpenAI (Whisper et chat) pour les benchmarks.
+
+La transcription renvoie un segment de 3 secondes toutes les 4 secondes
+de l'audio reçu (durée lue par ffprobe); la traduction renvoie le texte
+source préfixé de la langue. Les latences simulent le temps de réponse de
+l'API sans consommer de quota.
+
+Usage (depuis ``server/``)::
+
+    python -m benchmarks.fake_openai --port 8765 --chat-latency 0.8
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python main.py
+"""
+
+import argparse
+import json
+import subprocess
+import tempfile
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+SEGMENT_PERIOD = 4.0  # secondes entre deux débuts de segment
+SEGMENT_LENGTH = 3.0
+
+
+class FakeOpenAI:
+    """Serveur HTTP dans un thread, avec latences configurables.
+
+    ``whisper_latency`` + ``whisper_rtf`` × durée audio pour une
+    transcription; ``chat_latency`` + ``chat_latency_per_segment`` × nombre
+    de segments pour une traduction.
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        whisper_latency: float = 0.5,
+        whisper_rtf: float = 0.02,
+        chat_latency: float = 0.5,
+        chat_latency_per_segment: float = 0.01,
+    ) -> None:
+        self.whisper_latency = whisper_latency
+        self.whisper_rtf = whisper_rtf
+        self.chat_latency = chat_latency
+        self.chat_latency_per_segment = chat_latency_per_segment
+        self.requests: Dict[str, int] = {"transcriptions": 0, "chat": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAI":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counters(self) -> Dict[str, int]:
+        with self._lock:
+            counters, self.requests = self.requests, {"transcriptions": 0, "chat": 0}
+        return counters
+
+    def _count(self, endpoint: str) -> None:
+        with self._lock:
+            self.requests[endpoint] += 1
+
+    def transcribe(self, audio: bytes, language: str) -> Dict:
+        duration = _probe_duration(audio)
+        time.sleep(self.whisper_latency + self.whisper_rtf * duration)
+
+        segments = []
+        start = 0.0
+        while start + 1.0 <= duration:
+            end = min(start + SEGMENT_LENGTH, duration)
+            segments.append(
+                {
+                    "id": len(segments),
+                    "seek": 0,
+                    "start": start,
+                    "end": end,
+                    "text": f" Phrase numéro {len(segments) + 1}, prononcée à {start:.0f} secondes.",
+                    "tokens": [],
+                    "temperature": 0.0,
+                    "avg_logprob": -0.2,
+                    "compression_ratio": 1.2,
+                    "no_speech_prob": 0.01,
+                }
+            )
+            start += SEGMENT_PERIOD
+        return {
+            "task": "transcribe",
+            "language": language,
+            "duration": duration,
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+        }
+
+    def complete(self, body: Dict) -> Dict:
+        messages: List[Dict] = body["messages"]
+        target = messages[0]["content"].split(" to ", 1)[-1].split(" ", 1)[0]
+        user = messages[-1]["content"]
+
+        if body.get("response_format", {}).get("type") == "json_object":
+            items = json.loads(user)["segments"]
+            time.sleep(self.chat_latency + self.chat_latency_per_segment * len(items))
+            content = json.dumps(
+                {
+                    "translations": [
+                        {"id": item["id"], "text": f"[{target}] {item['text']}"}
+                        for item in items
+                    ]
+                },
+                ensure_ascii=False,
+            )
+        else:
+            time.sleep(self.chat_latency + self.chat_latency_per_segment)
+            content = f"[{target}] {user}"
+
+        prompt_tokens = sum(len(m["content"]) // 4 + 1 for m in messages)
+        completion_tokens = len(content) // 4 + 1
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("content-length", 0)))
+                try:
+                    if self.path.endswith("/audio/transcriptions"):
+                        fake._count("transcriptions")
+                        fields = _parse_multipart(self.headers["content-type"], body)
+                        response = fake.transcribe(
+                            fields["file"], fields.get("language", b"en").decode()
+                        )
+                    elif self.path.endswith("/chat/completions"):
+                        fake._count("chat")
+                        response = fake.complete(json.loads(body))
+                    else:
+                        self.send_error(404)
+                        return
+                except Exception as e:
+                    self._reply(500, {"error": {"message": str(e), "type": "server"}})
+                    return
+                self._reply(200, response)
+
+            def _reply(self, status: int, payload: Dict) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args) -> None:
+                pass  # Pas de log par requête pendant les mesures
+
+        return Handler
+
+
+def _parse_multipart(content_type: str, body: bytes) -> Dict[str, bytes]:
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"content-type: {content_type}\r\n\r\n".encode() + body
+    )
+    return {
+        part.get_param("name", header="content-disposition"): part.get_payload(
+            decode=True
+        )
+        for part in message.iter_parts()
+    }
+
+
+def _probe_duration(audio: bytes) -> float:
+    with tempfile.NamedTemporaryFile() as f:
+        f.write(audio)
+        f.flush()
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-show_entries",
+                "format=duration",
+                "-of",
+                "default=noprint_wrappers=1:nokey=1",
+                f.name,
+            ],
+            capture_output=True,
+            text=True,
+        )
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--whisper-latency", type=float, default=0.5)
+    parser.add_argument("--whisper-rtf", type=float, default=0.02)
+    parser.add_argument("--chat-latency", type=float, default=0.5)
+    parser.add_argument("--chat-latency-per-segment", type=float, default=0.01)
+    args = parser.parse_args()
+
+    fake = FakeOpenAI(
+        args.port,
+        args.whisper_latency,
+        args.whisper_rtf,
+        args.chat_latency,
+        args.chat_latency_per_segment,
+    ).start()
+    print(f"🤖 Serveur OpenAI factice: {fake.base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
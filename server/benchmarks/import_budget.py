@@ -0,0 +1,108 @@
+"""Vérifie le temps d'import du serveur et de la CLI, et les modules chargés.
+
+Chaque cible est importée dans un interpréteur neuf avec
+``python -X importtime``; le meilleur de plusieurs essais est comparé au
+budget. Les modules lourds (SDK OpenAI, MoviePy...) ne doivent être
+chargés qu'au premier traitement, jamais à l'import. Code de sortie 1 si
+un budget est dépassé: utilisable tel quel en CI.
+
+Usage (depuis ``server/``)::
+
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --budget main=500 --budget cli=100
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Budgets par défaut (ms), avec de la marge pour une machine de CI lente
+BUDGETS_MS = {"main": 800, "cli": 200}
+
+# Chargés à la première utilisation, jamais à l'import
+DEFERRED = {
+    "main": ["openai", "moviepy", "numpy", "uvicorn"],
+    "cli": ["openai", "moviepy", "numpy", "fastapi", "uvicorn"],
+}
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| *(\S+)")
+
+
+def measure(module: str) -> Tuple[float, Dict[str, int]]:
+    """Temps d'import de ``module`` (ms) et temps cumulé de chaque module (µs)"""
+    env = dict(os.environ)
+    # La configuration est validée à l'import du serveur
+    env.setdefault("OPENAI_API_KEY", "import-budget")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import de {module} en échec:\n{result.stderr[-2000:]}")
+
+    cumulative: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        name = match.group(3)
+        if name == "site":
+            cumulative = {}  # Démarrage de l'interpréteur, hors cible
+        else:
+            cumulative[name] = int(match.group(2))
+    return cumulative[module] / 1000, cumulative
+
+
+def check(module: str, budget_ms: float, runs: int) -> List[str]:
+    """Problèmes relevés pour une cible (liste vide si tout va bien)"""
+    timings = [measure(module) for _ in range(runs)]
+    best_ms, modules = min(timings, key=lambda t: t[0])
+    print(f"📦 {module}: {best_ms:.0f} ms (budget {budget_ms:.0f} ms)")
+
+    problems = []
+    if best_ms > budget_ms:
+        problems.append(f"{module}: {best_ms:.0f} ms > {budget_ms:.0f} ms")
+        slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)
+        for name, micros in slowest[1:11]:
+            print(f"    {micros / 1000:>8.1f} ms  {name}")
+    for heavy in DEFERRED.get(module, []):
+        if heavy in modules:
+            problems.append(f"{module}: {heavy} importé au démarrage")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--budget",
+        action="append",
+        default=[],
+        metavar="MODULE=MS",
+        help="budget d'une cible (défauts: main=800, cli=200)",
+    )
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS_MS)
+    for item in args.budget:
+        module, _, ms = item.partition("=")
+        budgets[module] = float(ms)
+
+    problems = []
+    for module, budget_ms in budgets.items():
+        problems += check(module, budget_ms, args.runs)
+
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        sys.exit(1)
+    print("✅ Budgets d'import respectés")
+
+
+if __name__ == "__main__":
+    main()
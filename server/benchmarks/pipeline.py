@@ -0,0 +1,362 @@
+"""Mesure chaque étape du pipeline et le pipeline complet sur des vidéos synthétiques.
+
+Les vidéos sont générées par ffmpeg (``lavfi``: mire et sinusoïde coupée
+une seconde sur quatre, pour que la détection de silences ait de quoi
+travailler). Les appels Whisper et chat sont servis par
+``benchmarks.fake_openai`` avec des latences fixes: les mesures
+reflètent le code du serveur, pas l'API.
+
+Pour chaque étape sont relevés: temps écoulé, temps CPU (processus et
+ffmpeg), pic de RSS (processus et descendants) et octets écrits dans
+``WORK_DIR``. Les résultats sont écrits en JSON; ``--baseline`` compare
+à un fichier produit sur un autre commit.
+
+Usage (depuis ``server/``)::
+
+    python -m benchmarks.pipeline --durations 30,120 --sizes 640x360,1280x720
+    python -m benchmarks.pipeline --output new.json --baseline old.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from .fake_openai import FakeOpenAI
+
+
+def make_sample_video(path: str, duration: int, size: str) -> None:
+    """Mire + sinusoïde avec une seconde de silence toutes les 4 secondes"""
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc2=size={size}:rate=25",
+            "-f",
+            "lavfi",
+            "-i",
+            "aevalsrc='0.5*sin(440*2*PI*t)*lt(mod(t,4),3)':sample_rate=48000",
+            "-t",
+            str(duration),
+            "-c:v",
+            "libx264",
+            "-preset",
+            "veryfast",
+            "-g",
+            "50",
+            "-c:a",
+            "aac",
+            "-shortest",
+            path,
+            "-y",
+        ],
+        check=True,
+    )
+
+
+class StageMeter:
+    """Mesure une étape: temps, CPU, pic de RSS et octets écrits dans un dossier"""
+
+    def __init__(self, watch_dir: str, sample_interval: float = 0.05) -> None:
+        self.watch_dir = watch_dir
+        self.sample_interval = sample_interval
+        self.result: Dict[str, Any] = {}
+
+    def __enter__(self) -> "StageMeter":
+        self._files = _dir_sizes(self.watch_dir)
+        self._written = 0
+        self._cpu = _cpu_seconds()
+        self._peak = _tree_rss()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        wall = time.perf_counter() - self._started
+        self._stop.set()
+        self._sampler.join()
+        self._track_writes()
+        self.result = {
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": round(_cpu_seconds() - self._cpu, 3),
+            "peak_rss_bytes": self._peak,
+            "bytes_written": self._written,
+        }
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.sample_interval):
+            self._peak = max(self._peak, _tree_rss())
+            self._track_writes()
+
+    def _track_writes(self) -> None:
+        # Les fichiers intermédiaires supprimés en cours d'étape sont comptés
+        # à leur taille maximale observée
+        current = _dir_sizes(self.watch_dir)
+        for path, size in current.items():
+            grown = size - self._files.get(path, 0)
+            if grown > 0:
+                self._written += grown
+                self._files[path] = size
+
+
+def _dir_sizes(path: str) -> Dict[str, int]:
+    sizes = {}
+    for entry in os.scandir(path):
+        try:
+            if entry.is_file():
+                sizes[entry.path] = entry.stat().st_size
+        except FileNotFoundError:
+            pass
+    return sizes
+
+
+def _cpu_seconds() -> float:
+    """CPU consommé par le processus et ses enfants terminés (ffmpeg)"""
+    if resource is None:
+        return time.process_time()
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def _tree_rss(pid: Optional[int] = None) -> int:
+    """RSS du processus et de tous ses descendants (Linux: /proc)"""
+    pid = pid or os.getpid()
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            rss = next(
+                int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:")
+            )
+        children: List[int] = []
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children += [int(child) for child in f.read().split()]
+    except (OSError, StopIteration):
+        if pid != os.getpid() or resource is None:
+            return 0
+        # Hors Linux: pic depuis le démarrage, faute de mieux
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+    return rss + sum(_tree_rss(child) for child in children)
+
+
+async def bench_video(
+    video_path: str, work_dir: str, languages: List[str], subtitle_type: str
+) -> Dict[str, Dict]:
+    """Chaque étape appelée seule, dans l'ordre du pipeline, puis le pipeline"""
+    from services.video_processor import VideoProcessor
+    from utils.executors import run_in_thread
+
+    processor = VideoProcessor()
+    stages: Dict[str, Dict] = {}
+    lang = languages[0]
+
+    with StageMeter(work_dir) as meter:
+        extraction = await processor.audio_service.extract_audio(video_path)
+    stages["audio_extraction"] = meter.result
+
+    with StageMeter(work_dir) as meter:
+        transcript = await processor.transcription_service.transcribe_audio(
+            extraction["audio_path"], "en", extraction.get("media_duration")
+        )
+    stages["transcription"] = meter.result
+    processor.audio_service.cleanup_audio_file(extraction["audio_path"])
+
+    with StageMeter(work_dir) as meter:
+        translated = await processor.translation_service.translate_segments(
+            transcript["segments"], lang
+        )
+    stages["translation"] = meter.result
+
+    with StageMeter(work_dir) as meter:
+        srt_path = await run_in_thread(
+            processor.subtitle_service.create_srt_file, translated
+        )
+    stages["srt_generation"] = meter.result
+
+    with StageMeter(work_dir) as meter:
+        burned = await processor.video_combiner.burn_subtitles(video_path, srt_path)
+    stages["hard_subtitles"] = meter.result
+
+    with StageMeter(work_dir) as meter:
+        muxed = await processor.video_combiner.create_multi_track_subtitles(
+            video_path, {lang: srt_path}
+        )
+    stages["soft_subtitles"] = meter.result
+    for path in (srt_path, burned, muxed):
+        os.remove(path)
+
+    with StageMeter(work_dir) as meter:
+        result = await processor.process_video(
+            video_path, "en", languages, subtitle_type
+        )
+    stages["pipeline"] = meter.result
+    stages["pipeline"]["segments"] = result["segments_count"]
+    for language in result["languages"].values():
+        for path in {language["srt_file"], language["video_with_subtitles"]}:
+            if os.path.exists(path):
+                os.remove(path)
+    return stages
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(current: Dict, baseline: Dict) -> None:
+    """Rapport des temps écoulés: base, actuel, variation"""
+    base_runs = {run["name"]: run for run in baseline["runs"]}
+    print(f"\n📊 Comparaison avec {baseline.get('commit') or 'la base'}")
+    for run in current["runs"]:
+        base = base_runs.get(run["name"])
+        if not base:
+            continue
+        print(f"  {run['name']}")
+        for stage, metrics in run["stages"].items():
+            before = base["stages"].get(stage, {}).get("wall_seconds")
+            after = metrics["wall_seconds"]
+            if not before:
+                continue
+            change = 100 * (after - before) / before
+            print(f"    {stage:<18}{before:>9.2f}s{after:>9.2f}s{change:>+8.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--durations", default="30,120", help="secondes, séparées par des virgules"
+    )
+    parser.add_argument("--sizes", default="640x360,1280x720", help="résolutions LxH")
+    parser.add_argument("--languages", default="fr", help="langues cibles du pipeline")
+    parser.add_argument("--subtitle-type", default="hard", choices=("hard", "soft"))
+    parser.add_argument("--whisper-latency", type=float, default=0.5)
+    parser.add_argument("--whisper-rtf", type=float, default=0.02)
+    parser.add_argument("--chat-latency", type=float, default=0.5)
+    parser.add_argument("--chat-latency-per-segment", type=float, default=0.01)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="résultats JSON d'un autre commit")
+    args = parser.parse_args()
+
+    fake = FakeOpenAI(
+        whisper_latency=args.whisper_latency,
+        whisper_rtf=args.whisper_rtf,
+        chat_latency=args.chat_latency,
+        chat_latency_per_segment=args.chat_latency_per_segment,
+    ).start()
+    work_dir = tempfile.mkdtemp(prefix="dubsy_bench_")
+    media_dir = tempfile.mkdtemp(prefix="dubsy_bench_media_")
+
+    # La configuration est lue à l'import: à fixer avant de charger les services
+    os.environ.update(
+        OPENAI_API_KEY="benchmark",
+        OPENAI_BASE_URL=fake.base_url,
+        WORK_DIR=work_dir,
+        CACHE_DIR=os.path.join(media_dir, "cache"),
+        TRANSLATION_CACHE_ENABLED="false",
+        TRANSCRIPT_CACHE_ENABLED="false",
+        STATE_BACKEND="memory",
+    )
+    from config.settings import settings
+    from utils.executors import shutdown_executors
+
+    os.makedirs(settings.WORK_DIR, exist_ok=True)
+
+    report: Dict[str, Any] = {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "config": {
+            **{k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+            "smart_encoding": settings.SMART_ENCODING,
+            "parallel_encoding": settings.PARALLEL_ENCODING,
+            "audio_format": settings.AUDIO_FORMAT,
+            "translation_batch_mode": settings.TRANSLATION_BATCH_MODE,
+        },
+        "runs": [],
+    }
+
+    try:
+        for duration in (int(d) for d in args.durations.split(",")):
+            for size in args.sizes.split(","):
+                name = f"{duration}s_{size}"
+                video_path = os.path.join(media_dir, f"{name}.mp4")
+                print(f"🎞 Génération de la vidéo {name}...")
+                make_sample_video(video_path, duration, size)
+
+                fake.reset_counters()
+                stages = asyncio.run(
+                    bench_video(
+                        video_path,
+                        settings.WORK_DIR,
+                        args.languages.split(","),
+                        args.subtitle_type,
+                    )
+                )
+                report["runs"].append(
+                    {
+                        "name": name,
+                        "duration": duration,
+                        "size": size,
+                        "input_bytes": os.path.getsize(video_path),
+                        "api_requests": fake.reset_counters(),
+                        "stages": stages,
+                    }
+                )
+                for stage, metrics in stages.items():
+                    print(
+                        f"  {stage:<18}{metrics['wall_seconds']:>8.2f}s "
+                        f"CPU {metrics['cpu_seconds']:>7.2f}s "
+                        f"RSS {metrics['peak_rss_bytes'] / 1e6:>7.0f}MB "
+                        f"écrit {metrics['bytes_written'] / 1e6:>7.1f}MB"
+                    )
+                os.remove(video_path)
+    finally:
+        fake.stop()
+        shutdown_executors()
+        shutil.rmtree(work_dir, ignore_errors=True)
+        shutil.rmtree(media_dir, ignore_errors=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Résultats: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            print_comparison(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Latence de diffusion des événements de progression vers de nombreux WebSockets.
+
+Compare l'envoi séquentiel (un ``send_json`` attendu après l'autre) et
+``ProgressManager`` (une file et une tâche d'envoi par abonné), avec une
+part d'abonnés lents.
+
+Usage (depuis ``server/``)::
+
+    python -m benchmarks.progress_fanout --subscribers 500 --events 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+from utils.progress_manager import ProgressManager
+
+
+class FakeWebSocket:
+    """WebSocket simulé: chaque envoi prend ``latency`` secondes"""
+
+    def __init__(self, latency: float, deliveries: List[float]) -> None:
+        self.latency = latency
+        self.deliveries = deliveries
+        self.closed = False
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_json(self, message: Dict) -> None:
+        await asyncio.sleep(self.latency)
+        self.deliveries.append(time.perf_counter() - message["data"]["sent_at"])
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed = True
+
+
+def make_sockets(args, deliveries: List[float]) -> List[FakeWebSocket]:
+    slow = int(args.subscribers * args.slow_ratio)
+    return [
+        FakeWebSocket(
+            args.slow_latency if i < slow else args.latency,
+            deliveries if i >= slow else [],
+        )
+        for i in range(args.subscribers)
+    ]
+
+
+async def run_sequential(args) -> Dict[str, float]:
+    """Comportement d'origine: envoi abonné par abonné dans l'appelant"""
+    deliveries: List[float] = []
+    sockets = make_sockets(args, deliveries)
+    blocked = []
+    for i in range(args.events):
+        message = {"type": "progress", "data": {"percent": i, "sent_at": 0.0}}
+        start = time.perf_counter()
+        message["data"]["sent_at"] = start
+        for ws in sockets:
+            await ws.send_json(message)
+        blocked.append(time.perf_counter() - start)
+        await asyncio.sleep(args.interval)
+    return summarize(blocked, deliveries)
+
+
+async def run_queued(args) -> Dict[str, float]:
+    deliveries: List[float] = []
+    sockets = make_sockets(args, deliveries)
+    manager = ProgressManager()
+    for ws in sockets:
+        await manager.connect("bench", ws)
+    blocked = []
+    for i in range(args.events):
+        start = time.perf_counter()
+        await manager.send(
+            "bench", "progress", {"step": "combination", "percent": i, "sent_at": start}
+        )
+        blocked.append(time.perf_counter() - start)
+        await asyncio.sleep(args.interval)
+    # Laisse les derniers envois partir
+    await asyncio.sleep(args.latency * 2 + 0.05)
+    for ws in sockets:
+        manager.disconnect("bench", ws)
+    return summarize(blocked, deliveries)
+
+
+def summarize(blocked: List[float], deliveries: List[float]) -> Dict[str, float]:
+    deliveries = sorted(deliveries)
+    return {
+        "send_ms": 1000 * statistics.mean(blocked),
+        "p50_ms": 1000 * deliveries[len(deliveries) // 2],
+        "p99_ms": 1000 * deliveries[int(len(deliveries) * 0.99) - 1],
+        "delivered": len(deliveries),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=500)
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.05)
+    parser.add_argument("--latency", type=float, default=0.0005)
+    parser.add_argument("--slow-ratio", type=float, default=0.02)
+    parser.add_argument("--slow-latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(
+        f"📡 {args.subscribers} abonnés ({args.slow_ratio:.0%} lents), "
+        f"{args.events} événements toutes les {args.interval}s"
+    )
+    print(f"{'mode':<12}{'send (ms)':>12}{'p50 (ms)':>12}{'p99 (ms)':>12}{'reçus':>10}")
+    for name, run in (("séquentiel", run_sequential), ("files", run_queued)):
+        result = asyncio.run(run(args))
+        print(
+            f"{name:<12}{result['send_ms']:>12.2f}{result['p50_ms']:>12.2f}"
+            f"{result['p99_ms']:>12.2f}{result['delivered']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
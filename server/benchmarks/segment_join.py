@@ -0,0 +1,163 @@
+"""Vérifie que les tranches recollées redonnent la vidéo source, image pour image.
+
+Grave une vidéo de test (images B, GOP de 2s) avec les encodages parallèle
+et ciblé, puis compare au source le nombre d'images décodées et la durée
+de la piste vidéo du fichier recollé. Code de sortie 1 en cas d'écart.
+Avec ``--open-gop``, les keyframes de la source ne sont pas des IDR:
+l'encodage ciblé peut alors se replier sur l'encodage complet.
+
+Usage (depuis ``server/``)::
+
+    python -m benchmarks.segment_join --duration 60 --size 640x360 [--open-gop]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict
+
+from config.settings import settings
+from services.segment_encoder import SegmentEncoderService
+
+
+def make_sample_video(path: str, duration: int, size: str, open_gop: bool) -> None:
+    """Vidéo de test en H.264 avec images B (mire + sinusoïde)"""
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc2=size={size}:rate=30",
+            "-f",
+            "lavfi",
+            "-i",
+            "sine=frequency=440:sample_rate=48000",
+            "-t",
+            str(duration),
+            "-c:v",
+            "libx264",
+            "-preset",
+            "veryfast",
+            "-bf",
+            "3",
+            "-g",
+            "60",
+            "-x264-params",
+            f"open-gop={int(open_gop)}",
+            "-c:a",
+            "aac",
+            "-shortest",
+            path,
+            "-y",
+        ],
+        check=True,
+    )
+
+
+def make_sample_srt(path: str, duration: int) -> None:
+    """Un sous-titre de 2 secondes toutes les 10 secondes: des GOP restent
+    sans sous-titre, copiés par l'encodage ciblé"""
+    with open(path, "w", encoding="utf-8") as f:
+        for i, start in enumerate(range(1, duration - 2, 10), 1):
+            f.write(
+                f"{i}\n00:{start // 60:02d}:{start % 60:02d},000 --> "
+                f"00:{(start + 2) // 60:02d}:{(start + 2) % 60:02d},000\n"
+                f"Sous-titre numéro {i}\n\n"
+            )
+
+
+def probe_video(path: str) -> Dict:
+    """Images décodées, durée et cadence de la piste vidéo, erreurs de décodage"""
+    result = subprocess.run(
+        [
+            "ffprobe",
+            "-v",
+            "error",
+            "-count_frames",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "stream=nb_read_frames,duration,r_frame_rate",
+            "-of",
+            "json",
+            path,
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    stream = json.loads(result.stdout)["streams"][0]
+    num, den = stream["r_frame_rate"].split("/")
+    return {
+        "frames": int(stream["nb_read_frames"]),
+        "duration": float(stream["duration"]),
+        "frame_duration": float(den) / float(num),
+        "errors": result.stderr.strip(),
+    }
+
+
+def check(name: str, source: Dict, output: Dict) -> bool:
+    ok = (
+        output["frames"] == source["frames"]
+        and abs(output["duration"] - source["duration"]) <= source["frame_duration"]
+        and not output["errors"]
+    )
+    print(
+        f"{'✅' if ok else '❌'} {name}: {output['frames']}/{source['frames']} images, "
+        f"{output['duration']:.3f}s/{source['duration']:.3f}s"
+    )
+    if output["errors"]:
+        print(f"   erreurs de décodage: {output['errors'][:500]}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=int, default=60, help="secondes")
+    parser.add_argument("--size", default="640x360", help="résolution LxH")
+    parser.add_argument("--parts", type=int, default=4, help="tranches parallèles")
+    parser.add_argument("--open-gop", action="store_true", help="source en GOP ouverts")
+    args = parser.parse_args()
+
+    # Tranches parallèles courtes: plusieurs jonctions même sur peu de secondes
+    settings.ENCODE_CPU_BUDGET = args.parts
+    settings.ENCODE_MIN_SEGMENT_SECONDS = max(1, args.duration // (2 * args.parts))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        video_path = os.path.join(work_dir, "sample.mp4")
+        srt_path = os.path.join(work_dir, "sample.srt")
+        make_sample_video(video_path, args.duration, args.size, args.open_gop)
+        make_sample_srt(srt_path, args.duration)
+        source = probe_video(video_path)
+
+        encoder = SegmentEncoderService(work_dir)
+        succeeded = True
+        for name, burn in (
+            ("parallèle", encoder.burn_parallel),
+            ("ciblé", encoder.burn_smart),
+        ):
+            output_path = os.path.join(work_dir, f"output_{name}.mp4")
+            started = time.perf_counter()
+            if not asyncio.run(burn(video_path, srt_path, output_path)):
+                if args.open_gop and burn == encoder.burn_smart:
+                    print(f"✅ {name}: repli sur l'encodage complet (GOP ouverts)")
+                    continue
+                print(f"❌ {name}: stratégie non applicable à la vidéo de test")
+                succeeded = False
+                continue
+            print(f"⏱ {name}: {time.perf_counter() - started:.2f}s")
+            succeeded &= check(name, source, probe_video(output_path))
+
+    sys.exit(0 if succeeded else 1)
+
+
+if __name__ == "__main__":
+    main()
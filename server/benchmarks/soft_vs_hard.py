@@ -0,0 +1,92 @@
+"""Compare l'ajout de sous-titres soft (copie de flux) et hard (gravure).
+
+Usage (depuis ``server/``)::
+
+    python -m benchmarks.soft_vs_hard --duration 120 --size 1280x720
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import tempfile
+import time
+
+from services.video_combiner import VideoCombinerService
+
+
+def make_sample_video(path: str, duration: int, size: str) -> None:
+    """Génère une vidéo de test (mire + sinusoïde) avec ffmpeg lavfi"""
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc2=size={size}:rate=30",
+            "-f",
+            "lavfi",
+            "-i",
+            "sine=frequency=440:sample_rate=48000",
+            "-t",
+            str(duration),
+            "-c:v",
+            "libx264",
+            "-preset",
+            "veryfast",
+            "-c:a",
+            "aac",
+            "-shortest",
+            path,
+            "-y",
+        ],
+        check=True,
+    )
+
+
+def make_sample_srt(path: str, duration: int) -> None:
+    """Un sous-titre de 2 secondes toutes les 3 secondes"""
+    with open(path, "w", encoding="utf-8") as f:
+        for i, start in enumerate(range(0, duration - 2, 3), 1):
+            f.write(
+                f"{i}\n00:{start // 60:02d}:{start % 60:02d},000 --> "
+                f"00:{(start + 2) // 60:02d}:{(start + 2) % 60:02d},000\n"
+                f"Sous-titre numéro {i}\n\n"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=int, default=60, help="secondes")
+    parser.add_argument("--size", default="1280x720", help="résolution LxH")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        video_path = os.path.join(work_dir, "sample.mp4")
+        srt_path = os.path.join(work_dir, "sample.srt")
+        make_sample_video(video_path, args.duration, args.size)
+        make_sample_srt(srt_path, args.duration)
+
+        combiner = VideoCombinerService(work_dir)
+        timings = {}
+        for mode, combine in (
+            ("soft", combiner.create_soft_subtitles),
+            ("hard", combiner.combine_video_with_subtitles),
+        ):
+            started = time.perf_counter()
+            output_path = combine(video_path, srt_path)
+            if asyncio.iscoroutine(output_path):
+                output_path = asyncio.run(output_path)
+            timings[mode] = time.perf_counter() - started
+            print(
+                f"{mode}: {timings[mode]:.2f}s "
+                f"({os.path.getsize(output_path) / 1e6:.1f}MB)"
+            )
+
+        print(f"soft est {timings['hard'] / timings['soft']:.0f}x plus rapide")
+
+
+if __name__ == "__main__":
+    main()
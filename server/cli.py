@@ -1,32 +1,66 @@
 import argparse
 import asyncio
 import os
+import sys
+import uuid
 
 from config.settings import settings
-from services.video_processor import VideoProcessor
 
 
 async def main():
     """Interface en ligne de commande"""
+    if sys.argv[1:2] == ["batch"]:
+        import batch
+
+        await batch.main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
-        description="Transcrire, traduire et sous-titrer une vidéo"
+        description="Transcrire, traduire et sous-titrer une vidéo",
+        epilog="Traitement par lots: python cli.py batch --help",
     )
     parser.add_argument("video_path", help="Chemin de la vidéo à traiter")
     parser.add_argument("source_lang", help="Langue source (ex: en, fr, es)")
-    parser.add_argument("target_lang", help="Langue cible (ex: fr, en, es)")
+    parser.add_argument(
+        "target_lang",
+        help="Langue(s) cible(s), séparées par des virgules (ex: fr ou fr,es,de)",
+    )
     parser.add_argument(
         "--subtitle-type",
         choices=["hard", "soft"],
         default="hard",
         help="Type de sous-titres: hard (gravés) ou soft (piste)",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Écrire une trace des étapes (Chrome Trace Event JSON) dans WORK_DIR",
+    )
+    parser.add_argument(
+        "--profile-cpu",
+        action="store_true",
+        help="Comme --profile, plus un profil cProfile des parties CPU (.prof)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reprendre un traitement interrompu de la même commande",
+    )
 
     args = parser.parse_args()
 
+    # Services importés après l'analyse des arguments: --help reste immédiat
+    from services.video_processor import VideoProcessor
+    from utils import profiler
+    from utils.checkpoints import local_checkpoint_id
+    from utils.executors import shutdown_executors
+    from utils.validators import parse_language_list
+
     video_path = args.video_path
     source_lang = args.source_lang
-    target_lang = args.target_lang
+    target_langs = parse_language_list(args.target_lang)
     subtitle_type = args.subtitle_type
+    profile = None
 
     if not os.path.exists(video_path):
         print(f"❌ Erreur: Le fichier {video_path} n'existe pas")
@@ -37,25 +71,44 @@ async def main():
         settings.validate()
 
         print(f"🎬 Traitement de: {video_path}")
-        print(f"🌍 Langues: {source_lang} → {target_lang}")
+        print(f"🌍 Langues: {source_lang} → {', '.join(target_langs)}")
         print(f"📝 Sous-titres: {subtitle_type}")
         print("=" * 50)
 
         processor = VideoProcessor()
-        result = await processor.process_video(
-            video_path,
-            source_lang,
-            target_lang,
-            subtitle_type=subtitle_type,
-        )
+        if args.profile or args.profile_cpu:
+            profile = profiler.JobProfile(
+                f"cli_{uuid.uuid4().hex[:8]}", cpu=args.profile_cpu
+            )
+        with profiler.activate(profile):
+            result = await processor.process_video(
+                video_path,
+                source_lang,
+                target_langs,
+                subtitle_type=subtitle_type,
+                checkpoint_id=local_checkpoint_id(
+                    video_path, source_lang, target_langs, subtitle_type
+                ),
+                resume=args.resume,
+            )
 
         print("✅ Traduction terminée!")
-        print(f"📁 Fichier SRT créé: {result['srt_file']}")
-        print(f"🎞 Vidéo sortie: {result['video_with_subtitles']}")
+        for lang, language in result["languages"].items():
+            print(f"🌍 [{lang}]")
+            print(f"📁 Fichier SRT créé: {language['srt_file']}")
+            print(f"🎞 Vidéo sortie: {language['video_with_subtitles']}")
         print(f"📊 Nombre de segments: {result['segments_count']}")
 
     except Exception as e:
         print(f"❌ Erreur: {str(e)}")
+        if settings.CHECKPOINT_ENABLED:
+            print("♻ Relancer avec --resume pour reprendre à l'étape en échec")
+
+    finally:
+        if profile:
+            for path in profile.save(settings.WORK_DIR):
+                print(f"⏱ Profil: {path}")
+        shutdown_executors()
 
 
 if __name__ == "__main__":
@@ -8,25 +8,153 @@ load_dotenv()
 class Settings:
     # API Configuration
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    # Autre point d'accès compatible OpenAI (proxy, serveur factice des benchmarks)
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
 
     # Server Configuration
     HOST = os.getenv("HOST", "0.0.0.0")
     PORT = int(os.getenv("PORT", 8000))
     DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+    WORKERS = int(os.getenv("WORKERS", 1))  # processus uvicorn
+    # URL publique de cette instance, pour rediriger vers celle qui détient
+    # un fichier quand plusieurs machines partagent l'état
+    INSTANCE_URL = os.getenv("INSTANCE_URL", "").rstrip("/")
 
     # File Configuration
     MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
     ALLOWED_EXTENSIONS = [".mp4", ".avi", ".mov", ".mkv"]
     TEMP_DIR = os.getenv("TEMP_DIR", "/tmp")
+    # Dossier de travail propre à l'application: TEMP_DIR est souvent
+    # partagé, et seuls les fichiers de ce dossier sont repris et balayés
+    WORK_DIR = os.getenv("WORK_DIR", os.path.join(TEMP_DIR, "dubsy"))
+    UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB écrit par itération
+    UPLOAD_PROBE_BYTES = int(os.getenv("UPLOAD_PROBE_BYTES", 2 * 1024 * 1024))
+    MAX_VIDEO_DURATION = int(os.getenv("MAX_VIDEO_DURATION", 3 * 3600))  # secondes
+
+    # Caches persistants
+    CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(TEMP_DIR, "dubsy_cache"))
+    TRANSLATION_CACHE_ENABLED = (
+        os.getenv("TRANSLATION_CACHE_ENABLED", "true").lower() == "true"
+    )
+    TRANSLATION_CACHE_PATH = os.path.join(CACHE_DIR, "translations.sqlite3")
+    TRANSLATION_CACHE_MAX_ENTRIES = int(
+        os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", 200000)
+    )
+
+    # État partagé entre workers (jobs, événements, emplacement des fichiers)
+    STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")  # ou sqlite
+    STATE_DB_PATH = os.getenv("STATE_DB_PATH", os.path.join(CACHE_DIR, "state.sqlite3"))
+    STATE_POLL_INTERVAL = float(os.getenv("STATE_POLL_INTERVAL", 0.2))  # secondes
+    STATE_EVENT_RETENTION = int(os.getenv("STATE_EVENT_RETENTION", 3600))  # secondes
+    # Bail (job actif, point de reprise ouvert) d'un worker qui ne le renouvelle plus
+    STATE_LEASE_TTL = int(os.getenv("STATE_LEASE_TTL", 60))  # secondes
+
+    TRANSCRIPT_CACHE_ENABLED = (
+        os.getenv("TRANSCRIPT_CACHE_ENABLED", "true").lower() == "true"
+    )
+    TRANSCRIPT_CACHE_DIR = os.path.join(CACHE_DIR, "transcripts")
+    TRANSCRIPT_CACHE_TTL = int(os.getenv("TRANSCRIPT_CACHE_TTL", 30 * 24 * 3600))
+    TRANSCRIPT_CACHE_MAX_BYTES = int(
+        os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", 500 * 1024 * 1024)
+    )
+
+    # Points de reprise des jobs (audio, transcription, traductions, SRT)
+    CHECKPOINT_ENABLED = os.getenv("CHECKPOINT_ENABLED", "true").lower() == "true"
+    CHECKPOINT_DIR = os.path.join(CACHE_DIR, "checkpoints")
+    CHECKPOINT_TTL = int(os.getenv("CHECKPOINT_TTL", 3 * 24 * 3600))  # secondes
+    CHECKPOINT_MAX_BYTES = int(
+        os.getenv("CHECKPOINT_MAX_BYTES", 2 * 1024 * 1024 * 1024)
+    )  # 2GB
 
     # Processing Configuration
+    AUDIO_EXTRACTION_ENGINE = os.getenv(
+        "AUDIO_EXTRACTION_ENGINE", "ffmpeg"
+    )  # ou moviepy
+    AUDIO_FORMAT = os.getenv("AUDIO_FORMAT", "flac")  # flac ou opus
+    AUDIO_SAMPLE_RATE = 16000  # Hz, mono
     WHISPER_MODEL = "whisper-1"
+
+    # Chunked Transcription (fichiers au-delà de la limite d'une requête Whisper)
+    TRANSCRIPTION_CHUNK_MAX_BYTES = int(
+        os.getenv("TRANSCRIPTION_CHUNK_MAX_BYTES", 24 * 1024 * 1024)
+    )
+    TRANSCRIPTION_CHUNK_MAX_SECONDS = int(
+        os.getenv("TRANSCRIPTION_CHUNK_MAX_SECONDS", 600)
+    )
+    TRANSCRIPTION_CHUNK_OVERLAP = 1.0  # secondes ajoutées de part et d'autre
+    TRANSCRIPTION_CONCURRENCY = int(os.getenv("TRANSCRIPTION_CONCURRENCY", 4))
+    TRANSCRIPTION_MAX_RETRIES = int(os.getenv("TRANSCRIPTION_MAX_RETRIES", 3))
+    SILENCE_THRESHOLD_DB = -35
+    SILENCE_MIN_DURATION = 0.4  # secondes
     TRANSLATION_MODEL = "gpt-3.5-turbo"
     DEFAULT_SOURCE_LANG = "en"
     DEFAULT_TARGET_LANG = "fr"
+    MAX_TARGET_LANGUAGES = int(os.getenv("MAX_TARGET_LANGUAGES", 6))
+
+    # Job Queue Configuration
+    MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", 2))
+    JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", 50))
+    JOB_HISTORY_LIMIT = int(os.getenv("JOB_HISTORY_LIMIT", 500))
+    JOB_CANCEL_TIMEOUT = 10.0  # secondes d'attente de l'arrêt d'un job annulé
+    # Annulation automatique quand le dernier abonné WebSocket se déconnecte
+    CANCEL_ON_DISCONNECT = os.getenv("CANCEL_ON_DISCONNECT", "false").lower() == "true"
+    CANCEL_ON_DISCONNECT_GRACE = float(os.getenv("CANCEL_ON_DISCONNECT_GRACE", 10))
+
+    # Délais maximum par étape (secondes)
+    AUDIO_EXTRACTION_TIMEOUT = int(os.getenv("AUDIO_EXTRACTION_TIMEOUT", 600))
+    TRANSCRIPTION_TIMEOUT = int(os.getenv("TRANSCRIPTION_TIMEOUT", 1800))
+    TRANSLATION_TIMEOUT = int(os.getenv("TRANSLATION_TIMEOUT", 600))  # par lot
+    ENCODING_TIMEOUT = int(os.getenv("ENCODING_TIMEOUT", 3600))  # par langue
+
+    # Stockage WORK_DIR (quota, durée de vie des fichiers produits)
+    STORAGE_QUOTA_BYTES = int(
+        os.getenv("STORAGE_QUOTA_BYTES", 10 * 1024 * 1024 * 1024)
+    )  # 10GB
+    STORAGE_TTL = int(os.getenv("STORAGE_TTL", 24 * 3600))  # secondes sans accès
+    STORAGE_SWEEP_INTERVAL = int(os.getenv("STORAGE_SWEEP_INTERVAL", 300))
+
+    # Pipeline en flux (files bornées entre transcription, traduction et SRT)
+    PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 4))  # lots
+
+    # Executors (hors boucle asyncio)
+    IO_WORKERS = int(os.getenv("IO_WORKERS", 8))  # threads: réseau, ffmpeg
+    CPU_WORKERS = int(os.getenv("CPU_WORKERS", os.cpu_count() or 2))  # processus
 
-    # Rate Limiting
-    TRANSLATION_DELAY = 0.1  # seconds between translations
+    # Hard Subtitles (GOP sous-titrés seuls, puis tranches parallèles aux keyframes)
+    SMART_ENCODING = os.getenv("SMART_ENCODING", "true").lower() == "true"
+    PARALLEL_ENCODING = os.getenv("PARALLEL_ENCODING", "true").lower() == "true"
+    ENCODE_CPU_BUDGET = int(os.getenv("ENCODE_CPU_BUDGET", os.cpu_count() or 1))
+    ENCODE_MIN_SEGMENT_SECONDS = int(os.getenv("ENCODE_MIN_SEGMENT_SECONDS", 30))
+
+    # Métriques Prometheus (/metrics)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # Diffusion WebSocket: messages en attente par abonné avant déconnexion
+    PROGRESS_QUEUE_SIZE = int(os.getenv("PROGRESS_QUEUE_SIZE", 64))
+    PROGRESS_SEND_TIMEOUT = float(os.getenv("PROGRESS_SEND_TIMEOUT", 10))  # secondes
+
+    # Suivi des encodages ffmpeg
+    PROGRESS_INTERVAL = float(os.getenv("PROGRESS_INTERVAL", 0.5))  # secondes
+    FFMPEG_LOG_TAIL_LINES = int(os.getenv("FFMPEG_LOG_TAIL_LINES", 40))
+
+    # Soft Subtitles (pistes ajoutées sans réencodage)
+    SOFT_SUBTITLE_CONTAINER = os.getenv("SOFT_SUBTITLE_CONTAINER", "mkv")  # ou mp4
+    SOFT_SUBTITLE_CODEC = os.getenv("SOFT_SUBTITLE_CODEC", "srt")  # MKV: srt ou ass
+
+    # Rate Limiting (partagé par tous les jobs du processus)
+    TRANSLATION_CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", 8))
+    TRANSLATION_REQUESTS_PER_MINUTE = int(os.getenv("TRANSLATION_RPM", 500))
+    TRANSLATION_TOKENS_PER_MINUTE = int(os.getenv("TRANSLATION_TPM", 200000))
+    TRANSLATION_MAX_RETRIES = int(os.getenv("TRANSLATION_MAX_RETRIES", 5))
+    RETRY_BASE_DELAY = 0.5  # seconds
+    RETRY_MAX_DELAY = 30.0  # seconds
+
+    # Batched Translation (plusieurs segments par requête)
+    TRANSLATION_BATCH_MODE = (
+        os.getenv("TRANSLATION_BATCH_MODE", "true").lower() == "true"
+    )
+    TRANSLATION_BATCH_SIZE = int(os.getenv("TRANSLATION_BATCH_SIZE", 40))  # segments
+    TRANSLATION_BATCH_MAX_TOKENS = int(os.getenv("TRANSLATION_BATCH_MAX_TOKENS", 1500))
 
     @classmethod
     def validate(cls):
@@ -34,11 +162,22 @@ class Settings:
         if not cls.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY is required")
 
-        if not os.path.exists(cls.TEMP_DIR):
+        if not os.path.exists(cls.WORK_DIR):
+            try:
+                os.makedirs(cls.WORK_DIR, exist_ok=True)
+            except Exception:
+                raise ValueError(f"Cannot create work directory: {cls.WORK_DIR}")
+
+        if cls.STATE_BACKEND not in ("memory", "sqlite"):
+            raise ValueError(f"Unknown STATE_BACKEND: {cls.STATE_BACKEND}")
+        if cls.WORKERS > 1 and cls.STATE_BACKEND == "memory":
+            raise ValueError("WORKERS > 1 requires a shared STATE_BACKEND (sqlite)")
+
+        if not os.path.exists(cls.CACHE_DIR):
             try:
-                os.makedirs(cls.TEMP_DIR, exist_ok=True)
+                os.makedirs(cls.CACHE_DIR, exist_ok=True)
             except Exception:
-                raise ValueError(f"Cannot create temp directory: {cls.TEMP_DIR}")
+                raise ValueError(f"Cannot create cache directory: {cls.CACHE_DIR}")
 
 
 settings = Settings()
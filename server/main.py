@@ -1,9 +1,15 @@
-import uvicorn
+from contextlib import asynccontextmanager
+
 from api.routes import router
 from config.settings import settings
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from utils.checkpoints import checkpoint_store
 from utils.exceptions import VideoProcessingError
+from utils.executors import run_in_thread, shutdown_executors
+from utils.job_manager import job_manager
+from utils.state_backend import state_backend
+from utils.storage_manager import storage_manager
 
 # Validation de la configuration au démarrage
 try:
@@ -12,11 +18,29 @@ except ValueError as e:
     print(f"❌ Erreur de configuration: {e}")
     exit(1)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Démarrage de l'état partagé, du pool de workers de traitement et du
+    # nettoyage périodique de WORK_DIR et des points de reprise
+    await state_backend.start()
+    await job_manager.start()
+    storage_manager.add_sweeper(checkpoint_store.evict)
+    await storage_manager.start()
+    await run_in_thread(checkpoint_store.evict)
+    yield
+    await storage_manager.stop()
+    await job_manager.stop()
+    await state_backend.stop()
+    shutdown_executors()
+
+
 # Création de l'application FastAPI
 app = FastAPI(
     title="Video Subtitle Translator API",
     description="API pour la traduction automatique de sous-titres vidéo",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Middleware CORS
@@ -39,15 +63,19 @@ async def video_processing_exception_handler(request, exc):
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     print("🚀 Démarrage du serveur Video Subtitle Translator...")
     print(
         f"📝 Documentation disponible sur: http://{settings.HOST}:{settings.PORT}/docs"
     )
     print(f"🔧 Mode debug: {settings.DEBUG}")
 
+    # Plusieurs workers: uvicorn importe l'application dans chaque processus
     uvicorn.run(
-        "main:app" if settings.DEBUG else app,
+        "main:app" if settings.DEBUG or settings.WORKERS > 1 else app,
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
+        workers=settings.WORKERS,
     )
@@ -1,38 +1,298 @@
+import asyncio
 import os
+import re
+import subprocess
+import sys
+import time
 import uuid
+from typing import Dict, List, Optional, Tuple
 
-from moviepy.video.io.VideoFileClip import VideoFileClip
-from utils.exceptions import AudioExtractionError
+from config.settings import settings
+from utils import profiler
+from utils.exceptions import AudioExtractionError, NoAudioStreamError
+from utils.executors import run_in_process, run_in_thread
+from utils.ffmpeg_progress import communicate
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Paramètres d'encodage par format de sortie (mono 16 kHz, suffisant pour Whisper)
+AUDIO_FORMATS = {
+    "flac": {"extension": "flac", "codec": ["-c:a", "flac"]},
+    "opus": {"extension": "ogg", "codec": ["-c:a", "libopus", "-b:a", "32k"]},
+}
 
 
 class AudioService:
     def __init__(self, temp_dir: str):
         self.temp_dir = temp_dir
 
+    async def extract_audio(self, video_path: str) -> Dict:
+        """Extrait l'audio avec le moteur configuré (repli sur MoviePy).
+
+        Retourne ``audio_path`` et les mesures de l'extraction (moteur, durée,
+        taille, pic mémoire) pour comparer les moteurs.
+        """
+        if settings.AUDIO_EXTRACTION_ENGINE == "ffmpeg":
+            processes: List[subprocess.Popen] = []
+            try:
+                # ffmpeg tourne dans un sous-processus: un thread suffit à l'attendre
+                stats = await run_in_thread(
+                    self.extract_audio_with_ffmpeg, video_path, processes
+                )
+                self._print_stats(stats)
+                return stats
+            except NoAudioStreamError:
+                raise
+            except AudioExtractionError as e:
+                print(f"⚠ Extraction ffmpeg en échec, repli sur MoviePy: {str(e)}")
+            except asyncio.CancelledError:
+                # Le thread voit ffmpeg se terminer et supprime l'audio partiel
+                for process in processes:
+                    process.kill()
+                raise
+
+        # Décodage MoviePy (CPU) dans le pool de processus
+        stats = await run_in_process(self.extract_audio_with_moviepy, video_path)
+        self._print_stats(stats)
+        return stats
+
     def extract_audio_from_video(self, video_path: str) -> str:
-        """Extrait l'audio d'une vidéo et la sauvegarde en format WAV"""
+        """Extrait l'audio d'une vidéo (version synchrone, repli sur MoviePy)"""
+        if settings.AUDIO_EXTRACTION_ENGINE == "ffmpeg":
+            try:
+                return self.extract_audio_with_ffmpeg(video_path)["audio_path"]
+            except NoAudioStreamError:
+                raise
+            except AudioExtractionError as e:
+                print(f"⚠ Extraction ffmpeg en échec, repli sur MoviePy: {str(e)}")
+        return self.extract_audio_with_moviepy(video_path)["audio_path"]
+
+    def extract_audio_with_ffmpeg(
+        self, video_path: str, processes: Optional[List[subprocess.Popen]] = None
+    ) -> Dict:
+        """Extrait la première piste audio sans décoder la vidéo (mono 16 kHz compressé).
+
+        Le processus ffmpeg est ajouté à ``processes`` pour pouvoir être tué
+        depuis un autre thread.
+        """
+        audio_format = AUDIO_FORMATS[settings.AUDIO_FORMAT]
+        audio_filename = f"audio_{uuid.uuid4().hex}.{audio_format['extension']}"
+        audio_path = os.path.join(self.temp_dir, audio_filename)
+
+        cmd = [
+            "ffmpeg",
+            "-nostdin",
+            "-hide_banner",
+            "-nostats",
+            "-i",
+            video_path,
+            "-map",
+            "0:a:0",  # Seule la première piste audio est lue
+            "-vn",
+            "-sn",
+            "-dn",
+            "-ac",
+            "1",
+            "-ar",
+            str(settings.AUDIO_SAMPLE_RATE),
+            *audio_format["codec"],
+            audio_path,
+            "-y",
+        ]
+
+        started = time.perf_counter()
+        with profiler.span("FFmpeg (audio)", "subprocess", argv=cmd) as span:
+            try:
+                process = subprocess.Popen(
+                    cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+                )
+            except FileNotFoundError:
+                raise AudioExtractionError("FFmpeg introuvable")
+            if processes is not None:
+                processes.append(process)
+
+            # Lecture de stderr jusqu'à la fin du processus, puis wait4 pour son pic mémoire
+            stderr = process.stderr.read().decode(errors="replace")
+            process.stderr.close()
+            peak_rss = None
+            if hasattr(os, "wait4"):
+                _, status, usage = os.wait4(process.pid, 0)
+                process.returncode = os.waitstatus_to_exitcode(status)
+                peak_rss = self._maxrss_bytes(usage.ru_maxrss)
+            else:
+                process.wait()
+            span["returncode"] = process.returncode
+        elapsed = time.perf_counter() - started
+
+        if process.returncode != 0:
+            if os.path.exists(audio_path):
+                os.remove(audio_path)
+            if "matches no streams" in stderr:
+                raise NoAudioStreamError("Aucune piste audio trouvée dans la vidéo")
+            raise AudioExtractionError(
+                f"Erreur lors de l'extraction audio: {stderr.strip()[-2000:]}"
+            )
+
+        return {
+            "audio_path": audio_path,
+            "engine": "ffmpeg",
+            "seconds": elapsed,
+            "bytes": os.path.getsize(audio_path),
+            "peak_rss": peak_rss,
+            "media_duration": self._parse_duration(stderr),
+        }
+
+    def extract_audio_with_moviepy(self, video_path: str) -> Dict:
+        """Extrait l'audio d'une vidéo avec MoviePy et la sauvegarde en format WAV"""
         try:
             # Générer un nom unique pour l'audio
             audio_filename = f"audio_{uuid.uuid4().hex}.wav"
             audio_path = os.path.join(self.temp_dir, audio_filename)
 
+            # Import coûteux, fait seulement si MoviePy sert vraiment
+            from moviepy.video.io.VideoFileClip import VideoFileClip
+
+            started = time.perf_counter()
             # Extraire l'audio
             with VideoFileClip(video_path) as video:
                 audio = video.audio
                 if audio is None:
-                    raise AudioExtractionError(
-                        "Aucune piste audio trouvée dans la vidéo"
-                    )
+                    raise NoAudioStreamError("Aucune piste audio trouvée dans la vidéo")
 
                 audio.write_audiofile(audio_path, logger=None)
+                duration = video.duration
 
-            return audio_path
+            return {
+                "audio_path": audio_path,
+                "engine": "moviepy",
+                "seconds": time.perf_counter() - started,
+                "bytes": os.path.getsize(audio_path),
+                # Pic du processus courant (worker du pool de processus)
+                "peak_rss": (
+                    self._maxrss_bytes(
+                        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                    )
+                    if resource
+                    else None
+                ),
+                "media_duration": duration,
+            }
 
+        except AudioExtractionError:
+            raise
         except Exception as e:
-            if "AudioExtractionError" in str(type(e)):
-                raise
             raise AudioExtractionError(f"Erreur lors de l'extraction audio: {str(e)}")
 
+    async def detect_silences(
+        self, audio_path: str
+    ) -> Tuple[List[Tuple[float, float]], Optional[float]]:
+        """Détecte les silences (début, fin) d'un fichier audio et sa durée"""
+        cmd = [
+            "ffmpeg",
+            "-nostdin",
+            "-hide_banner",
+            "-nostats",
+            "-i",
+            audio_path,
+            "-af",
+            f"silencedetect=noise={settings.SILENCE_THRESHOLD_DB}dB:d={settings.SILENCE_MIN_DURATION}",
+            "-f",
+            "null",
+            "-",
+        ]
+        with profiler.span("FFmpeg (silences)", "subprocess", argv=cmd) as span:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            _, stderr = await communicate(process)
+            span["returncode"] = process.returncode
+        output = stderr.decode(errors="replace")
+        if process.returncode != 0:
+            raise AudioExtractionError(
+                f"Erreur lors de la détection des silences: {output.strip()[-2000:]}"
+            )
+
+        starts = [float(v) for v in re.findall(r"silence_start: (-?[\d.]+)", output)]
+        ends = [float(v) for v in re.findall(r"silence_end: ([\d.]+)", output)]
+        return list(zip(starts, ends)), self._parse_duration(output)
+
+    async def cut_audio(self, audio_path: str, start: float, duration: float) -> str:
+        """Découpe un extrait [start, start + duration] dans un nouveau fichier"""
+        extension = os.path.splitext(audio_path)[1]
+        chunk_path = os.path.join(
+            self.temp_dir, f"audio_chunk_{uuid.uuid4().hex}{extension}"
+        )
+        cmd = [
+            "ffmpeg",
+            "-nostdin",
+            "-v",
+            "error",
+            "-ss",
+            f"{start:.3f}",
+            "-t",
+            f"{duration:.3f}",
+            "-i",
+            audio_path,
+            # Réencodage (audio léger) pour une coupe précise à l'échantillon
+            "-ac",
+            "1",
+            "-ar",
+            str(settings.AUDIO_SAMPLE_RATE),
+            chunk_path,
+            "-y",
+        ]
+        with profiler.span("FFmpeg (découpe)", "subprocess", argv=cmd) as span:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                _, stderr = await communicate(process)
+            except asyncio.CancelledError:
+                self.cleanup_audio_file(chunk_path)
+                raise
+            span["returncode"] = process.returncode
+        if process.returncode != 0:
+            self.cleanup_audio_file(chunk_path)
+            raise AudioExtractionError(
+                f"Erreur lors du découpage audio: {stderr.decode(errors='replace').strip()}"
+            )
+        return chunk_path
+
+    def _parse_duration(self, ffmpeg_output: str) -> Optional[float]:
+        """Durée de l'entrée lue dans la sortie de ffmpeg (Duration: HH:MM:SS.xx)"""
+        match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", ffmpeg_output)
+        if not match:
+            return None
+        hours, minutes, seconds = match.groups()
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    @staticmethod
+    def _maxrss_bytes(maxrss: int) -> int:
+        # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+    def _print_stats(self, stats: Dict) -> None:
+        """Affiche les mesures d'extraction, ramenées à la minute de média"""
+        minutes = (stats.get("media_duration") or 0) / 60
+        if minutes <= 0:
+            print(
+                f"📏 Extraction {stats['engine']}: {stats['seconds']:.2f}s, {stats['bytes'] / 1e6:.2f}MB"
+            )
+            return
+        peak = stats.get("peak_rss")
+        peak_text = f", pic RSS {peak / 1e6:.0f}MB" if peak else ""
+        print(
+            f"📏 Extraction {stats['engine']}: {stats['seconds'] / minutes:.2f}s/min, "
+            f"{stats['bytes'] / 1e6 / minutes:.2f}MB/min{peak_text}"
+        )
+
     def cleanup_audio_file(self, audio_path: str) -> None:
         """Nettoie un fichier audio temporaire"""
         try:
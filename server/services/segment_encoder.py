@@ -0,0 +1,482 @@
+import asyncio
+import bisect
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pysrt
+from config.settings import settings
+from utils import profiler
+from utils.exceptions import VideoProcessingError
+from utils.executors import run_in_thread
+from utils.ffmpeg_progress import (
+    ProgressCallback,
+    ProgressTracker,
+    communicate,
+    run_ffmpeg,
+)
+
+# Profils H.264 (noms ffprobe) et leur nom pour libx264
+X264_PROFILES = {
+    "constrained baseline": "baseline",
+    "baseline": "baseline",
+    "main": "main",
+    "high": "high",
+    "high 10": "high10",
+    "high 4:2:2": "high422",
+    "high 4:4:4 predictive": "high444",
+}
+
+
+class SegmentEncoderService:
+    """Grave les sous-titres en parallèle sur des tranches découpées aux keyframes.
+
+    Chaque tranche démarre sur une keyframe et est encodée par son propre
+    processus ffmpeg avec un SRT recalé sur son début; les tranches sont
+    ensuite recollées par le démuxeur concat et l'audio d'origine est copié.
+    """
+
+    def __init__(self, temp_dir: str):
+        self.temp_dir = temp_dir
+
+    async def probe_video_frames(self, video_path: str) -> Dict:
+        """Liste les timestamps des images et des keyframes de la piste vidéo.
+
+        Les temps sont relatifs au début du fichier (``start_time`` retiré),
+        comme l'option ``-ss`` de ffmpeg. Chaque keyframe est décrite par
+        ``(pts, position, taille, pts - dts)`` de son paquet.
+        """
+        stdout = await self._run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-select_streams",
+                "v:0",
+                "-show_entries",
+                "packet=pts_time,dts_time,flags,pos,size"
+                ":stream=codec_name,pix_fmt,profile,level"
+                ":format=start_time,duration",
+                "-of",
+                "json",
+                video_path,
+            ],
+            "ffprobe",
+        )
+        info = json.loads(stdout)
+        start_time = float(info["format"].get("start_time") or 0)
+
+        frames, keyframes, keyframe_packets = [], [], []
+        for packet in info.get("packets", []):
+            if packet.get("pts_time") in (None, "N/A"):
+                continue
+            pts = float(packet["pts_time"]) - start_time
+            frames.append(pts)
+            if "K" in packet.get("flags", ""):
+                keyframes.append(pts)
+                try:
+                    delay = float(packet["pts_time"]) - float(packet["dts_time"])
+                    keyframe_packets.append(
+                        (pts, int(packet["pos"]), int(packet["size"]), delay)
+                    )
+                except (KeyError, ValueError):
+                    pass  # Position ou DTS inconnus: pas un point de coupe
+
+        if not frames or not keyframes:
+            raise VideoProcessingError("Aucune image vidéo trouvée par ffprobe")
+
+        stream = (info.get("streams") or [{}])[0]
+        return {
+            "duration": float(info["format"]["duration"]),
+            "frames": sorted(frames),
+            "keyframes": sorted(keyframes),
+            "keyframe_packets": sorted(keyframe_packets),
+            "codec_name": stream.get("codec_name"),
+            "pix_fmt": stream.get("pix_fmt"),
+            "profile": stream.get("profile"),
+            "level": stream.get("level"),
+        }
+
+    def idr_cut_points(
+        self, video_path: str, frames_info: Dict
+    ) -> Optional[Tuple[List[float], float]]:
+        """Keyframes IDR de la source et leur écart PTS - DTS (images B).
+
+        Une keyframe signalée par le conteneur peut être une image I d'un
+        GOP ouvert, dont les images suivantes référencent le GOP précédent:
+        seules les IDR permettent une copie sans réencodage. Leurs unités
+        NAL sont lues dans le fichier (échantillons MP4 préfixés par leur
+        longueur). None si la vidéo ne commence pas par une IDR ou si
+        l'écart varie d'une IDR à l'autre. Bloquant.
+        """
+        cut_points, delays = [], set()
+        with open(video_path, "rb") as f:
+            for pts, pos, size, delay in frames_info["keyframe_packets"]:
+                if self._is_idr(f, pos, size):
+                    cut_points.append(pts)
+                    delays.add(round(delay, 6))
+        if not cut_points or cut_points[0] > frames_info["frames"][0]:
+            return None
+        if len(delays) != 1:
+            return None
+        return cut_points, delays.pop()
+
+    @staticmethod
+    def _is_idr(f, pos: int, size: int) -> bool:
+        """Le paquet à ``pos`` contient-il une tranche IDR (NAL de type 5)?"""
+        # Les longueurs doivent couvrir exactement le paquet: un autre
+        # format (MPEG-TS, Annex B) n'est jamais pris pour une IDR
+        end = pos + size
+        idr = False
+        while pos + 5 <= end:
+            f.seek(pos)
+            header = f.read(5)
+            if len(header) < 5:
+                return False
+            idr = idr or header[4] & 0x1F == 5
+            pos += 4 + int.from_bytes(header[:4], "big")
+        return idr and pos == end
+
+    def plan_ranges(self, frames_info: Dict, parts: int) -> List[Tuple[float, int]]:
+        """Découpe en ``parts`` tranches [(début, nombre d'images)] calées sur des keyframes"""
+        frames = frames_info["frames"]
+        keyframes = frames_info["keyframes"]
+        duration = frames_info["duration"]
+
+        starts = [keyframes[0]]
+        for i in range(1, parts):
+            target = i * duration / parts
+            nearest = min(keyframes, key=lambda k: abs(k - target))
+            if nearest > starts[-1]:
+                starts.append(nearest)
+
+        # Le nombre exact d'images par tranche rend la découpe précise à l'image
+        ranges = []
+        for i, start in enumerate(starts):
+            end = starts[i + 1] if i + 1 < len(starts) else float("inf")
+            count = sum(1 for pts in frames if start <= pts < end)
+            ranges.append((start, count))
+        return ranges
+
+    async def burn_parallel(
+        self,
+        video_path: str,
+        srt_path: str,
+        output_path: str,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Optional[str]:
+        """Grave les sous-titres en plusieurs encodages ffmpeg simultanés.
+
+        Le nombre de tranches suit ``ENCODE_CPU_BUDGET``, sans descendre sous
+        ``ENCODE_MIN_SEGMENT_SECONDS`` par tranche. Retourne None si la vidéo
+        est trop courte pour être découpée.
+        """
+        frames_info = await self.probe_video_frames(video_path)
+        parts = min(
+            settings.ENCODE_CPU_BUDGET,
+            int(frames_info["duration"] // settings.ENCODE_MIN_SEGMENT_SECONDS),
+        )
+        ranges = self.plan_ranges(frames_info, parts) if parts > 1 else []
+        if len(ranges) < 2:
+            return None
+        print(f"🧩 Encodage parallèle en {len(ranges)} tranches")
+
+        work_dir = tempfile.mkdtemp(prefix="segments_", dir=self.temp_dir)
+        try:
+            subs = pysrt.open(srt_path, encoding="utf-8")
+            # Les cœurs disponibles sont répartis entre les processus ffmpeg
+            threads = max(1, settings.ENCODE_CPU_BUDGET // len(ranges))
+            ends = [start for start, _ in ranges[1:]] + [frames_info["duration"]]
+            tracker = ProgressTracker(frames_info["duration"], on_progress)
+            encoder_args = self.video_encoder_args(frames_info)
+
+            part_paths = await asyncio.gather(
+                *(
+                    self._encode_range(
+                        video_path,
+                        subs,
+                        start,
+                        end,
+                        count,
+                        threads,
+                        os.path.join(work_dir, f"part_{i:04d}.mp4"),
+                        encoder_args,
+                        progress=tracker.part(i),
+                    )
+                    for i, ((start, count), end) in enumerate(zip(ranges, ends))
+                )
+            )
+            await self.concat_parts(part_paths, video_path, output_path, work_dir)
+            return output_path
+
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def plan_gop_runs(
+        self, frames_info: Dict, cut_points: List[float], subs: pysrt.SubRipFile
+    ) -> List[Tuple[float, float, int, bool]]:
+        """Regroupe les GOP en tranches [(début, fin, nombre d'images, à graver)].
+
+        Les GOP commencent aux ``cut_points`` (IDR). Un GOP est à graver
+        s'il recouvre l'intervalle d'au moins un sous-titre; les GOP
+        consécutifs de même nature sont fusionnés.
+        """
+        frames = frames_info["frames"]
+        intervals = [
+            (item.start.ordinal / 1000, item.end.ordinal / 1000) for item in subs
+        ]
+        bounds = cut_points[1:] + [frames_info["duration"]]
+
+        runs: List[Tuple[float, float, int, bool]] = []
+        for start, end in zip(cut_points, bounds):
+            burn = any(s < end and e > start for s, e in intervals)
+            count = bisect.bisect_left(frames, end) - bisect.bisect_left(frames, start)
+            if runs and runs[-1][3] == burn:
+                run_start, _, run_count, _ = runs[-1]
+                runs[-1] = (run_start, end, run_count + count, burn)
+            else:
+                runs.append((start, end, count, burn))
+        return [run for run in runs if run[2] > 0]
+
+    async def burn_smart(
+        self,
+        video_path: str,
+        srt_path: str,
+        output_path: str,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Optional[str]:
+        """Grave les sous-titres en ne réencodant que les GOP qui en affichent.
+
+        Les autres GOP, découpés aux seules IDR, sont copiés tels quels: le
+        temps d'encodage suit la part de la vidéo couverte par des
+        sous-titres, pas sa durée totale. Les tranches sont écrites en
+        MPEG-TS, avec leurs SPS/PPS dans le flux, pour que tranches copiées
+        et réencodées se décodent à la suite.
+        Retourne None si la source n'est pas en H.264, si ses IDR ne
+        permettent pas la copie ou si tout est à graver.
+        """
+        frames_info = await self.probe_video_frames(video_path)
+        if frames_info["codec_name"] != "h264":
+            return None
+        idr = await run_in_thread(self.idr_cut_points, video_path, frames_info)
+        if idr is None:
+            print("⚠ Keyframes IDR introuvables ou irrégulières, réencodage complet")
+            return None
+        cut_points, delay = idr
+
+        subs = pysrt.open(srt_path, encoding="utf-8")
+        runs = self.plan_gop_runs(frames_info, cut_points, subs)
+        burn_runs = [run for run in runs if run[3]]
+        if all(burn for _, _, _, burn in runs):
+            return None
+
+        covered = sum(end - start for start, end, _, _ in burn_runs)
+        print(
+            f"🧩 Réencodage de {covered:.0f}s sur {frames_info['duration']:.0f}s "
+            f"({len(burn_runs)} tranches avec sous-titres)"
+        )
+
+        work_dir = tempfile.mkdtemp(prefix="smart_", dir=self.temp_dir)
+        try:
+            budget = max(1, settings.ENCODE_CPU_BUDGET)
+            threads = max(1, budget // max(1, min(budget, len(burn_runs))))
+            slots = asyncio.Semaphore(budget)
+            # Seules les tranches réencodées comptent: les copies sont quasi immédiates
+            tracker = ProgressTracker(covered, on_progress)
+            encoder_args = self.video_encoder_args(frames_info)
+            if delay > 0:
+                # Les GOP copiés gardent le décalage DTS de leurs images B: les
+                # tranches réencodées le reprennent, les DTS restent croissants
+                encoder_args += ["-bsf:v", f"setts=dts=DTS-round({delay:.6f}/TB)"]
+
+            async def run_part(index: int, start, end, count, burn) -> str:
+                part_path = os.path.join(work_dir, f"part_{index:04d}.ts")
+                async with slots:
+                    if burn:
+                        return await self._encode_range(
+                            video_path,
+                            subs,
+                            start,
+                            end,
+                            count,
+                            threads,
+                            part_path,
+                            encoder_args,
+                            progress=tracker.part(index),
+                        )
+                    return await self._copy_range(video_path, start, count, part_path)
+
+            part_paths = await asyncio.gather(
+                *(run_part(i, *run) for i, run in enumerate(runs))
+            )
+            await self.concat_parts(
+                part_paths,
+                video_path,
+                output_path,
+                work_dir,
+                durations=[end - start for start, end, _, _ in runs],
+            )
+            return output_path
+
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    async def _copy_range(
+        self, video_path: str, start: float, frame_count: int, part_path: str
+    ) -> str:
+        """Copie une tranche sans réencodage (elle démarre sur une IDR).
+
+        Le muxeur MPEG-TS recopie les SPS/PPS devant chaque IDR: la tranche
+        se décode après une tranche réencodée.
+        """
+        cmd = ["ffmpeg", "-nostdin", "-v", "error", "-ss", f"{start:.6f}"]
+        cmd += ["-i", video_path, "-map", "0:v:0", "-an", "-sn", "-dn"]
+        cmd += ["-frames:v", str(frame_count), "-c:v", "copy", part_path, "-y"]
+
+        await run_ffmpeg(cmd, "FFmpeg (copie)")
+        return part_path
+
+    async def _encode_range(
+        self,
+        video_path: str,
+        subs: pysrt.SubRipFile,
+        start: float,
+        end: float,
+        frame_count: int,
+        threads: int,
+        part_path: str,
+        encoder_args: Sequence[str],
+        progress: Optional[Callable[[float, Optional[float]], Awaitable[None]]] = None,
+    ) -> str:
+        """Encode une tranche (vidéo seule) avec ses sous-titres recalés"""
+        work_dir = os.path.dirname(part_path)
+        srt_part = self.write_shifted_srt(subs, start, end, work_dir)
+
+        cmd = ["ffmpeg", "-nostdin", "-v", "error", "-ss", f"{start:.6f}"]
+        cmd += ["-i", video_path, "-map", "0:v:0", "-an", "-sn", "-dn"]
+        cmd += ["-frames:v", str(frame_count)]
+        if srt_part:
+            cmd += ["-vf", f"subtitles='{srt_part}'"]
+        cmd += list(encoder_args)
+        cmd += ["-threads", str(threads)]
+        # Horodatages conservés tels quels: pas d'image dupliquée ni perdue
+        cmd += ["-vsync", "passthrough", part_path, "-y"]
+
+        await run_ffmpeg(cmd, "FFmpeg (tranche)", progress)
+        return part_path
+
+    def write_shifted_srt(
+        self, subs: pysrt.SubRipFile, start: float, end: float, work_dir: str
+    ) -> Optional[str]:
+        """Écrit les sous-titres visibles dans [start, end], recalés sur ``start``.
+
+        Un sous-titre à cheval sur une frontière est présent dans les deux
+        tranches avec ses bornes tronquées: l'affichage reste continu.
+        """
+        start_ms, end_ms = int(start * 1000), int(end * 1000)
+        shifted = pysrt.SubRipFile()
+        for item in subs:
+            if item.end.ordinal <= start_ms or item.start.ordinal >= end_ms:
+                continue
+            shifted.append(
+                pysrt.SubRipItem(
+                    index=len(shifted) + 1,
+                    start=pysrt.SubRipTime.from_ordinal(
+                        max(0, item.start.ordinal - start_ms)
+                    ),
+                    end=pysrt.SubRipTime.from_ordinal(item.end.ordinal - start_ms),
+                    text=item.text,
+                )
+            )
+
+        if not len(shifted):
+            return None
+        path = os.path.join(work_dir, f"subs_{uuid.uuid4().hex}.srt")
+        shifted.save(path, encoding="utf-8")
+        return path
+
+    async def concat_parts(
+        self,
+        part_paths: List[str],
+        video_path: str,
+        output_path: str,
+        work_dir: str,
+        durations: Optional[List[float]] = None,
+    ) -> None:
+        """Recolle les tranches (concat demuxer) et copie l'audio d'origine.
+
+        Les ``durations`` connues fixent le décalage exact de chaque tranche,
+        sans dépendre de la durée lue dans les fichiers.
+        """
+        list_path = os.path.join(work_dir, "parts.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for i, path in enumerate(part_paths):
+                f.write(f"file '{path}'\n")
+                if durations:
+                    f.write(f"duration {durations[i]:.6f}\n")
+
+        await run_ffmpeg(
+            [
+                "ffmpeg",
+                "-nostdin",
+                "-v",
+                "error",
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                list_path,
+                "-i",
+                video_path,
+                "-map",
+                "0:v",
+                "-map",
+                "1:a?",
+                "-c",
+                "copy",
+                "-movflags",
+                "+faststart",
+                output_path,
+                "-y",
+            ],
+            "FFmpeg (concat)",
+        )
+
+    def video_encoder_args(self, frames_info: Dict) -> List[str]:
+        """Paramètres x264 communs, identiques pour toutes les tranches.
+
+        Sans images B, les DTS restent croissants à la jonction, et chaque
+        GOP fermé se décode sans référence à la tranche précédente: les
+        tranches se recollent en copie de flux. SPS/PPS sont répétés devant
+        chaque keyframe. Profil et niveau d'une source H.264 sont repris:
+        tranches copiées et réencodées partagent les mêmes contraintes de
+        décodage.
+        """
+        args = ["-c:v", "libx264", "-preset", "medium", "-crf", "23", "-bf", "0"]
+        args += ["-flags", "+cgop", "-x264-params", "open-gop=0:repeat-headers=1"]
+        if frames_info["pix_fmt"]:
+            args += ["-pix_fmt", frames_info["pix_fmt"]]
+        if frames_info["codec_name"] == "h264":
+            profile = X264_PROFILES.get((frames_info.get("profile") or "").lower())
+            if profile:
+                args += ["-profile:v", profile]
+            if (frames_info.get("level") or 0) > 0:
+                args += ["-level:v", f"{frames_info['level'] / 10:g}"]
+        return args
+
+    async def _run(self, cmd: List[str], label: str) -> bytes:
+        with profiler.span(label, "subprocess", argv=cmd) as span:
+            process = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await communicate(process)
+            span["returncode"] = process.returncode
+        if process.returncode != 0:
+            raise VideoProcessingError(
+                f"Erreur {label}: {stderr.decode(errors='replace').strip()[-2000:]}"
+            )
+        return stdout
@@ -1,12 +1,59 @@
 import os
 import uuid
 from datetime import timedelta
-from typing import Dict, List
+from typing import Callable, Dict, List
 
 import pysrt
 from utils.exceptions import SubtitleGenerationError
 
 
+class SrtWriter:
+    """Écrit un fichier SRT au fil de l'eau, à mesure que les segments arrivent.
+
+    Méthodes bloquantes (accès disque): les appeler via ``run_in_thread``
+    depuis du code asynchrone.
+    """
+
+    def __init__(self, srt_path: str, to_srt_time: Callable[[float], pysrt.SubRipTime]):
+        self.srt_path = srt_path
+        self.count = 0
+        self._to_srt_time = to_srt_time
+        self._file = open(srt_path, "w", encoding="utf-8")
+
+    def write(self, segments: List[Dict]) -> None:
+        """Ajoute des segments à la suite du fichier"""
+        try:
+            for segment in segments:
+                self.count += 1
+                sub = pysrt.SubRipItem(
+                    index=self.count,
+                    start=self._to_srt_time(segment["start"]),
+                    end=self._to_srt_time(segment["end"]),
+                    text=segment["text"],
+                )
+                # Même format que pysrt.SubRipFile.save: une ligne vide entre items
+                self._file.write(f"{sub}\n")
+            self._file.flush()
+        except Exception as e:
+            raise SubtitleGenerationError(
+                f"Erreur lors de la création du fichier SRT: {str(e)}"
+            )
+
+    def close(self) -> str:
+        """Termine le fichier et retourne son chemin"""
+        self._file.close()
+        if not self.count:
+            self.discard()
+            raise SubtitleGenerationError("Aucun segment à convertir")
+        return self.srt_path
+
+    def discard(self) -> None:
+        """Abandonne le fichier (pipeline interrompu)"""
+        self._file.close()
+        if os.path.exists(self.srt_path):
+            os.remove(self.srt_path)
+
+
 class SubtitleService:
     def __init__(self, temp_dir: str):
         self.temp_dir = temp_dir
@@ -16,29 +63,19 @@ class SubtitleService:
         if not segments:
             raise SubtitleGenerationError("Aucun segment à convertir")
 
-        try:
-            # Générer un nom unique pour le fichier SRT
-            srt_filename = f"subtitles_{uuid.uuid4().hex}.srt"
-            srt_path = os.path.join(self.temp_dir, srt_filename)
-
-            subs = pysrt.SubRipFile()
-
-            for i, segment in enumerate(segments, 1):
-                # Convertir les timestamps
-                start_time = self._seconds_to_srt_time(segment["start"])
-                end_time = self._seconds_to_srt_time(segment["end"])
-
-                # Créer le sous-titre
-                sub = pysrt.SubRipItem(
-                    index=i, start=start_time, end=end_time, text=segment["text"]
-                )
-                subs.append(sub)
-
-            # Sauvegarder le fichier
-            subs.save(srt_path, encoding="utf-8")
-            return srt_path
+        writer = self.create_srt_writer()
+        writer.write(segments)
+        return writer.close()
 
-        except Exception as e:
+    def create_srt_writer(self) -> SrtWriter:
+        """Ouvre un fichier SRT à remplir segment par segment"""
+        # Générer un nom unique pour le fichier SRT
+        srt_filename = f"subtitles_{uuid.uuid4().hex}.srt"
+        try:
+            return SrtWriter(
+                os.path.join(self.temp_dir, srt_filename), self._seconds_to_srt_time
+            )
+        except OSError as e:
             raise SubtitleGenerationError(
                 f"Erreur lors de la création du fichier SRT: {str(e)}"
             )
@@ -1,36 +1,289 @@
-from typing import Dict
+import asyncio
+import os
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Tuple
 
-import openai
 from config.settings import settings
-from utils.exceptions import TranscriptionError
+from utils import metrics, profiler
+from utils.exceptions import AudioExtractionError, TranscriptionError
+from utils.rate_limiter import backoff_delay
+from utils.translation_cache import normalize_text
+
+from .audio_service import AudioService
+
+if TYPE_CHECKING:
+    import openai
+
+# Reçoit les segments transcrits au fil de l'eau, dans l'ordre chronologique
+SegmentsCallback = Callable[[List[Dict]], Awaitable[None]]
 
 
 class TranscriptionService:
-    def __init__(self, api_key: str):
-        self.client = openai.OpenAI(api_key=api_key)
+    def __init__(self, api_key: str, audio_service: Optional[AudioService] = None):
+        self.api_key = api_key
+        self._client: Optional["openai.AsyncOpenAI"] = None
+        self.audio_service = audio_service or AudioService(settings.WORK_DIR)
+        self._in_flight = asyncio.Semaphore(settings.TRANSCRIPTION_CONCURRENCY)
+
+    @property
+    def client(self) -> "openai.AsyncOpenAI":
+        """Client créé au premier appel: le SDK est long à importer"""
+        if self._client is None:
+            import openai
+
+            # Les retries sont gérés par morceau, voir _with_retries
+            self._client = openai.AsyncOpenAI(
+                api_key=self.api_key, base_url=settings.OPENAI_BASE_URL, max_retries=0
+            )
+        return self._client
 
-    def transcribe_audio(self, audio_path: str, language: str = "en") -> Dict:
-        """Transcrit un fichier audio avec Whisper"""
+    async def transcribe_audio(
+        self,
+        audio_path: str,
+        language: str = "en",
+        duration: Optional[float] = None,
+        on_segments: Optional[SegmentsCallback] = None,
+    ) -> Dict:
+        """Transcrit un fichier audio avec Whisper.
+
+        Un fichier au-delà de la taille ou de la durée maximum d'une requête
+        est découpé aux silences et ses morceaux transcrits en parallèle.
+        ``on_segments`` reçoit les segments de chaque morceau dès qu'ils sont
+        recollés, sans attendre la fin de la transcription.
+        """
         try:
-            with open(audio_path, "rb") as audio_file:
-                transcript = self.client.audio.transcriptions.create(
-                    model=settings.WHISPER_MODEL,
-                    file=audio_file,
-                    response_format="verbose_json",
-                    language=language,
+            size = os.path.getsize(audio_path)
+        except FileNotFoundError:
+            raise TranscriptionError(f"Fichier audio non trouvé: {audio_path}")
+
+        if size <= settings.TRANSCRIPTION_CHUNK_MAX_BYTES and (
+            duration is None or duration <= settings.TRANSCRIPTION_CHUNK_MAX_SECONDS
+        ):
+            result = await self._with_retries(
+                lambda attempt: self._request(audio_path, language, attempt)
+            )
+            if on_segments and result.get("segments"):
+                await on_segments(result["segments"])
+        else:
+            result = await self._transcribe_chunked(
+                audio_path, language, size, on_segments
+            )
+
+        # Validation du résultat
+        if not result.get("segments"):
+            raise TranscriptionError("Aucun segment trouvé dans la transcription")
+
+        return result
+
+    async def _transcribe_chunked(
+        self,
+        audio_path: str,
+        language: str,
+        size: int,
+        on_segments: Optional[SegmentsCallback] = None,
+    ) -> Dict:
+        """Découpe l'audio aux silences puis transcrit les morceaux en parallèle.
+
+        Au plus ``TRANSCRIPTION_CONCURRENCY`` morceaux sont découpés et
+        transcrits à la fois. Ils sont recollés dans l'ordre, chacun dès que
+        lui et ses prédécesseurs sont transcrits.
+        """
+        silences, duration = await self.audio_service.detect_silences(audio_path)
+        if not duration:
+            raise TranscriptionError("Durée de l'audio indéterminée")
+
+        ranges = self._plan_chunks(duration, size / duration, silences)
+        print(f"✂ Audio découpé en {len(ranges)} morceaux")
+
+        tasks = [
+            asyncio.ensure_future(
+                self._transcribe_range(audio_path, language, start, end, duration)
+            )
+            for start, end in ranges
+        ]
+        segments: List[Dict] = []
+        try:
+            for chunk_range, task in zip(ranges, tasks):
+                added = self._merge_chunk(segments, chunk_range, await task, duration)
+                if on_segments and added:
+                    await on_segments(added)
+        finally:
+            # Un morceau en échec (ou une annulation) arrête les autres, qui
+            # suppriment leur fichier avant que le job ne se termine
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        return {
+            "text": " ".join(segment["text"].strip() for segment in segments),
+            "language": language,
+            "duration": duration,
+            "segments": segments,
+        }
+
+    def _plan_chunks(
+        self,
+        duration: float,
+        bytes_per_second: float,
+        silences: List[Tuple[float, float]],
+    ) -> List[Tuple[float, float]]:
+        """Choisit des points de coupe au milieu des silences, sous les limites"""
+        # Marge pour le chevauchement et les variations de débit
+        max_length = (
+            min(
+                settings.TRANSCRIPTION_CHUNK_MAX_SECONDS,
+                0.9 * settings.TRANSCRIPTION_CHUNK_MAX_BYTES / bytes_per_second,
+            )
+            - 2 * settings.TRANSCRIPTION_CHUNK_OVERLAP
+        )
+        max_length = max(max_length, 30.0)
+        cut_candidates = [(start + end) / 2 for start, end in silences]
+
+        ranges = []
+        position = 0.0
+        while duration - position > max_length:
+            limit = position + max_length
+            # Le silence le plus tardif dans le dernier quart du morceau
+            window = [c for c in cut_candidates if limit - max_length / 4 <= c <= limit]
+            cut = window[-1] if window else limit
+            ranges.append((position, cut))
+            position = cut
+        ranges.append((position, duration))
+        return ranges
+
+    async def _transcribe_range(
+        self,
+        audio_path: str,
+        language: str,
+        start: float,
+        end: float,
+        duration: float,
+    ) -> Dict:
+        """Transcrit un morceau, étendu du chevauchement de part et d'autre.
+
+        Découpe et requête forment une tentative: un morceau en échec est
+        redécoupé et renvoyé seul.
+        """
+        overlap = settings.TRANSCRIPTION_CHUNK_OVERLAP
+        chunk_start = max(0.0, start - overlap)
+        chunk_end = min(duration, end + overlap)
+
+        async def attempt(number: int) -> Dict:
+            chunk_path = await self.audio_service.cut_audio(
+                audio_path, chunk_start, chunk_end - chunk_start
+            )
+            try:
+                return await self._request(chunk_path, language, number)
+            finally:
+                self.audio_service.cleanup_audio_file(chunk_path)
+
+        result = await self._with_retries(attempt)
+        result["offset"] = chunk_start
+        return result
+
+    def _merge_chunk(
+        self,
+        segments: List[Dict],
+        chunk_range: Tuple[float, float],
+        result: Dict,
+        duration: float,
+    ) -> List[Dict]:
+        """Ajoute à ``segments`` ceux d'un morceau (timestamps décalés, doublons
+        de frontière retirés) et retourne les segments ajoutés"""
+        start, end = chunk_range
+        offset = result["offset"]
+        added: List[Dict] = []
+        for segment in result.get("segments") or []:
+            shifted = dict(segment)
+            shifted["start"] = segment["start"] + offset
+            shifted["end"] = segment["end"] + offset
+
+            # Un segment appartient au morceau qui contient son milieu:
+            # les répétitions dues au chevauchement sont ainsi écartées
+            middle = (shifted["start"] + shifted["end"]) / 2
+            if not start <= middle < end and not (end == duration and middle >= end):
+                continue
+
+            # Même texte à cheval sur la frontière: doublon
+            if (
+                segments
+                and shifted["start"] < segments[-1]["end"]
+                and normalize_text(shifted["text"])
+                == normalize_text(segments[-1]["text"])
+            ):
+                continue
+
+            shifted["id"] = len(segments)
+            segments.append(shifted)
+            added.append(shifted)
+        return added
+
+    async def _with_retries(self, attempt: Callable[[int], Awaitable[Dict]]) -> Dict:
+        """Exécute une tentative, réessayée seule en cas d'erreur transitoire.
+
+        Chaque tentative occupe une place de ``TRANSCRIPTION_CONCURRENCY``;
+        l'attente avant la suivante la libère.
+        """
+        import openai
+
+        model = settings.WHISPER_MODEL
+        for number in range(settings.TRANSCRIPTION_MAX_RETRIES + 1):
+            last = number == settings.TRANSCRIPTION_MAX_RETRIES
+            try:
+                async with self._in_flight:
+                    return await attempt(number)
+
+            except (
+                openai.RateLimitError,
+                openai.APIConnectionError,
+                openai.APITimeoutError,
+                openai.InternalServerError,
+            ) as e:
+                status = (
+                    "rate_limited" if isinstance(e, openai.RateLimitError) else "error"
                 )
+                metrics.transcription_requests.inc(1, model, status)
+                if last:
+                    raise TranscriptionError(f"Erreur API OpenAI: {str(e)}")
+                metrics.api_retries.inc(1, model, status)
 
-            result = transcript.model_dump()
+            except AudioExtractionError as e:
+                # Découpe du morceau en échec (ffmpeg)
+                if last:
+                    raise TranscriptionError(f"Découpe de l'audio impossible: {e}")
+                print(f"⚠ Découpe de l'audio en échec, nouvel essai: {e}")
 
-            # Validation du résultat
-            if not result.get("segments"):
-                raise TranscriptionError("Aucun segment trouvé dans la transcription")
+            except openai.APIError as e:
+                metrics.transcription_requests.inc(1, model, "error")
+                raise TranscriptionError(f"Erreur API OpenAI: {str(e)}")
+            except TranscriptionError:
+                raise
+            except Exception as e:
+                raise TranscriptionError(f"Erreur lors de la transcription: {str(e)}")
 
-            return result
+            await asyncio.sleep(backoff_delay(number))
 
-        except openai.APIError as e:
-            raise TranscriptionError(f"Erreur API OpenAI: {str(e)}")
+    async def _request(self, audio_path: str, language: str, attempt: int) -> Dict:
+        """Une requête Whisper"""
+        model = settings.WHISPER_MODEL
+        try:
+            audio_file = open(audio_path, "rb")
         except FileNotFoundError:
             raise TranscriptionError(f"Fichier audio non trouvé: {audio_path}")
-        except Exception as e:
-            raise TranscriptionError(f"Erreur lors de la transcription: {str(e)}")
+        with audio_file:
+            size = os.fstat(audio_file.fileno()).st_size
+            metrics.transcription_upload_bytes.inc(size, model)
+            with profiler.span(
+                "openai.transcription",
+                "api",
+                model=model,
+                attempt=attempt,
+                bytes=size,
+            ):
+                transcript = await self.client.audio.transcriptions.create(
+                    model=model,
+                    file=audio_file,
+                    response_format="verbose_json",
+                    language=language,
+                )
+        metrics.transcription_requests.inc(1, model, "ok")
+        return transcript.model_dump()
@@ -1,14 +1,44 @@
 import asyncio
-from typing import Dict, List
+import json
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-import openai
 from config.settings import settings
+from utils import metrics, profiler
 from utils.exceptions import TranslationError
+from utils.executors import run_in_thread
+from utils.rate_limiter import backoff_delay, translation_rate_limiter
+from utils.translation_cache import normalize_text, translation_cache
+
+if TYPE_CHECKING:
+    import openai
+
+# À incrémenter à chaque modification des prompts (invalide le cache)
+PROMPT_VERSION = "1"
 
 
 class TranslationService:
     def __init__(self, api_key: str):
-        self.client = openai.OpenAI(api_key=api_key)
+        self.api_key = api_key
+        self._client: Optional["openai.AsyncOpenAI"] = None
+        self.rate_limiter = translation_rate_limiter
+        self._in_flight = asyncio.Semaphore(settings.TRANSLATION_CONCURRENCY)
+        self.cache = translation_cache
+        # Traductions en cours par clé de cache: un texte déjà demandé par un
+        # autre lot (ou un autre job) attend son résultat au lieu d'être
+        # retraduit; None si la traduction a échoué
+        self._pending: Dict[str, "asyncio.Future[Optional[str]]"] = {}
+
+    @property
+    def client(self) -> "openai.AsyncOpenAI":
+        """Client créé au premier appel: le SDK est long à importer"""
+        if self._client is None:
+            import openai
+
+            # Les retries sont gérés ici, avec le limiteur partagé
+            self._client = openai.AsyncOpenAI(
+                api_key=self.api_key, base_url=settings.OPENAI_BASE_URL, max_retries=0
+            )
+        return self._client
 
     async def translate_segments(
         self, segments: List[Dict], target_language: str = "fr"
@@ -17,34 +47,331 @@ class TranslationService:
         if not segments:
             return []
 
+        # Dédoublonnage: un seul texte à traduire par source identique du job
+        unique_texts: List[str] = []
+        positions: Dict[str, int] = {}
+        slots: List[int] = []
+        for segment in segments:
+            normalized = normalize_text(segment["text"])
+            if normalized not in positions:
+                positions[normalized] = len(unique_texts)
+                unique_texts.append(segment["text"])
+            slots.append(positions[normalized])
+        self.cache.deduplicated += len(segments) - len(unique_texts)
+
+        translations = await self._translate_texts(unique_texts, target_language)
+
         translated_segments = []
+        for segment, slot in zip(segments, slots):
+            translated_segment = segment.copy()
+            # En cas d'échec, garder le texte original
+            translated_segment["text"] = translations.get(slot, segment["text"])
+            translated_segments.append(translated_segment)
 
-        for i, segment in enumerate(segments):
-            try:
-                translated_text = await self._translate_single_segment(
-                    segment["text"], target_language
+        return translated_segments
+
+    async def _translate_texts(
+        self, texts: List[str], target_language: str
+    ) -> Dict[int, str]:
+        """Traduit des textes distincts en passant par la mémoire de traduction.
+
+        Les textes déjà en cours de traduction par un autre appel (lots
+        concurrents d'un même job) ne sont pas redemandés: leur résultat est
+        attendu.
+        """
+        keys = [
+            self.cache.make_key(
+                text, target_language, settings.TRANSLATION_MODEL, PROMPT_VERSION
+            )
+            for text in texts
+        ]
+        waiting = {
+            i: self._pending[key] for i, key in enumerate(keys) if key in self._pending
+        }
+        loop = asyncio.get_running_loop()
+        owned = {i: loop.create_future() for i in range(len(texts)) if i not in waiting}
+        for i, future in owned.items():
+            self._pending[keys[i]] = future
+        self.cache.deduplicated += len(waiting)
+
+        translations: Dict[int, str] = {}
+        try:
+            translations.update(
+                await self._translate_owned(
+                    [(i, texts[i], keys[i]) for i in owned], target_language
                 )
+            )
+        finally:
+            for i, future in owned.items():
+                if self._pending.get(keys[i]) is future:
+                    del self._pending[keys[i]]
+                future.set_result(translations.get(i))
+
+        # Textes traduits par un autre appel; refaits ici si celui-ci a échoué
+        retry = []
+        for i, future in waiting.items():
+            # shield: l'annulation de cet appel ne touche pas la traduction
+            # attendue par les autres
+            translation = await asyncio.shield(future)
+            if translation is None:
+                retry.append(i)
+            else:
+                translations[i] = translation
+        if retry:
+            retried = await self._translate_texts(
+                [texts[i] for i in retry], target_language
+            )
+            translations.update({retry[j]: text for j, text in retried.items()})
+        return translations
 
-                # Créer le segment traduit
-                translated_segment = segment.copy()
-                translated_segment["text"] = translated_text
-                translated_segments.append(translated_segment)
+    async def _translate_owned(
+        self, items: List[Tuple[int, str, str]], target_language: str
+    ) -> Dict[int, str]:
+        """Traduit des textes (index, texte, clé) absents du cache"""
+        if not items:
+            return {}
+        keys = {i: key for i, _, key in items}
+        cached = await run_in_thread(self.cache.get_many, list(keys.values()))
+        translations = {i: cached[key] for i, key in keys.items() if key in cached}
 
-                # Délai pour éviter les rate limits
-                if i < len(segments) - 1:  # Pas de délai après le dernier
-                    await asyncio.sleep(settings.TRANSLATION_DELAY)
+        missing = [(i, text) for i, text, _ in items if i not in translations]
+        if cached:
+            print(f"💾 {len(cached)} traduction(s) trouvée(s) en cache")
 
+        if settings.TRANSLATION_BATCH_MODE:
+            new_translations = await self._translate_batched(missing, target_language)
+        else:
+            new_translations = await self._translate_each(missing, target_language)
+
+        # Les traductions obtenues sont gardées même si le cache échoue
+        try:
+            await run_in_thread(
+                self.cache.put_many,
+                {keys[i]: text for i, text in new_translations.items()},
+            )
+        except Exception as e:
+            print(f"⚠ Traductions non mises en cache: {e}")
+        translations.update(new_translations)
+        return translations
+
+    async def _translate_each(
+        self, items: List[Tuple[int, str]], target_language: str
+    ) -> Dict[int, str]:
+        """Traduit les textes un par un (requêtes parallèles)"""
+        results = await asyncio.gather(
+            *(
+                self._translate_single_segment(text, target_language)
+                for _, text in items
+            ),
+            return_exceptions=True,
+        )
+
+        translations: Dict[int, str] = {}
+        for (i, _), result in zip(items, results):
+            if isinstance(result, Exception):
+                print(f"Erreur lors de la traduction du segment {i + 1}: {str(result)}")
+                continue
+            translations[i] = result
+        return translations
+
+    async def _translate_batched(
+        self, items: List[Tuple[int, str]], target_language: str
+    ) -> Dict[int, str]:
+        """Traduit les textes par lots indexés sous un budget de tokens"""
+        if not items:
+            return {}
+
+        batches = self._build_batches(items)
+        results = await asyncio.gather(
+            *(self._translate_batch(batch, target_language) for batch in batches)
+        )
+
+        translations: Dict[int, str] = {}
+        for result in results:
+            translations.update(result)
+
+        print(f"📦 {len(items)} segments traduits en {len(batches)} lot(s)")
+        return translations
+
+    def _build_batches(
+        self, items: List[Tuple[int, str]]
+    ) -> List[List[Tuple[int, str]]]:
+        """Regroupe les textes (index, texte) en lots respectant le budget"""
+        batches: List[List[Tuple[int, str]]] = []
+        current: List[Tuple[int, str]] = []
+        current_tokens = 0
+
+        for i, text in items:
+            tokens = self._estimate_tokens(text)
+            if current and (
+                current_tokens + tokens > settings.TRANSLATION_BATCH_MAX_TOKENS
+                or len(current) >= settings.TRANSLATION_BATCH_SIZE
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append((i, text))
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _translate_batch(
+        self, batch: List[Tuple[int, str]], target_language: str
+    ) -> Dict[int, str]:
+        """Traduit un lot; renvoie en plus petits lots les index manquants"""
+        if len(batch) == 1:
+            index, text = batch[0]
+            try:
+                return {
+                    index: await self._translate_single_segment(text, target_language)
+                }
             except Exception as e:
-                print(f"Erreur lors de la traduction du segment {i + 1}: {str(e)}")
-                # En cas d'erreur, garder le texte original
-                translated_segments.append(segment)
+                print(f"Erreur lors de la traduction du segment {index + 1}: {str(e)}")
+                return {}
 
-        return translated_segments
+        try:
+            translations = await self._request_batch(batch, target_language)
+        except TranslationError as e:
+            print(f"⚠ Lot de {len(batch)} segments rejeté: {str(e)}")
+            translations = {}
+
+        missing = [item for item in batch if item[0] not in translations]
+        if missing:
+            middle = (len(missing) + 1) // 2
+            for part in (missing[:middle], missing[middle:]):
+                if part:
+                    translations.update(
+                        await self._translate_batch(part, target_language)
+                    )
+
+        return translations
+
+    async def _request_batch(
+        self, batch: List[Tuple[int, str]], target_language: str
+    ) -> Dict[int, str]:
+        """Envoie un lot en une seule requête et l'aligne sur les index demandés"""
+        import openai
+
+        payload = {"segments": [{"id": i, "text": text} for i, text in batch]}
+        input_tokens = sum(self._estimate_tokens(text) for _, text in batch)
+
+        try:
+            response = await self._create_completion(
+                model=settings.TRANSLATION_MODEL,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": (
+                            f"You are a professional translator. Translate each segment to {target_language} while preserving meaning, tone, and style. "
+                            'You receive a JSON object {"segments": [{"id": int, "text": str}]}. '
+                            'Reply only with a JSON object {"translations": [{"id": int, "text": str}]} '
+                            "containing exactly one entry per input id, in the same order. Never merge or split segments."
+                        ),
+                    },
+                    {
+                        "role": "user",
+                        "content": json.dumps(payload, ensure_ascii=False),
+                    },
+                ],
+                response_format={"type": "json_object"},
+                # Les traductions peuvent être plus longues que la source
+                max_tokens=2 * input_tokens + 20 * len(batch) + 100,
+                temperature=0.1,
+            )
+            content = response.choices[0].message.content
+
+        except openai.APIError as e:
+            raise TranslationError(f"Erreur API OpenAI lors de la traduction: {str(e)}")
+
+        try:
+            items = json.loads(content)["translations"]
+            translations = {
+                int(item["id"]): str(item["text"]).strip() for item in items
+            }
+        except (ValueError, TypeError, KeyError) as e:
+            raise TranslationError(f"Réponse de lot illisible: {str(e)}")
+
+        # Un id inconnu ou dupliqué signifie que la réponse est désalignée
+        expected = {i for i, _ in batch}
+        if len(translations) != len(items) or not set(translations) <= expected:
+            raise TranslationError("Réponse de lot désalignée")
+
+        return {i: text for i, text in translations.items() if text}
+
+    async def _create_completion(self, **kwargs) -> Any:
+        """Appelle l'API chat sous le limiteur partagé, avec retries et backoff"""
+        import openai
+
+        tokens = sum(
+            self._estimate_tokens(message["content"]) for message in kwargs["messages"]
+        ) + kwargs.get("max_tokens", 0)
+
+        model = kwargs["model"]
+        for attempt in range(settings.TRANSLATION_MAX_RETRIES + 1):
+            with profiler.span("rate_limiter", "wait", tokens=tokens):
+                await self.rate_limiter.acquire(tokens)
+            try:
+                async with self._in_flight:
+                    with profiler.span(
+                        "openai.chat", "api", model=model, attempt=attempt
+                    ) as span:
+                        response = await self.client.chat.completions.create(**kwargs)
+                        if response.usage:
+                            span["total_tokens"] = response.usage.total_tokens
+                self.rate_limiter.on_success()
+                metrics.translation_requests.inc(1, model, "ok")
+                if response.usage:
+                    usage = response.usage
+                    metrics.translation_tokens.inc(usage.prompt_tokens, model, "prompt")
+                    metrics.translation_tokens.inc(
+                        usage.completion_tokens, model, "completion"
+                    )
+                return response
+
+            except openai.RateLimitError as e:
+                metrics.translation_requests.inc(1, model, "rate_limited")
+                if attempt == settings.TRANSLATION_MAX_RETRIES:
+                    raise
+                metrics.api_retries.inc(1, model, "rate_limited")
+                retry_after = self._retry_after(e)
+                self.rate_limiter.on_rate_limited(retry_after)
+                if retry_after is None:
+                    await asyncio.sleep(backoff_delay(attempt))
+
+            except (
+                openai.APIConnectionError,
+                openai.APITimeoutError,
+                openai.InternalServerError,
+            ):
+                metrics.translation_requests.inc(1, model, "error")
+                if attempt == settings.TRANSLATION_MAX_RETRIES:
+                    raise
+                metrics.api_retries.inc(1, model, "error")
+                await asyncio.sleep(backoff_delay(attempt))
+
+    def _retry_after(self, error: "openai.APIStatusError") -> Optional[float]:
+        """Lit le délai imposé par le fournisseur (Retry-After)"""
+        headers = error.response.headers
+        try:
+            if headers.get("retry-after-ms"):
+                return float(headers["retry-after-ms"]) / 1000
+            if headers.get("retry-after"):
+                return float(headers["retry-after"])
+        except ValueError:
+            pass
+        return None
+
+    def _estimate_tokens(self, text: str) -> int:
+        """Estimation grossière du nombre de tokens (~4 caractères par token)"""
+        return len(text) // 4 + 1
 
     async def _translate_single_segment(self, text: str, target_language: str) -> str:
         """Traduit un segment individuel"""
+        import openai
+
         try:
-            response = self.client.chat.completions.create(
+            response = await self._create_completion(
                 model=settings.TRANSLATION_MODEL,
                 messages=[
                     {
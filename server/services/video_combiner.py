@@ -1,28 +1,116 @@
+import asyncio
 import os
-import subprocess
+import time
 import uuid
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
+from config.settings import settings
+from utils import metrics
 from utils.exceptions import VideoProcessingError
+from utils.executors import run_in_thread
+from utils.ffmpeg_capabilities import require_ffmpeg
+from utils.ffmpeg_progress import ProgressCallback, ProgressTracker, run_ffmpeg
+from utils.validators import probe_media
+
+from .segment_encoder import SegmentEncoderService
+
+# Codes ISO 639-2 attendus par les conteneurs pour les métadonnées de langue
+ISO_639_2 = {
+    "en": "eng",
+    "fr": "fre",
+    "es": "spa",
+    "de": "ger",
+    "it": "ita",
+    "pt": "por",
+    "zh": "chi",
+    "ja": "jpn",
+    "ko": "kor",
+    "ru": "rus",
+    "ar": "ara",
+    "hi": "hin",
+    "nl": "dut",
+    "sv": "swe",
+    "no": "nor",
+    "da": "dan",
+    "fi": "fin",
+}
 
 
 class VideoCombinerService:
     def __init__(self, temp_dir: str):
         self.temp_dir = temp_dir
-        self._check_ffmpeg()
+        self.segment_encoder = SegmentEncoderService(temp_dir)
+
+    async def burn_subtitles(
+        self,
+        video_path: str,
+        srt_path: str,
+        output_filename: Optional[str] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> str:
+        """Grave les sous-titres en réencodant le moins possible.
+
+        Dans l'ordre: réencodage des seuls GOP sous-titrés, puis encodage
+        parallèle par tranches, puis encodage unique de toute la vidéo.
+        ``on_progress`` reçoit l'avancement (pourcentage, ETA, vitesse).
+        """
+        if not output_filename:
+            base_name = os.path.splitext(os.path.basename(video_path))[0]
+            output_filename = f"{base_name}_with_subtitles_{uuid.uuid4().hex[:8]}.mp4"
+        output_path = os.path.join(self.temp_dir, output_filename)
+        await run_in_thread(require_ffmpeg, encoder="libx264", filter="subtitles")
+
+        strategies = []
+        if settings.SMART_ENCODING:
+            strategies.append(("ciblé", "smart", self.segment_encoder.burn_smart))
+        if settings.PARALLEL_ENCODING and settings.ENCODE_CPU_BUDGET > 1:
+            strategies.append(
+                ("parallèle", "parallel", self.segment_encoder.burn_parallel)
+            )
 
-    def _check_ffmpeg(self):
-        """Vérifie si FFmpeg est disponible"""
         try:
-            subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            raise VideoProcessingError(
-                "FFmpeg n'est pas installé. Installez-le depuis https://ffmpeg.org"
+            for name, label, burn in strategies:
+                started = time.perf_counter()
+                try:
+                    if await burn(video_path, srt_path, output_path, on_progress):
+                        print(f"✅ Vidéo avec sous-titres créée: {output_path}")
+                        await self._observe_speed(video_path, label, started)
+                        return output_path
+                except VideoProcessingError as e:
+                    print(f"⚠ Encodage {name} en échec: {str(e)}")
+
+            started = time.perf_counter()
+            output_path = await self.combine_video_with_subtitles(
+                video_path, srt_path, output_filename, on_progress
             )
+            await self._observe_speed(video_path, "full", started)
+            return output_path
+        except BaseException:
+            # Échec ou annulation: pas de vidéo partielle dans WORK_DIR
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+
+    async def _observe_speed(self, video_path: str, strategy: str, started: float):
+        """Vitesse d'encodage (secondes de vidéo par seconde) pour /metrics"""
+        if not metrics.registry.enabled:
+            return
+        elapsed = time.perf_counter() - started
+        info = await probe_media(video_path)
+        try:
+            duration = float(info["format"]["duration"])
+        except (TypeError, KeyError, ValueError):
+            return
+        if elapsed > 0:
+            metrics.encode_speed.observe(duration / elapsed, strategy)
 
-    def combine_video_with_subtitles(
-        self, video_path: str, srt_path: str, output_filename: Optional[str] = None
+    async def combine_video_with_subtitles(
+        self,
+        video_path: str,
+        srt_path: str,
+        output_filename: Optional[str] = None,
+        on_progress: Optional[ProgressCallback] = None,
     ) -> str:
         """Combine une vidéo avec des sous-titres (hard-coded)"""
         try:
@@ -63,19 +151,22 @@ class VideoCombinerService:
 
             print("⚙ Commande FFmpeg:", " ".join(cmd))
 
-            # Exécuter FFmpeg
-            result = subprocess.run(
+            # Durée totale pour convertir l'avancement ffmpeg en pourcentage
+            tracker = None
+            if on_progress:
+                info = await probe_media(video_path)
+                duration = (info or {}).get("format", {}).get("duration")
+                if duration not in (None, "N/A"):
+                    tracker = ProgressTracker(float(duration), on_progress)
+
+            # Exécuter FFmpeg (délai maximum: ENCODING_TIMEOUT, appliqué par
+            # le pipeline; une annulation tue le processus)
+            await run_ffmpeg(
                 cmd,
-                capture_output=True,
-                text=True,
-                timeout=600,  # 10 minutes max
+                "FFmpeg lors de l'intégration",
+                tracker.part(0) if tracker else None,
             )
 
-            if result.returncode != 0:
-                raise VideoProcessingError(
-                    f"Erreur FFmpeg lors de l'intégration: {result.stderr}"
-                )
-
             # Vérifier que le fichier a été créé
             if not os.path.exists(output_path):
                 raise VideoProcessingError(
@@ -89,55 +180,101 @@ class VideoCombinerService:
             print(f"✅ Vidéo avec sous-titres créée: {output_path}")
             return output_path
 
-        except subprocess.TimeoutExpired:
-            raise VideoProcessingError("Timeout lors de l'intégration des sous-titres")
         except Exception as e:
             if isinstance(e, VideoProcessingError):
                 raise
             raise VideoProcessingError(f"Erreur lors de l'intégration: {str(e)}")
 
-    def create_soft_subtitles(
-        self, video_path: str, srt_path: str, output_filename: Optional[str] = None
+    async def create_soft_subtitles(
+        self,
+        video_path: str,
+        srt_path: str,
+        output_filename: Optional[str] = None,
+        language: Optional[str] = None,
+    ) -> str:
+        """Ajoute les sous-titres comme piste séparée (soft subs, sans réencodage)"""
+        return await self.create_multi_track_subtitles(
+            video_path,
+            {language or settings.DEFAULT_TARGET_LANG: srt_path},
+            output_filename,
+        )
+
+    async def create_multi_track_subtitles(
+        self,
+        video_path: str,
+        srt_paths: Dict[str, str],
+        output_filename: Optional[str] = None,
+        on_progress: Optional[ProgressCallback] = None,
     ) -> str:
-        """Alternative: Ajouter les sous-titres comme piste séparée (soft subs)"""
+        """Ajoute une piste de sous-titres par langue (soft subs, sans réencodage).
+
+        Vidéo et audio sont copiés tels quels (``-c copy``): seul le texte
+        est converti, en ``mov_text`` pour MP4 ou ``srt``/``ass`` pour MKV.
+        """
+        container = settings.SOFT_SUBTITLE_CONTAINER
+        if not output_filename:
+            base_name = os.path.splitext(os.path.basename(video_path))[0]
+            output_filename = (
+                f"{base_name}_with_soft_subs_{uuid.uuid4().hex[:8]}.{container}"
+            )
+        output_path = os.path.join(self.temp_dir, output_filename)
+
         try:
-            if not output_filename:
-                base_name = os.path.splitext(os.path.basename(video_path))[0]
-                output_filename = (
-                    f"{base_name}_with_soft_subs_{uuid.uuid4().hex[:8]}.mkv"
-                )
+            await run_in_thread(require_ffmpeg)
+            subtitle_codec = (
+                "mov_text" if container == "mp4" else settings.SOFT_SUBTITLE_CODEC
+            )
 
-            output_path = os.path.join(self.temp_dir, output_filename)
+            cmd = ["ffmpeg", "-i", video_path]
+            for srt_path in srt_paths.values():
+                cmd += ["-i", srt_path]
 
-            cmd = [
-                "ffmpeg",
-                "-i",
-                video_path,
-                "-vf",
-                f"subtitles={srt_path}",
-                "-c:a",
-                "copy",
-                "-c:v",
-                "libx264",
-                "-preset",
-                "medium",
-                "-crf",
-                "23",
-                output_path,
-                "-y",
-            ]
+            # Vidéo et audio copiés tels quels, puis une piste par fichier SRT
+            cmd += ["-map", "0:v:0", "-map", "0:a?"]
+            for i in range(len(srt_paths)):
+                cmd += ["-map", f"{i + 1}:0"]
+            cmd += ["-c:v", "copy", "-c:a", "copy", "-c:s", subtitle_codec]
 
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            for i, lang in enumerate(srt_paths):
+                cmd += [
+                    f"-metadata:s:s:{i}",
+                    f"language={ISO_639_2.get(lang, lang)}",
+                    f"-metadata:s:s:{i}",
+                    f"title={lang}",
+                ]
+            # Première langue activée par défaut dans les lecteurs
+            cmd += ["-disposition:s:0", "default"]
+            if container == "mp4":
+                cmd += ["-movflags", "+faststart"]
+            cmd += [output_path, "-y"]
 
-            if result.returncode != 0:
-                raise VideoProcessingError(
-                    f"Erreur FFmpeg (soft subs): {result.stderr}"
-                )
+            print("⚙ Commande FFmpeg:", " ".join(cmd))
 
+            tracker = None
+            if on_progress:
+                info = await probe_media(video_path)
+                duration = (info or {}).get("format", {}).get("duration")
+                if duration not in (None, "N/A"):
+                    tracker = ProgressTracker(float(duration), on_progress)
+
+            # Délai maximum: ENCODING_TIMEOUT, appliqué par le pipeline; une
+            # annulation tue le processus
+            await run_ffmpeg(
+                cmd,
+                "FFmpeg (pistes de sous-titres)",
+                tracker.part(0) if tracker else None,
+            )
             return output_path
 
+        except asyncio.CancelledError:
+            # Annulation ou délai dépassé: pas de vidéo partielle dans WORK_DIR
+            self.cleanup_video_file(output_path)
+            raise
         except Exception as e:
-            raise VideoProcessingError(f"Erreur soft subtitles: {str(e)}")
+            self.cleanup_video_file(output_path)
+            if isinstance(e, VideoProcessingError):
+                raise
+            raise VideoProcessingError(f"Erreur pistes de sous-titres: {str(e)}")
 
     def cleanup_video_file(self, video_path: str) -> None:
         """Nettoie un fichier vidéo temporaire"""
@@ -1,8 +1,18 @@
+import asyncio
+import contextlib
 import os
-from typing import Dict
+import shutil
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional
 
 from config.settings import settings
-from utils.exceptions import VideoProcessingError
+from utils import metrics, profiler
+from utils.checkpoints import Checkpoint, checkpoint_store, source_fingerprint
+from utils.exceptions import StageTimeoutError, VideoProcessingError
+from utils.executors import run_in_thread
+from utils.storage_manager import storage_manager
+from utils.transcript_cache import hash_file, transcript_cache
 
 from .audio_service import AudioService
 from .subtitle_service import SubtitleService
@@ -11,117 +21,629 @@ from .translation_service import TranslationService
 from .video_combiner import VideoCombinerService
 
 
+class _StageClock:
+    """Temps d'une étape dont certaines attentes sont exclues du délai.
+
+    La transcription attend que les files de traduction aient de la place:
+    ce temps dépend de la traduction et ne compte pas pour son délai.
+    """
+
+    def __init__(self) -> None:
+        self._paused = 0.0
+        self._paused_since: Optional[float] = None
+
+    @contextlib.asynccontextmanager
+    async def paused(self) -> AsyncIterator[None]:
+        self._paused_since = time.monotonic()
+        try:
+            yield
+        finally:
+            self._paused += time.monotonic() - self._paused_since
+            self._paused_since = None
+
+    def paused_seconds(self) -> float:
+        if self._paused_since is None:
+            return self._paused
+        return self._paused + time.monotonic() - self._paused_since
+
+
 class VideoProcessor:
-    def __init__(self):
-        self.audio_service = AudioService(settings.TEMP_DIR)
-        self.transcription_service = TranscriptionService(settings.OPENAI_API_KEY)
+    def __init__(
+        self,
+        cpu_slots: Optional[asyncio.Semaphore] = None,
+        api_slots: Optional[asyncio.Semaphore] = None,
+    ):
+        self.audio_service = AudioService(settings.WORK_DIR)
+        self.transcription_service = TranscriptionService(
+            settings.OPENAI_API_KEY, self.audio_service
+        )
         self.translation_service = TranslationService(settings.OPENAI_API_KEY)
-        self.subtitle_service = SubtitleService(settings.TEMP_DIR)
-        self.video_combiner = VideoCombinerService(settings.TEMP_DIR)
+        self.subtitle_service = SubtitleService(settings.WORK_DIR)
+        self.video_combiner = VideoCombinerService(settings.WORK_DIR)
+        self.transcript_cache = transcript_cache
+        self.checkpoints = checkpoint_store
+        # Limites partagées par les jobs de ce processeur (mode batch): étapes
+        # ffmpeg d'un côté, phase transcription/traduction d'un job de l'autre
+        self.cpu_slots = cpu_slots
+        self.api_slots = api_slots
 
     async def process_video(
         self,
         video_path: str,
         source_lang: str = "en",
-        target_lang: str = "fr",
+        target_lang: str | List[str] = "fr",
         subtitle_type: str = "hard",  # "hard" ou "soft"
         job_id: str | None = None,
+        source_hash: str | None = None,
+        checkpoint_id: str | None = None,
+        resume: bool = False,
     ) -> Dict[str, any]:
-        """Pipeline complet de traitement vidéo avec intégration"""
+        """Pipeline complet de traitement vidéo avec intégration
+
+        ``target_lang`` accepte une ou plusieurs langues: la vidéo est
+        transcrite une seule fois puis traduite vers toutes les cibles.
+        ``source_hash`` (SHA-256 du fichier) évite de relire la vidéo pour
+        interroger le cache de transcriptions s'il est déjà connu.
+
+        Avec ``checkpoint_id``, la sortie de chaque étape (audio,
+        transcription, traductions et SRT) est gardée jusqu'au succès du
+        job; avec ``resume``, le traitement repart de la première étape
+        qui n'y figure pas.
+        """
         audio_path = None
-        srt_path = None
+        audio_extraction = None
+        target_langs = [target_lang] if isinstance(target_lang, str) else target_lang
+        checkpoint = await self._open_checkpoint(
+            checkpoint_id, video_path, source_lang, source_hash, resume
+        )
+        # Une file bornée par langue à traduire: la transcription ralentit si
+        # la traduction prend du retard, au lieu d'accumuler les segments
+        queues = {
+            lang: asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
+            for lang in target_langs
+            if not (checkpoint and checkpoint.has(f"translation:{lang}"))
+        }
+        # Un seul encodage à la fois par job, chacun sur tous les cœurs
+        encode_slot = asyncio.Lock()
+        encoded = 0
+        # Fichiers produits, supprimés si le job échoue ou est annulé
+        artifacts: List[str] = []
+        # Place API tenue de la transcription à la dernière traduction
+        api_held = False
+        translated = 0
 
-        try:
-            print(f"🎬 Début du traitement: {video_path}")
+        async def acquire_api() -> None:
+            nonlocal api_held
+            if self.api_slots is not None:
+                with profiler.span("api_slot", "wait"):
+                    await self.api_slots.acquire()
+                api_held = True
 
-            # 1. Extraction audio
-            print("🎵 Extraction de l'audio...")
-            if job_id:
-                from utils.progress_manager import progress_manager
+        def release_api() -> None:
+            nonlocal api_held
+            if api_held:
+                self.api_slots.release()
+                api_held = False
 
-                await progress_manager.send(
-                    job_id, "progress", {"step": "audio_extraction", "percent": 20}
-                )
-            audio_path = self.audio_service.extract_audio_from_video(video_path)
-            print(f"✅ Audio extrait: {audio_path}")
+        async def keep(path: str) -> None:
+            # Suivi du quota de WORK_DIR, et nettoyage en cas d'échec
+            artifacts.append(path)
+            await run_in_thread(storage_manager.register, path, job_id)
 
-            # 2. Transcription
-            print("🎤 Transcription avec Whisper...")
-            if job_id:
-                from utils.progress_manager import progress_manager
+        async def publish(segments: List[Dict]) -> None:
+            for queue in queues.values():
+                await queue.put(segments)
 
-                await progress_manager.send(
-                    job_id, "progress", {"step": "transcription", "percent": 40}
-                )
-            transcript = self.transcription_service.transcribe_audio(
-                audio_path, source_lang
-            )
-            print(f"✅ Transcription terminée: {len(transcript['segments'])} segments")
+        # Attente des files de traduction, hors délai de la transcription
+        transcription_clock = _StageClock()
+
+        async def publish_transcribed(segments: List[Dict]) -> None:
+            async with transcription_clock.paused():
+                await publish(segments)
 
-            # 3. Traduction
-            print("🔤 Traduction des segments...")
-            if job_id:
-                from utils.progress_manager import progress_manager
+        async def transcribe() -> Dict:
+            nonlocal audio_path, audio_extraction, source_hash
 
-                await progress_manager.send(
-                    job_id, "progress", {"step": "translation", "percent": 60}
+            # Transcription reprise du job interrompu, ou réutilisée si
+            # cette source a déjà été traitée
+            transcript = None
+            cache_key = None
+            if checkpoint and checkpoint.has("transcript"):
+                transcript = await run_in_thread(checkpoint.load_json, "transcript")
+                print(
+                    f"♻ Transcription reprise: {len(transcript['segments'])} segments"
                 )
-            translated_segments = await self.translation_service.translate_segments(
-                transcript["segments"], target_lang
-            )
-            print(f"✅ Traduction terminée: {len(translated_segments)} segments")
+                await self._send_progress(job_id, "transcription", 40, resumed=True)
+            elif self.transcript_cache.enabled:
+                source_hash = source_hash or await run_in_thread(hash_file, video_path)
+                cache_key = self.transcript_cache.make_key(
+                    source_hash, source_lang, settings.WHISPER_MODEL
+                )
+                transcript = await run_in_thread(self.transcript_cache.get, cache_key)
+                if transcript:
+                    print(
+                        f"💾 Transcription trouvée en cache: {len(transcript['segments'])} segments"
+                    )
+                    await self._send_progress(job_id, "transcription", 40, cached=True)
 
-            # 4. Génération SRT
-            print("📝 Génération du fichier SRT...")
-            if job_id:
-                from utils.progress_manager import progress_manager
+            if transcript:
+                if queues:
+                    await acquire_api()
+                await publish(transcript["segments"])
+            else:
+                # 1. Extraction audio
+                if checkpoint and checkpoint.has("audio"):
+                    audio_extraction = checkpoint.stage("audio")["extraction"]
+                    audio_path = checkpoint.path("audio")
+                    print(f"♻ Audio repris: {audio_path}")
+                else:
+                    print("🎵 Extraction de l'audio...")
+                    await self._send_progress(job_id, "audio_extraction", 20)
+                    async with self._cpu_slot():
+                        audio_extraction = await self._with_deadline(
+                            "audio_extraction",
+                            settings.AUDIO_EXTRACTION_TIMEOUT,
+                            self.audio_service.extract_audio(video_path),
+                        )
+                    audio_path = audio_extraction["audio_path"]
+                    if checkpoint:
+                        # L'audio appartient désormais au point de reprise
+                        audio_path = await run_in_thread(
+                            checkpoint.save_file,
+                            "audio",
+                            audio_path,
+                            extraction=audio_extraction,
+                        )
+                    else:
+                        await run_in_thread(
+                            storage_manager.register, audio_path, job_id
+                        )
+                    print(f"✅ Audio extrait: {audio_path}")
+                audio_extraction = {**audio_extraction, "audio_path": audio_path}
 
-                await progress_manager.send(
-                    job_id, "progress", {"step": "srt_generation", "percent": 80}
+                # 2. Transcription, dont les segments partent en traduction
+                # morceau par morceau
+                print("🎤 Transcription avec Whisper...")
+                await self._send_progress(job_id, "transcription", 40)
+                await acquire_api()
+                transcript = await self._with_deadline(
+                    "transcription",
+                    settings.TRANSCRIPTION_TIMEOUT,
+                    self.transcription_service.transcribe_audio(
+                        audio_path,
+                        source_lang,
+                        audio_extraction.get("media_duration"),
+                        on_segments=publish_transcribed,
+                    ),
+                    clock=transcription_clock,
                 )
-            srt_path = self.subtitle_service.create_srt_file(translated_segments)
-            print(f"✅ SRT généré: {srt_path}")
-
-            # 5. Intégration à la vidéo
-            print("🎬 Intégration des sous-titres à la vidéo...")
-            if subtitle_type == "soft":
-                video_output_path = self.video_combiner.create_soft_subtitles(
-                    video_path, srt_path
+                print(
+                    f"✅ Transcription terminée: {len(transcript['segments'])} segments"
                 )
+                metrics.audio_seconds.inc(
+                    audio_extraction.get("media_duration")
+                    or transcript.get("duration")
+                    or 0
+                )
+                if cache_key:
+                    # Whisper est déjà payé: un cache inaccessible (disque
+                    # plein) ne fait pas échouer le job
+                    try:
+                        await run_in_thread(
+                            self.transcript_cache.put, cache_key, transcript
+                        )
+                    except Exception as e:
+                        print(f"⚠ Transcription non mise en cache: {e}")
+
+            # Gardée avant la fin du flux: une traduction terminée implique
+            # une transcription reprenable
+            if checkpoint and not checkpoint.has("transcript"):
+                await run_in_thread(checkpoint.save_json, "transcript", transcript)
+                if checkpoint.has("audio"):
+                    await run_in_thread(checkpoint.drop, "audio")
+                    audio_path = None
+
+            for queue in queues.values():
+                await queue.put(None)  # Fin du flux
+            await self._send_progress(job_id, "translation", 60)
+            return transcript
+
+        async def subtitle(lang: str) -> Dict[str, Any]:
+            nonlocal encoded, translated
+
+            # 3-4. Traduction et SRT au fil de la transcription
+            if lang in queues:
+                result = await self._stream_language(queues[lang], lang, job_id)
+                # Suivi dès sa création: supprimé si le job échoue ensuite
+                await keep(result["srt_file"])
+                if checkpoint:
+                    await run_in_thread(
+                        checkpoint.save_language,
+                        lang,
+                        result["translated_segments"],
+                        result["srt_file"],
+                    )
             else:
-                video_output_path = self.video_combiner.combine_video_with_subtitles(
-                    video_path, srt_path
+                srt_path = os.path.join(
+                    self.subtitle_service.temp_dir, f"subtitles_{uuid.uuid4().hex}.srt"
+                )
+                artifacts.append(srt_path)  # supprimé même si la copie échoue
+                result = await run_in_thread(
+                    self._restore_language, checkpoint, lang, srt_path
                 )
+                await keep(srt_path)
+                print(
+                    f"♻ Traduction {lang} reprise: {result['segments_count']} segments"
+                )
+            await self._send_language_translated(job_id, result)
+            translated += 1
+            if translated == len(target_langs):
+                release_api()
+            if subtitle_type == "soft":
+                return result
 
+            # 5. Sous-titres gravés: l'encodage démarre dès le SRT complet
+            async with encode_slot, self._cpu_slot():
+                # Les langues sont encodées dans l'ordre où leur SRT est prêt
+                index, encoded = encoded, encoded + 1
+                if index == 0:
+                    print("🎬 Intégration des sous-titres à la vidéo...")
+                    await self._send_progress(job_id, "combination", 80)
+                result["video_with_subtitles"] = await self._with_deadline(
+                    "combination",
+                    settings.ENCODING_TIMEOUT,
+                    self.video_combiner.burn_subtitles(
+                        video_path,
+                        result["srt_file"],
+                        on_progress=self._combination_progress(
+                            job_id, lang, index, len(target_langs)
+                        ),
+                    ),
+                    language=lang,
+                )
+                await keep(result["video_with_subtitles"])
+            await self._send_language_completed(job_id, result)
+            return result
+
+        try:
+            print(f"🎬 Début du traitement: {video_path}")
+            metrics.input_bytes.inc(os.path.getsize(video_path))
+            print(f"🔤 Traduction des segments ({', '.join(target_langs)})...")
+            transcript, *results = await self._run_stages(
+                transcribe(),
+                *(subtitle(lang) for lang in target_langs),
+            )
+            languages = dict(zip(target_langs, results))
+
+            if subtitle_type == "soft":
+                # 5. Une seule sortie avec une piste de sous-titres par langue
+                print("🎬 Intégration des sous-titres à la vidéo...")
+                await self._send_progress(job_id, "combination", 80)
+                async with self._cpu_slot():
+                    video_output_path = await self._with_deadline(
+                        "combination",
+                        settings.ENCODING_TIMEOUT,
+                        self.video_combiner.create_multi_track_subtitles(
+                            video_path,
+                            {
+                                lang: languages[lang]["srt_file"]
+                                for lang in target_langs
+                            },
+                            on_progress=self._combination_progress(
+                                job_id, ",".join(target_langs), 0, 1
+                            ),
+                        ),
+                        subtitle_type="soft",
+                    )
+                await keep(video_output_path)
+                for lang in target_langs:
+                    languages[lang]["video_with_subtitles"] = video_output_path
+                    await self._send_language_completed(job_id, languages[lang])
+
+            video_output_path = languages[target_langs[-1]]["video_with_subtitles"]
             print(f"✅ Vidéo finale créée: {video_output_path}")
-            if job_id:
-                from utils.progress_manager import progress_manager
+            await self._send_progress(job_id, "combination", 100)
 
-                await progress_manager.send(
-                    job_id, "progress", {"step": "combination", "percent": 100}
-                )
+            if checkpoint:
+                await run_in_thread(self.checkpoints.discard, checkpoint.id)
 
+            primary = languages[target_langs[0]]
             return {
-                "srt_file": srt_path,
-                "video_with_subtitles": video_output_path,
+                "srt_file": primary["srt_file"],
+                "video_with_subtitles": primary["video_with_subtitles"],
                 "original_transcript": transcript,
-                "translated_segments": translated_segments,
-                "segments_count": len(translated_segments),
+                "translated_segments": primary["translated_segments"],
+                "segments_count": primary["segments_count"],
                 "subtitle_type": subtitle_type,
+                "target_langs": target_langs,
+                "languages": languages,
+                "audio_extraction": audio_extraction,
                 "status": "success",
             }
 
+        except asyncio.CancelledError:
+            print("🛑 Traitement annulé")
+            await run_in_thread(self._cleanup_artifacts, artifacts)
+            await self._keep_checkpoint(checkpoint, "Job annulé")
+            raise
         except Exception as e:
             print(f"❌ Erreur dans le pipeline: {str(e)}")
+            await run_in_thread(self._cleanup_artifacts, artifacts)
+            await self._keep_checkpoint(checkpoint, str(e))
             raise VideoProcessingError(
                 f"Erreur dans le pipeline de traitement: {str(e)}"
             )
 
         finally:
-            # Nettoyage des fichiers intermédiaires
-            if audio_path:
+            release_api()
+            if checkpoint:
+                await run_in_thread(self.checkpoints.release, checkpoint.id)
+            # Nettoyage des fichiers intermédiaires (hors point de reprise)
+            if audio_path and checkpoint is None:
                 print("🧹 Nettoyage des fichiers temporaires...")
-                self.audio_service.cleanup_audio_file(audio_path)
+                await run_in_thread(self.audio_service.cleanup_audio_file, audio_path)
+                await run_in_thread(storage_manager.forget, audio_path)
+
+    async def _open_checkpoint(
+        self,
+        checkpoint_id: str | None,
+        video_path: str,
+        source_lang: str,
+        source_hash: str | None,
+        resume: bool,
+    ) -> Optional[Checkpoint]:
+        """Point de reprise du job; le job continue sans s'il est inaccessible"""
+        if not checkpoint_id or not self.checkpoints.enabled:
+            return None
+        try:
+            params = {
+                "source": await run_in_thread(
+                    source_fingerprint, video_path, source_hash
+                ),
+                "source_lang": source_lang,
+            }
+            checkpoint = await run_in_thread(
+                self.checkpoints.open, checkpoint_id, params, resume
+            )
+        except OSError as e:
+            print(f"⚠ Point de reprise indisponible: {e}")
+            return None
+        stages = [stage for stage in checkpoint.manifest["stages"] if stage != "source"]
+        if stages:
+            print(f"♻ Reprise du traitement: {', '.join(stages)} déjà fait(s)")
+        return checkpoint
+
+    async def _keep_checkpoint(self, checkpoint: Optional[Checkpoint], error: str):
+        """Job interrompu: le point de reprise reste pour une nouvelle tentative"""
+        if checkpoint is None:
+            return
+        try:
+            await run_in_thread(checkpoint.fail, error)
+        except OSError as e:
+            print(f"⚠ Point de reprise non mis à jour: {e}")
+            return
+        stages = [stage for stage in checkpoint.manifest["stages"] if stage != "source"]
+        print(f"💾 Point de reprise conservé ({', '.join(stages) or 'aucune étape'})")
+
+    def _restore_language(
+        self, checkpoint: Checkpoint, lang: str, srt_path: str
+    ) -> Dict[str, Any]:
+        """Traduction et SRT d'une langue repris d'un point de reprise"""
+        stage = f"translation:{lang}"
+        segments = checkpoint.load_json(stage)
+        shutil.copyfile(checkpoint.path(stage, "srt"), srt_path)
+        return {
+            "language": lang,
+            "srt_file": srt_path,
+            "translated_segments": segments,
+            "segments_count": len(segments),
+        }
+
+    @contextlib.asynccontextmanager
+    async def _cpu_slot(self) -> AsyncIterator[None]:
+        """Étape ffmpeg: attend une place si les étapes CPU sont limitées"""
+        if self.cpu_slots is None:
+            yield
+            return
+        with profiler.span("cpu_slot", "wait"):
+            await self.cpu_slots.acquire()
+        try:
+            yield
+        finally:
+            self.cpu_slots.release()
+
+    @staticmethod
+    async def _with_deadline(
+        stage: str,
+        timeout: float,
+        awaitable: Awaitable,
+        clock: Optional[_StageClock] = None,
+        **details: Any,
+    ) -> Any:
+        """Attend une étape; au-delà de ``timeout`` secondes elle est annulée.
+
+        Les attentes suspendues par ``clock`` ne sont pas décomptées.
+        ``details`` (langue, nombre de segments) accompagnent l'étape dans la
+        trace des jobs profilés.
+        """
+        try:
+            with metrics.stage_duration.time(stage), profiler.span(stage, **details):
+                if clock is None:
+                    return await asyncio.wait_for(awaitable, timeout)
+                return await VideoProcessor._wait_with_clock(awaitable, timeout, clock)
+        except asyncio.TimeoutError:
+            raise StageTimeoutError(
+                f"Délai dépassé pour l'étape {stage} ({timeout:.0f}s)"
+            )
+
+    @staticmethod
+    async def _wait_with_clock(
+        awaitable: Awaitable, timeout: float, clock: _StageClock
+    ) -> Any:
+        task = asyncio.ensure_future(awaitable)
+        started = time.monotonic()
+        try:
+            while True:
+                elapsed = time.monotonic() - started - clock.paused_seconds()
+                if elapsed >= timeout:
+                    raise asyncio.TimeoutError()
+                await asyncio.wait({task}, timeout=timeout - elapsed)
+                if task.done():
+                    return task.result()
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    @staticmethod
+    async def _run_stages(*stages: Awaitable) -> List[Any]:
+        """Exécute des étapes concurrentes; la première en échec annule les autres"""
+        tasks = [asyncio.ensure_future(stage) for stage in stages]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _stream_language(
+        self, queue: asyncio.Queue, target_lang: str, job_id: str | None
+    ) -> Dict[str, Any]:
+        """Traduit les lots de segments reçus et les ajoute au SRT de la langue.
+
+        Chaque lot part en traduction dès son arrivée; les lots traduits sont
+        écrits dans l'ordre de la transcription.
+        """
+        translations: asyncio.Queue = asyncio.Queue(
+            maxsize=settings.PIPELINE_QUEUE_SIZE
+        )
+        tasks: List[asyncio.Task] = []
+
+        async def translate() -> None:
+            while (segments := await queue.get()) is not None:
+                task = asyncio.ensure_future(
+                    self._with_deadline(
+                        "translation",
+                        settings.TRANSLATION_TIMEOUT,
+                        self.translation_service.translate_segments(
+                            segments, target_lang
+                        ),
+                        language=target_lang,
+                        segments=len(segments),
+                    )
+                )
+                tasks.append(task)
+                await translations.put(task)
+            await translations.put(None)
+
+        srt_seconds = 0.0
+
+        async def write_srt(method, *args) -> Any:
+            # Temps d'écriture seul, hors attente des traductions
+            nonlocal srt_seconds
+            started = time.perf_counter()
+            try:
+                return await run_in_thread(method, *args)
+            finally:
+                srt_seconds += time.perf_counter() - started
+
+        async def write() -> List[Dict]:
+            translated_segments: List[Dict] = []
+            while (task := await translations.get()) is not None:
+                batch = await task
+                await write_srt(writer.write, batch)
+                translated_segments.extend(batch)
+            return translated_segments
+
+        writer = await write_srt(self.subtitle_service.create_srt_writer)
+        try:
+            _, translated_segments = await self._run_stages(translate(), write())
+            srt_path = await write_srt(writer.close)
+            metrics.stage_duration.observe(srt_seconds, "srt_generation")
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await run_in_thread(writer.discard)
+            raise
+
+        print(
+            f"✅ Traduction {target_lang} terminée: {len(translated_segments)} segments"
+        )
+        print(f"✅ SRT {target_lang} généré: {srt_path}")
+
+        return {
+            "language": target_lang,
+            "srt_file": srt_path,
+            "translated_segments": translated_segments,
+            "segments_count": len(translated_segments),
+        }
+
+    async def _send_language_translated(
+        self, job_id: str | None, language: Dict[str, Any]
+    ) -> None:
+        await self._send(
+            job_id,
+            "language_translated",
+            {
+                "language": language["language"],
+                "srt_file": language["srt_file"],
+                "segments_count": language["segments_count"],
+            },
+        )
+
+    async def _send_language_completed(
+        self, job_id: str | None, language: Dict[str, Any]
+    ) -> None:
+        await self._send(
+            job_id,
+            "language_completed",
+            {
+                "language": language["language"],
+                "srt_file": language["srt_file"],
+                "video_with_subtitles": language["video_with_subtitles"],
+                "segments_count": language["segments_count"],
+            },
+        )
+
+    def _combination_progress(
+        self, job_id: str | None, language: str, index: int, count: int
+    ):
+        """Relaie l'avancement ffmpeg d'une langue sur la plage 80-100%"""
+        if not job_id:
+            return None
+
+        async def on_progress(state: Dict[str, Any]) -> None:
+            done = (index + state["percent"] / 100) / count
+            await self._send_progress(
+                job_id,
+                "combination",
+                round(80 + 20 * done, 1),
+                language=language,
+                eta=state["eta"],
+                speed=state["speed"],
+            )
+
+        return on_progress
+
+    async def _send_progress(
+        self, job_id: str | None, step: str, percent: int, **extra: Any
+    ) -> None:
+        await self._send(
+            job_id, "progress", {"step": step, "percent": percent, **extra}
+        )
+
+    async def _send(self, job_id: str | None, event: str, payload: Dict) -> None:
+        """Diffuse un événement aux abonnés WebSocket du job (s'il y en a un)"""
+        if job_id:
+            from utils.progress_manager import progress_manager
+
+            await progress_manager.send(job_id, event, payload)
+
+    def _cleanup_artifacts(self, artifacts: List[str]) -> None:
+        """Supprime les fichiers produits par un traitement interrompu"""
+        for file_path in set(artifacts):
+            self.cleanup_temp_file(file_path)
 
     def cleanup_temp_file(self, file_path: str) -> None:
         """Nettoie un fichier temporaire"""
@@ -129,5 +651,17 @@ class VideoProcessor:
             if os.path.exists(file_path):
                 os.remove(file_path)
                 print(f"🗑 Fichier supprimé: {file_path}")
+            storage_manager.forget(file_path)
         except Exception as e:
             print(f"⚠ Erreur lors du nettoyage de {file_path}: {e}")
+
+
+_video_processor: Optional[VideoProcessor] = None
+
+
+def get_video_processor() -> VideoProcessor:
+    """Processeur partagé, construit à la première utilisation"""
+    global _video_processor
+    if _video_processor is None:
+        _video_processor = VideoProcessor()
+    return _video_processor
@@ -0,0 +1,296 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+
+from .state_backend import StateBackend, state_backend
+
+MANIFEST = "manifest.json"
+
+
+def local_checkpoint_id(
+    video_path: str, source_lang: str, target_langs: List[str], subtitle_type: str
+) -> str:
+    """Identifiant stable d'un traitement en ligne de commande (même commande,
+    même point de reprise)"""
+    raw = "\x00".join(
+        (
+            os.path.abspath(video_path),
+            source_lang,
+            ",".join(target_langs),
+            subtitle_type,
+        )
+    )
+    return "cli_" + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def source_fingerprint(video_path: str, source_hash: Optional[str] = None) -> str:
+    """Empreinte de la source: SHA-256 s'il est connu, sinon taille et date"""
+    if source_hash:
+        return source_hash
+    stat = os.stat(video_path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class Checkpoint:
+    """Sorties des étapes terminées d'un job, décrites par un manifeste.
+
+    Une étape (``audio``, ``transcript``, ``translation:<langue>``) n'est
+    inscrite au manifeste qu'une fois ses fichiers écrits: une étape
+    absente est à refaire. Méthodes bloquantes.
+    """
+
+    def __init__(self, directory: str, manifest: Dict[str, Any]) -> None:
+        self.directory = directory
+        self.manifest = manifest
+        self._lock = threading.Lock()
+
+    @property
+    def id(self) -> str:
+        return self.manifest["checkpoint_id"]
+
+    def has(self, stage: str) -> bool:
+        return stage in self.manifest["stages"]
+
+    def stage(self, stage: str) -> Optional[Dict[str, Any]]:
+        return self.manifest["stages"].get(stage)
+
+    def path(self, stage: str, name: str = "file") -> str:
+        return os.path.join(self.directory, self.manifest["stages"][stage][name])
+
+    def load_json(self, stage: str, name: str = "file") -> Any:
+        with open(self.path(stage, name), encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_file(
+        self, stage: str, file_path: str, filename: Optional[str] = None, **info: Any
+    ) -> str:
+        """Déplace ``file_path`` dans le point de reprise; retourne son chemin"""
+        filename = filename or stage.replace(":", "_") + os.path.splitext(file_path)[1]
+        shutil.move(file_path, os.path.join(self.directory, filename))
+        self._complete(stage, {"file": filename, **info})
+        return os.path.join(self.directory, filename)
+
+    def save_json(self, stage: str, data: Any, **info: Any) -> None:
+        filename = stage.replace(":", "_") + ".json"
+        self._write_json(filename, data)
+        self._complete(stage, {"file": filename, **info})
+
+    def save_language(self, language: str, segments: List[Dict], srt_path: str) -> None:
+        """Traduction d'une langue: segments traduits et copie du SRT"""
+        stage = f"translation:{language}"
+        prefix = stage.replace(":", "_")
+        self._write_json(f"{prefix}.json", segments)
+        shutil.copyfile(srt_path, os.path.join(self.directory, f"{prefix}.srt"))
+        self._complete(stage, {"file": f"{prefix}.json", "srt": f"{prefix}.srt"})
+
+    def drop(self, stage: str) -> None:
+        """Oublie une étape devenue inutile (l'audio une fois transcrit)"""
+        with self._lock:
+            entry = self.manifest["stages"].pop(stage, None)
+            self._save_manifest()
+        for key in ("file", "srt"):
+            if entry and key in entry:
+                path = os.path.join(self.directory, entry[key])
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def fail(self, error: str) -> None:
+        with self._lock:
+            self.manifest["error"] = error
+            self._save_manifest()
+
+    def _complete(self, stage: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.manifest["stages"][stage] = {**entry, "completed_at": time.time()}
+            self._save_manifest()
+
+    def _save_manifest(self) -> None:
+        self.manifest["updated_at"] = time.time()
+        self._write_json(MANIFEST, self.manifest)
+
+    def _write_json(self, filename: str, data: Any) -> None:
+        # Écriture atomique: un arrêt brutal ne laisse jamais un JSON partiel
+        tmp_path = os.path.join(self.directory, f".{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(self.directory, filename))
+
+
+class CheckpointStore:
+    """Points de reprise des jobs, un dossier par job sous ``root``.
+
+    Un job réussi supprime le sien; ceux des jobs en échec ou interrompus
+    sont gardés ``ttl`` secondes après leur dernière mise à jour, pour être
+    repris par ``POST /jobs/{id}/retry`` ou ``cli.py --resume``, dans la
+    limite de ``max_bytes`` au total (les plus anciens partent d'abord).
+    Ceux des jobs en cours, marqués par un bail ``checkpoint`` de
+    ``backend``, ne sont jamais supprimés, quel que soit le worker qui les
+    évince. Méthodes bloquantes (les appeler via ``run_in_thread``).
+    """
+
+    def __init__(
+        self,
+        root: str,
+        ttl: int,
+        max_bytes: int,
+        enabled: bool = True,
+        backend: StateBackend = state_backend,
+    ) -> None:
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.backend = backend
+
+    def _directory(self, checkpoint_id: str) -> str:
+        from .validators import sanitize_filename
+
+        return os.path.join(self.root, sanitize_filename(checkpoint_id))
+
+    def open(
+        self, checkpoint_id: str, params: Dict[str, Any], resume: bool = False
+    ) -> Checkpoint:
+        """Point de reprise du job; l'existant n'est repris qu'avec ``resume``
+        et s'il porte sur la même source"""
+        self.backend.acquire_lease(
+            "checkpoint", os.path.basename(self._directory(checkpoint_id))
+        )
+        self.evict()
+        checkpoint = self.load(checkpoint_id)
+        if checkpoint and resume:
+            if checkpoint.manifest["params"] == params:
+                return checkpoint
+            print(f"⚠ Point de reprise {checkpoint_id} d'une autre source, ignoré")
+        if checkpoint:
+            self.discard(checkpoint_id)
+
+        directory = self._directory(checkpoint_id)
+        os.makedirs(directory, exist_ok=True)
+        checkpoint = Checkpoint(
+            directory,
+            {
+                "checkpoint_id": checkpoint_id,
+                "created_at": time.time(),
+                "params": params,
+                "stages": {},
+            },
+        )
+        checkpoint._save_manifest()
+        return checkpoint
+
+    def release(self, checkpoint_id: str) -> None:
+        """Fin du job: son point de reprise redevient évinçable"""
+        self.backend.release_lease(
+            "checkpoint", os.path.basename(self._directory(checkpoint_id))
+        )
+
+    def load(self, checkpoint_id: str) -> Optional[Checkpoint]:
+        directory = self._directory(checkpoint_id)
+        try:
+            with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+                return Checkpoint(directory, json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    def keep_source(self, checkpoint_id: str, video_path: str) -> Optional[str]:
+        """Range la vidéo d'entrée d'un job interrompu dans son point de reprise.
+
+        Retourne son nouveau chemin, ou ``None`` s'il n'y a pas de point de
+        reprise (l'entrée peut alors être supprimée).
+        """
+        checkpoint = self.load(checkpoint_id)
+        if checkpoint is None:
+            return None
+        if os.path.dirname(os.path.abspath(video_path)) == os.path.abspath(
+            checkpoint.directory
+        ):
+            return video_path
+        # Nom d'origine gardé: les vidéos produites en dérivent le leur
+        return checkpoint.save_file(
+            "source", video_path, filename=os.path.basename(video_path)
+        )
+
+    def source_path(self, checkpoint_id: str) -> Optional[str]:
+        """Vidéo d'entrée gardée pour une reprise par l'API"""
+        checkpoint = self.load(checkpoint_id)
+        if checkpoint is None or not checkpoint.has("source"):
+            return None
+        path = checkpoint.path("source")
+        return path if os.path.exists(path) else None
+
+    def discard(self, checkpoint_id: str) -> None:
+        shutil.rmtree(self._directory(checkpoint_id), ignore_errors=True)
+
+    def evict(self) -> int:
+        """Supprime les points de reprise non mis à jour depuis ``ttl``
+        secondes, puis les moins récents au-delà de ``max_bytes``"""
+        removed = 0
+        now = time.time()
+        active = self.backend.leased("checkpoint")
+        entries = []
+        total = 0
+        for entry in self._entries():
+            path, updated_at, size = entry
+            total += size
+            if os.path.basename(path) in active:
+                continue
+            if now - updated_at > self.ttl:
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                removed += 1
+            else:
+                entries.append(entry)
+        for path, _, size in sorted(entries, key=lambda entry: entry[1]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        if removed:
+            print(f"🧹 Points de reprise supprimés: {removed}")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        return {
+            "enabled": self.enabled,
+            "entries": len(entries),
+            "bytes": sum(size for _, _, size in entries),
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+        }
+
+    def _entries(self) -> List[Tuple[str, float, int]]:
+        """(dossier, dernière mise à jour, octets) de chaque point de reprise"""
+        if not os.path.isdir(self.root):
+            return []
+        entries = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir():
+                continue
+            try:
+                try:
+                    updated_at = os.path.getmtime(os.path.join(entry.path, MANIFEST))
+                except OSError:
+                    updated_at = entry.stat().st_mtime
+                size = sum(file.stat().st_size for file in os.scandir(entry.path))
+            except OSError:
+                # Dossier supprimé entre-temps (autre worker)
+                continue
+            entries.append((entry.path, updated_at, size))
+        return entries
+
+
+checkpoint_store = CheckpointStore(
+    settings.CHECKPOINT_DIR,
+    settings.CHECKPOINT_TTL,
+    settings.CHECKPOINT_MAX_BYTES,
+    settings.CHECKPOINT_ENABLED,
+)
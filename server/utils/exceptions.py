@@ -10,6 +10,12 @@ class AudioExtractionError(VideoProcessingError):
     pass
 
 
+class NoAudioStreamError(AudioExtractionError):
+    """La vidéo ne contient aucune piste audio"""
+
+    pass
+
+
 class TranscriptionError(VideoProcessingError):
     """Erreur lors de la transcription"""
 
@@ -28,7 +34,31 @@ class SubtitleGenerationError(VideoProcessingError):
     pass
 
 
+class StageTimeoutError(VideoProcessingError):
+    """Une étape du pipeline a dépassé son délai maximum"""
+
+    pass
+
+
 class FileValidationError(Exception):
     """Erreur de validation de fichier"""
 
     pass
+
+
+class FileTooLargeError(FileValidationError):
+    """Fichier au-delà de la taille maximum autorisée"""
+
+    pass
+
+
+class JobQueueFullError(Exception):
+    """La file d'attente des jobs est pleine"""
+
+    pass
+
+
+class StorageFullError(Exception):
+    """Espace disque insuffisant dans WORK_DIR pour un nouveau job"""
+
+    pass
@@ -0,0 +1,99 @@
+import asyncio
+import contextvars
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Optional
+
+from config.settings import settings
+
+from . import profiler
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """Pool de threads pour les attentes I/O (réseau, sous-processus, disque)"""
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=settings.IO_WORKERS, thread_name_prefix="dubsy-io"
+        )
+    return _thread_pool
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Pool de processus pour le travail CPU (décodage, calculs lourds)"""
+    global _process_pool
+    if _process_pool is None:
+        # "spawn" évite de dupliquer les threads et la boucle asyncio du parent
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.CPU_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+async def _run(executor: Executor, func: Callable[..., Any], *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+
+
+async def run_in_thread(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Exécute une fonction bloquante dans le pool de threads"""
+    profile = profiler.current()
+    if profile is None:
+        return await _run(get_thread_pool(), func, *args, **kwargs)
+    # Job profilé: le thread hérite du profil (spans) et passe sous cProfile
+    context = contextvars.copy_context()
+    return await _run(
+        get_thread_pool(), context.run, _profiled_call, profile, func, *args, **kwargs
+    )
+
+
+def _profiled_call(
+    profile: "profiler.JobProfile", func: Callable[..., Any], /, *args, **kwargs
+) -> Any:
+    name = getattr(func, "__qualname__", repr(func))
+    with profiler.span(name, "thread"):
+        if profile.cpu:
+            return profile.run_profiled(func, *args, **kwargs)
+        return func(*args, **kwargs)
+
+
+async def run_in_process(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Exécute une fonction CPU dans le pool de processus (arguments picklables).
+
+    Un pool cassé (processus enfant mort) est recréé et l'appel retenté une
+    fois, pour que les jobs suivants ne restent pas bloqués dessus.
+    """
+    # Hors de portée de cProfile: seule la durée apparaît dans la trace
+    with profiler.span(getattr(func, "__qualname__", repr(func)), "process"):
+        pool = get_process_pool()
+        try:
+            return await _run(pool, func, *args, **kwargs)
+        except BrokenProcessPool as e:
+            print(f"⚠ Pool de processus cassé, recréation: {e}")
+            _reset_process_pool(pool)
+        return await _run(get_process_pool(), func, *args, **kwargs)
+
+
+def _reset_process_pool(pool: ProcessPoolExecutor) -> None:
+    global _process_pool
+    # Un autre appel a pu déjà le remplacer
+    if _process_pool is pool:
+        _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_executors() -> None:
+    """Arrête les pools (appelé à l'arrêt de l'application)"""
+    global _thread_pool, _process_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
@@ -0,0 +1,124 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+from typing import Any, Dict, Optional, Set
+
+from config.settings import settings
+from utils.exceptions import VideoProcessingError
+
+CACHE_FILENAME = "ffmpeg_capabilities.json"
+
+_capabilities: Optional[Dict[str, Any]] = None
+_lock = threading.Lock()
+
+
+def ffmpeg_capabilities() -> Dict[str, Any]:
+    """Version, encodeurs et filtres de ffmpeg (et version de ffprobe).
+
+    Sondés une fois par processus, et gardés dans ``CACHE_DIR`` tant que les
+    binaires ne changent pas (chemin, taille, date): les autres workers et
+    les appels suivants de la CLI ne relancent pas ffmpeg.
+    """
+    global _capabilities
+    with _lock:
+        if _capabilities is None:
+            _capabilities = _load_or_probe()
+        return _capabilities
+
+
+def require_ffmpeg(encoder: Optional[str] = None, filter: Optional[str] = None) -> None:
+    """Lève ``VideoProcessingError`` si ffmpeg, l'encodeur ou le filtre manque"""
+    capabilities = ffmpeg_capabilities()
+    if not capabilities["ffmpeg"]:
+        raise VideoProcessingError(
+            "FFmpeg n'est pas installé. Installez-le depuis https://ffmpeg.org"
+        )
+    if encoder and encoder not in capabilities["encoders"]:
+        raise VideoProcessingError(f"FFmpeg compilé sans l'encodeur {encoder}")
+    if filter and filter not in capabilities["filters"]:
+        hint = " (libass)" if filter in ("subtitles", "ass") else ""
+        raise VideoProcessingError(f"FFmpeg compilé sans le filtre {filter}{hint}")
+
+
+def _load_or_probe() -> Dict[str, Any]:
+    binaries = {name: _fingerprint(name) for name in ("ffmpeg", "ffprobe")}
+    cache_path = os.path.join(settings.CACHE_DIR, CACHE_FILENAME)
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("binaries") == binaries:
+            return cached
+    except (OSError, ValueError):
+        pass
+
+    capabilities = _probe(binaries)
+    try:
+        os.makedirs(settings.CACHE_DIR, exist_ok=True)
+        # Écriture atomique: plusieurs workers peuvent sonder en même temps
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(capabilities, f)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"⚠ Capacités ffmpeg non mises en cache: {e}")
+    return capabilities
+
+
+def _fingerprint(name: str) -> Optional[Dict[str, Any]]:
+    path = shutil.which(name)
+    if not path:
+        return None
+    stat = os.stat(path)
+    return {"path": path, "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def _probe(binaries: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    capabilities: Dict[str, Any] = {
+        "binaries": binaries,
+        "ffmpeg": None,
+        "ffprobe": None,
+        "libass": False,
+        "encoders": [],
+        "filters": [],
+    }
+    if binaries["ffprobe"]:
+        output = _run(binaries["ffprobe"]["path"], "-version")
+        capabilities["ffprobe"] = _version(output)
+    if not binaries["ffmpeg"]:
+        return capabilities
+
+    ffmpeg = binaries["ffmpeg"]["path"]
+    version = _run(ffmpeg, "-version")
+    capabilities["ffmpeg"] = _version(version)
+    capabilities["encoders"] = sorted(_names(_run(ffmpeg, "-encoders")))
+    capabilities["filters"] = sorted(_names(_run(ffmpeg, "-filters")))
+    capabilities["libass"] = (
+        "--enable-libass" in version or "subtitles" in capabilities["filters"]
+    )
+    return capabilities
+
+
+def _run(binary: str, option: str) -> str:
+    try:
+        result = subprocess.run(
+            [binary, "-hide_banner", option],
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    return result.stdout if result.returncode == 0 else ""
+
+
+def _version(output: str) -> Optional[str]:
+    match = re.search(r"version (\S+)", output)
+    return match.group(1) if match else None
+
+
+def _names(listing: str) -> Set[str]:
+    """Noms d'une liste ``-encoders``/``-filters`` (drapeaux puis nom)"""
+    return set(re.findall(r"^ ?[A-Z.|]{3,6} +([\w-]+) ", listing, re.M))
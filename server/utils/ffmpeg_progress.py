@@ -0,0 +1,183 @@
+import asyncio
+import collections
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from config.settings import settings
+from utils import profiler
+from utils.exceptions import VideoProcessingError
+
+# Reçoit l'état agrégé: percent, eta (secondes), speed (x temps réel)
+ProgressCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class ProgressTracker:
+    """Agrège l'avancement d'un ou plusieurs ffmpeg en pourcentage et ETA.
+
+    Chaque processus déclare les secondes de média déjà produites (et sa
+    vitesse); un événement est émis au plus toutes les ``min_interval``
+    secondes pour ne pas inonder les abonnés.
+    """
+
+    def __init__(
+        self,
+        total_seconds: float,
+        callback: Optional[ProgressCallback],
+        min_interval: float = settings.PROGRESS_INTERVAL,
+    ) -> None:
+        self.total_seconds = total_seconds
+        self.callback = callback
+        self.min_interval = min_interval
+        self._done: Dict[Hashable, float] = {}
+        self._speeds: Dict[Hashable, float] = {}
+        self._started = time.monotonic()
+        self._last_sent: Optional[float] = None
+
+    def part(
+        self, key: Hashable
+    ) -> Callable[[float, Optional[float]], Awaitable[None]]:
+        """Callback ``run_ffmpeg`` d'un processus, identifié par ``key``"""
+
+        async def on_progress(seconds: float, speed: Optional[float]) -> None:
+            await self.update(key, seconds, speed)
+
+        return on_progress
+
+    async def update(
+        self, key: Hashable, seconds: float, speed: Optional[float] = None
+    ) -> None:
+        self._done[key] = seconds
+        if speed:
+            self._speeds[key] = speed
+        else:
+            # Processus terminé: il ne contribue plus au débit
+            self._speeds.pop(key, None)
+
+        now = time.monotonic()
+        if self.callback is None:
+            return
+        # Limité en fréquence, sauf le dernier état (100%)
+        finished = sum(self._done.values()) >= self.total_seconds
+        if (
+            self._last_sent is not None
+            and now - self._last_sent < self.min_interval
+            and not finished
+        ):
+            return
+        self._last_sent = now
+        await self.callback(self.snapshot())
+
+    def snapshot(self) -> Dict[str, Any]:
+        done = min(sum(self._done.values()), self.total_seconds)
+        fraction = done / self.total_seconds if self.total_seconds > 0 else 0.0
+        speed = sum(self._speeds.values())
+
+        # Débit instantané si ffmpeg le donne, sinon débit moyen observé
+        if speed > 0:
+            eta = (self.total_seconds - done) / speed
+        elif fraction > 0:
+            elapsed = time.monotonic() - self._started
+            eta = elapsed * (1 - fraction) / fraction
+        else:
+            eta = None
+
+        return {
+            "percent": round(100 * fraction, 1),
+            "eta": round(eta, 1) if eta is not None else None,
+            "speed": round(speed, 2) if speed > 0 else None,
+        }
+
+
+def _parse_out_time(block: Dict[str, str]) -> Optional[float]:
+    """Secondes produites d'un bloc ``-progress`` (``out_time_ms`` est en µs)"""
+    for key in ("out_time_us", "out_time_ms"):
+        value = block.get(key, "")
+        if value.lstrip("-").isdigit():
+            return max(0, int(value)) / 1_000_000
+    return None
+
+
+def _parse_speed(value: str) -> Optional[float]:
+    try:
+        return float(value.rstrip("x"))
+    except ValueError:
+        return None  # N/A au démarrage
+
+
+async def communicate(process: asyncio.subprocess.Process) -> Tuple[bytes, bytes]:
+    """``process.communicate()``, en tuant le processus si l'attente est annulée"""
+    try:
+        return await process.communicate()
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+
+async def run_ffmpeg(
+    cmd: List[str],
+    label: str,
+    on_progress: Optional[Callable[[float, Optional[float]], Awaitable[None]]] = None,
+    timeout: Optional[float] = None,
+) -> None:
+    """Exécute ffmpeg en suivant son avancement sans bufferiser sa sortie.
+
+    L'avancement est lu au fil de l'eau sur stdout (``-progress pipe:1``);
+    de stderr, seules les dernières lignes sont gardées pour l'erreur.
+    """
+    cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+    with profiler.span(label, "subprocess", argv=cmd) as span:
+        await _run_ffmpeg(cmd, label, on_progress, timeout, span)
+
+
+async def _run_ffmpeg(
+    cmd: List[str],
+    label: str,
+    on_progress: Optional[Callable[[float, Optional[float]], Awaitable[None]]],
+    timeout: Optional[float],
+    span: Dict[str, Any],
+) -> None:
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        raise VideoProcessingError("FFmpeg introuvable")
+
+    stderr_tail = collections.deque(maxlen=settings.FFMPEG_LOG_TAIL_LINES)
+
+    async def read_progress() -> None:
+        block: Dict[str, str] = {}
+        async for raw in process.stdout:
+            key, _, value = raw.decode(errors="replace").strip().partition("=")
+            block[key] = value
+            if key != "progress":
+                continue
+            seconds = _parse_out_time(block)
+            if on_progress and seconds is not None:
+                speed = _parse_speed(block.get("speed", "")) if value != "end" else None
+                await on_progress(seconds, speed)
+            block = {}
+
+    async def read_stderr() -> None:
+        async for raw in process.stderr:
+            stderr_tail.append(raw.decode(errors="replace").rstrip())
+
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(read_progress(), read_stderr(), process.wait()), timeout
+        )
+    except asyncio.TimeoutError:
+        raise VideoProcessingError(f"Timeout {label}")
+    finally:
+        # Timeout, annulation ou erreur de lecture: pas de ffmpeg orphelin
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        span["returncode"] = process.returncode
+
+    if process.returncode != 0:
+        raise VideoProcessingError(f"Erreur {label}: " + "\n".join(stderr_tail))
@@ -0,0 +1,333 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from config.settings import settings
+
+from .exceptions import JobQueueFullError
+from .executors import run_in_thread
+from .progress_manager import progress_manager
+from .state_backend import StateBackend, state_backend
+
+JobRunner = Callable[["Job"], Awaitable[Dict[str, Any]]]
+# Appelé quand un job est annulé avant d'avoir démarré
+JobDiscard = Callable[["Job"], None]
+
+
+# Paramètres d'un job visibles des clients: les autres (chemins sur le
+# serveur, point de reprise, empreinte de la source) restent internes
+PUBLIC_PARAMS = (
+    "filename",
+    "source_lang",
+    "target_langs",
+    "subtitle_type",
+    "duration",
+    "profile",
+    "profile_cpu",
+    "retry_of",
+)
+
+
+class Job:
+    """Représente un traitement vidéo soumis à la file d'attente."""
+
+    def __init__(
+        self,
+        job_id: str,
+        runner: Optional[JobRunner],
+        params: Dict[str, Any],
+        on_discard: Optional[JobDiscard] = None,
+    ):
+        self.id = job_id
+        self.runner = runner
+        self.params = params
+        self.on_discard = on_discard
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._finished = asyncio.Event()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Vue d'un job renvoyée aux clients"""
+        return {
+            **self.to_record(),
+            "params": {
+                key: value for key, value in self.params.items() if key in PUBLIC_PARAMS
+            },
+        }
+
+    def to_record(self) -> Dict[str, Any]:
+        """État complet d'un job, enregistré dans l'état partagé"""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "params": self.params,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "Job":
+        """Vue d'un job exécuté par un autre worker (sans runner)"""
+        job = cls(record["job_id"], None, record["params"])
+        job.status = record["status"]
+        job.created_at = record["created_at"]
+        job.started_at = record["started_at"]
+        job.finished_at = record["finished_at"]
+        job.result = record["result"]
+        job.error = record["error"]
+        return job
+
+
+class JobManager:
+    """File d'attente de jobs drainée par un pool borné de workers asyncio.
+
+    Chaque job s'exécute dans le processus qui l'a reçu; son état est
+    recopié dans ``backend`` pour être lisible (et annulable) depuis les
+    autres workers.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue_size: int,
+        history_limit: int = 500,
+        backend: StateBackend = state_backend,
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.history_limit = history_limit
+        self.backend = backend
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._cancels: Set[asyncio.Task] = set()
+        # Écritures de l'état partagé dans l'ordre des transitions
+        self._save_lock = asyncio.Lock()
+        backend.subscribe(self._on_event)
+
+    async def start(self) -> None:
+        """Démarre les workers (appelé au démarrage de l'application)"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.max_workers)
+        ]
+        print(f"🧵 {self.max_workers} worker(s) de traitement démarré(s)")
+
+    async def stop(self) -> None:
+        """Arrête les workers en cours"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(
+        self,
+        job_id: str,
+        runner: JobRunner,
+        params: Dict[str, Any],
+        on_discard: Optional[JobDiscard] = None,
+    ) -> Job:
+        """Enregistre un job et le place dans la file d'attente"""
+        if self._queue is None:
+            raise RuntimeError("JobManager non démarré")
+        if job_id in self._jobs:
+            raise ValueError(f"Job déjà existant: {job_id}")
+
+        job = Job(job_id, runner, params, on_discard)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError(
+                f"File d'attente pleine ({self.max_queue_size} jobs en attente)"
+            )
+
+        self._jobs[job_id] = job
+        await self._save(job)
+        await self._prune_history()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Job exécuté par ce worker"""
+        return self._jobs.get(job_id)
+
+    async def find(self, job_id: str) -> Optional[Job]:
+        """Job de ce worker ou, à défaut, d'un autre worker (état partagé)"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        record = await run_in_thread(self.backend.get_job, job_id)
+        return Job.from_record(record) if record else None
+
+    async def cancel(self, job_id: str) -> Optional[Job]:
+        """Annule un job en attente ou en cours.
+
+        Un job en cours voit sa tâche annulée (processus ffmpeg tués, requêtes
+        OpenAI abandonnées, fichiers partiels supprimés); l'appel attend la
+        fin du nettoyage, au plus ``JOB_CANCEL_TIMEOUT`` secondes.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return await self._cancel_remote(job_id)
+        if job.is_finished:
+            return job
+
+        if job._task is None:
+            # Encore dans la file: le worker l'ignorera
+            job.status = "cancelled"
+            job.error = "Job annulé"
+            job.finished_at = time.time()
+            job._finished.set()
+            if job.on_discard:
+                await run_in_thread(job.on_discard, job)
+            await self._save(job)
+            await progress_manager.send(job.id, "cancelled", {"error": job.error})
+            return job
+
+        job._task.cancel()
+        try:
+            await asyncio.wait_for(
+                job._finished.wait(), timeout=settings.JOB_CANCEL_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            print(f"⚠ Job {job.id}: annulation toujours en cours")
+        return job
+
+    async def _cancel_remote(self, job_id: str) -> Optional[Job]:
+        """Demande l'annulation au worker qui exécute le job et attend sa fin"""
+        job = await self.find(job_id)
+        if job is None or job.is_finished:
+            return job
+
+        self.backend.publish(job_id, "control", {"type": "cancel"})
+        deadline = time.monotonic() + settings.JOB_CANCEL_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(settings.STATE_POLL_INTERVAL)
+            job = await self.find(job_id)
+            if job.is_finished:
+                return job
+        print(f"⚠ Job {job_id}: annulation toujours en cours")
+        return job
+
+    def _on_event(self, channel: str, job_id: str, message: Dict[str, Any]) -> None:
+        """Annulation demandée par un autre worker pour un job de celui-ci"""
+        if channel != "control" or message.get("type") != "cancel":
+            return
+        job = self._jobs.get(job_id)
+        if job and not job.is_finished:
+            task = asyncio.create_task(self.cancel(job_id))
+            self._cancels.add(task)
+            task.add_done_callback(self._cancels.discard)
+
+    async def list(self, status: Optional[str] = None) -> List[Job]:
+        """Jobs de tous les workers, du plus récent au plus ancien"""
+        jobs = {
+            record["job_id"]: Job.from_record(record)
+            for record in await run_in_thread(self.backend.list_jobs, status)
+        }
+        # L'état local est le plus à jour pour les jobs de ce worker
+        for job in self._jobs.values():
+            if not status or job.status == status:
+                jobs[job.id] = job
+            else:
+                jobs.pop(job.id, None)
+        return sorted(jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+    def queue_size(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def status_counts(self) -> Dict[str, int]:
+        """Jobs connus de ce worker, par statut"""
+        counts = dict.fromkeys(
+            ("queued", "running", "completed", "failed", "cancelled"), 0
+        )
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return counts
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run_job(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job: Job) -> None:
+        if job.status == "cancelled":
+            return  # Annulé pendant l'attente
+
+        job.status = "running"
+        job.started_at = time.time()
+        await self._save(job)
+        await progress_manager.send(job.id, "started", job.params)
+
+        # Tâche dédiée: l'annuler arrête le job sans arrêter le worker
+        job._task = asyncio.create_task(job.runner(job))
+        try:
+            try:
+                await asyncio.wait([job._task])
+            except asyncio.CancelledError:
+                # Arrêt du serveur: le job est annulé avec le worker
+                job._task.cancel()
+                await asyncio.wait([job._task])
+                raise
+        finally:
+            await self._finish_job(job)
+
+    async def _finish_job(self, job: Job) -> None:
+        """Enregistre l'issue de la tâche du job et la diffuse"""
+        try:
+            job.result = job._task.result()
+            job.status = "completed"
+            await progress_manager.send(job.id, "completed", job.result)
+        except asyncio.CancelledError:
+            job.error = "Job annulé"
+            job.status = "cancelled"
+            print(f"🛑 Job {job.id} annulé")
+            await progress_manager.send(job.id, "cancelled", {"error": job.error})
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            print(f"❌ Job {job.id} en échec: {job.error}")
+            await progress_manager.send(job.id, "failed", {"error": job.error})
+        finally:
+            job.finished_at = time.time()
+            await self._save(job)
+            job._finished.set()
+
+    async def _save(self, job: Job) -> None:
+        try:
+            async with self._save_lock:
+                await run_in_thread(self.backend.save_job, job.to_record())
+        except Exception as e:
+            print(f"⚠ Job {job.id}: état partagé non enregistré ({e})")
+
+    async def _prune_history(self) -> None:
+        """Oublie les jobs terminés les plus anciens au-delà de la limite"""
+        await run_in_thread(self.backend.trim_jobs, self.history_limit)
+        finished = [job for job in self._jobs.values() if job.is_finished]
+        excess = len(self._jobs) - self.history_limit
+        if excess <= 0:
+            return
+        finished.sort(key=lambda j: j.finished_at or j.created_at)
+        for job in finished[:excess]:
+            del self._jobs[job.id]
+
+
+job_manager = JobManager(
+    settings.MAX_CONCURRENT_JOBS, settings.JOB_QUEUE_SIZE, settings.JOB_HISTORY_LIMIT
+)
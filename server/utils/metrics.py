@@ -0,0 +1,243 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple, Union
+
+from config.settings import settings
+
+Labels = Tuple[str, ...]
+# Valeur d'une métrique calculée à la lecture: un nombre, ou un nombre par
+# combinaison de labels
+CallbackValue = Union[float, Dict[Labels, float]]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'),
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Metric:
+    """Base commune: nom, aide, labels, et désactivation globale"""
+
+    type = "untyped"
+
+    def __init__(
+        self, registry: "Registry", name: str, help: str, labelnames: Sequence[str]
+    ) -> None:
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, *args) -> None:
+        super().__init__(*args)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, *labels: str) -> None:
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return super().render() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(v)}"
+            for labels, v in sorted(values.items())
+        ]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float]) -> None:
+        super().__init__(*args)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Par labels: compte par bucket (non cumulé), somme, total
+        self._values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not self.registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                labels, ([0] * len(self.buckets), [0.0])
+            )
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """Observe la durée du bloc, même s'il échoue"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = {
+                labels: (list(counts), total[0])
+                for labels, (counts, total) in self._values.items()
+            }
+        lines = super().render()
+        names = self.labelnames + ("le",)
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = "+Inf" if math.isinf(bound) else _format_value(bound)
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(names, labels + (le,))} {cumulative}"
+                )
+            suffix = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class CallbackMetric(Metric):
+    """Jauge (ou compteur) lue à la demande: aucun coût hors scrape"""
+
+    def __init__(
+        self, *args, callback: Callable[[], CallbackValue], type: str = "gauge"
+    ) -> None:
+        super().__init__(*args)
+        self.callback = callback
+        self.type = type
+
+    def render(self) -> List[str]:
+        try:
+            value = self.callback()
+        except Exception as e:
+            print(f"⚠ Métrique {self.name} indisponible: {e}")
+            return []
+        values = value if isinstance(value, dict) else {(): value}
+        return super().render() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(v)}"
+            for labels, v in sorted(values.items())
+        ]
+
+
+class Registry:
+    """Métriques du processus, exposées au format texte Prometheus.
+
+    Mesurer coûte un verrou et une addition; avec ``enabled`` à False,
+    les compteurs et histogrammes ne font rien.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._metrics: Dict[str, Metric] = {}
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(self, name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = (),
+    ) -> Histogram:
+        return self._add(Histogram(self, name, help, labelnames, buckets=buckets))
+
+    def callback(
+        self,
+        name: str,
+        help: str,
+        callback: Callable[[], CallbackValue],
+        labelnames: Sequence[str] = (),
+        type: str = "gauge",
+    ) -> CallbackMetric:
+        return self._add(
+            CallbackMetric(self, name, help, labelnames, callback=callback, type=type)
+        )
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+    def _add(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrique déjà déclarée: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+
+registry = Registry(settings.METRICS_ENABLED)
+
+# Durées des étapes du pipeline (par lot pour la traduction, par langue
+# pour le SRT et l'intégration)
+stage_duration = registry.histogram(
+    "dubsy_stage_duration_seconds",
+    "Durée des étapes du pipeline",
+    ["stage"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+input_bytes = registry.counter(
+    "dubsy_input_bytes_total", "Octets de vidéo traités par le pipeline"
+)
+audio_seconds = registry.counter(
+    "dubsy_audio_seconds_transcribed_total", "Secondes d'audio envoyées à Whisper"
+)
+transcription_requests = registry.counter(
+    "dubsy_transcription_requests_total",
+    "Requêtes Whisper par modèle et issue",
+    ["model", "status"],
+)
+transcription_upload_bytes = registry.counter(
+    "dubsy_transcription_upload_bytes_total",
+    "Octets d'audio envoyés à Whisper",
+    ["model"],
+)
+translation_requests = registry.counter(
+    "dubsy_translation_requests_total",
+    "Requêtes de traduction par modèle et issue",
+    ["model", "status"],
+)
+translation_tokens = registry.counter(
+    "dubsy_translation_tokens_total",
+    "Tokens facturés par modèle (prompt ou completion)",
+    ["model", "kind"],
+)
+api_retries = registry.counter(
+    "dubsy_api_retries_total",
+    "Requêtes OpenAI réessayées, par modèle et cause",
+    ["model", "reason"],
+)
+encode_speed = registry.histogram(
+    "dubsy_encode_speed_ratio",
+    "Vitesse de gravure des sous-titres (secondes de vidéo par seconde)",
+    ["strategy"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128),
+)
@@ -0,0 +1,174 @@
+import asyncio
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Profil du job en cours: hérité par les tâches asyncio qu'il crée et
+# transmis aux threads par ``run_in_thread``
+_current: ContextVar[Optional["JobProfile"]] = ContextVar("job_profile", default=None)
+
+
+def trace_filename(job_id: str) -> str:
+    return _safe_name(f"profile_{job_id}.trace.json")
+
+
+def cpu_filename(job_id: str) -> str:
+    return _safe_name(f"profile_{job_id}.prof")
+
+
+def _safe_name(filename: str) -> str:
+    from .validators import sanitize_filename
+
+    return sanitize_filename(filename)
+
+
+class JobProfile:
+    """Trace des étapes d'un job, et profil CPU optionnel.
+
+    La trace suit le format Chrome Trace Event (Perfetto, chrome://tracing,
+    speedscope): un événement par span, une ligne par tâche asyncio ou
+    thread. Le profil CPU agrège cProfile sur les appels ``run_in_thread``
+    (SRT, hachage, ffmpeg attendu en thread), lisible par pstats ou snakeviz.
+    """
+
+    def __init__(self, job_id: str, cpu: bool = False) -> None:
+        self.job_id = job_id
+        self.cpu = cpu
+        self._origin = time.perf_counter()
+        self._started_at = time.time()
+        self._events: List[Dict[str, Any]] = []
+        self._lanes: Dict[str, int] = {}
+        self._stats: Optional[pstats.Stats] = None
+        self._lock = threading.Lock()
+
+    def record(
+        self, name: str, category: str, start: float, end: float, args: Dict
+    ) -> None:
+        """Ajoute un span (instants ``time.perf_counter``) sur la ligne courante"""
+        lane = _lane_name()
+        with self._lock:
+            tid = self._lanes.setdefault(lane, len(self._lanes) + 1)
+            self._events.append(
+                {
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": round((start - self._origin) * 1e6),
+                    "dur": round((end - start) * 1e6),
+                    "pid": 1,
+                    "tid": tid,
+                    "args": args,
+                }
+            )
+
+    def run_profiled(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Exécute ``func`` sous cProfile (dans le thread appelant)"""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Un autre profileur est actif (Python 3.12+: un seul à la fois)
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(profile)
+                else:
+                    self._stats.add(profile)
+
+    def trace(self) -> Dict[str, Any]:
+        with self._lock:
+            events = list(self._events)
+            lanes = dict(self._lanes)
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": 1, "args": {"name": "dubsy"}}
+        ] + [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 1,
+                "tid": tid,
+                "args": {"name": lane},
+            }
+            for lane, tid in lanes.items()
+        ]
+        return {
+            "traceEvents": metadata + sorted(events, key=lambda e: e["ts"]),
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "job_id": self.job_id,
+                "started_at": self._started_at,
+                "cpu_profile": self.cpu,
+            },
+        }
+
+    def save(self, directory: str) -> List[str]:
+        """Écrit la trace (et le profil CPU s'il existe); retourne les chemins"""
+        paths = [os.path.join(directory, trace_filename(self.job_id))]
+        with open(paths[0], "w", encoding="utf-8") as f:
+            json.dump(self.trace(), f)
+        with self._lock:
+            if self._stats is not None:
+                paths.append(os.path.join(directory, cpu_filename(self.job_id)))
+                self._stats.dump_stats(paths[1])
+        return paths
+
+
+def _lane_name() -> str:
+    """Tâche asyncio courante (nom et coroutine), sinon thread courant"""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is None:
+        return threading.current_thread().name
+    coro = task.get_coro()
+    return f"{task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+
+
+def current() -> Optional[JobProfile]:
+    return _current.get()
+
+
+@contextmanager
+def activate(profile: Optional[JobProfile]) -> Iterator[Optional[JobProfile]]:
+    """Rattache les spans du bloc (et des tâches qu'il crée) à ``profile``"""
+    if profile is None:
+        yield None
+        return
+    token = _current.set(profile)
+    try:
+        with span("job", "job", job_id=profile.job_id):
+            yield profile
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, category: str = "stage", **args: Any) -> Iterator[Dict]:
+    """Mesure le bloc si un profil est actif; sinon ne coûte qu'une lecture.
+
+    Le dictionnaire produit peut être complété pendant le bloc (code de
+    retour, statut) et finit dans les ``args`` de l'événement.
+    """
+    profile = _current.get()
+    if profile is None:
+        yield args
+        return
+    start = time.perf_counter()
+    try:
+        yield args
+    except BaseException as e:
+        args.setdefault("error", type(e).__name__)
+        raise
+    finally:
+        profile.record(name, category, start, time.perf_counter(), args)
@@ -1,40 +1,201 @@
-from typing import Any, Dict, Set
+import asyncio
+import collections
+from typing import Any, Deque, Dict, Hashable, List, Optional, Set, Tuple
 
+from config.settings import settings
 from fastapi import WebSocket
 
+from .executors import run_in_thread
+from .state_backend import StateBackend, state_backend
+
+# Événements de cycle de vie: seul le dernier décrit l'état du job
+LIFECYCLE_EVENTS = {"queued", "started", "completed", "failed", "cancelled"}
+
+
+def _state_key(message: Dict[str, Any]) -> Tuple[Hashable, ...]:
+    """Clé sous laquelle un message remplace le précédent (dernier état connu)"""
+    event = message["type"]
+    data = message.get("data")
+    if event in LIFECYCLE_EVENTS:
+        return ("status",)
+    if event == "progress":
+        return ("progress",)
+    language = data.get("language") if isinstance(data, dict) else None
+    return (event, language)
+
+
+def _coalesce_key(message: Dict[str, Any]) -> Optional[Tuple[Hashable, ...]]:
+    """Clé des ``progress`` qu'un message plus récent rend obsolètes"""
+    if message["type"] != "progress":
+        return None
+    data = message.get("data")
+    if not isinstance(data, dict):
+        return ("progress",)
+    return ("progress", data.get("step"), data.get("language"))
+
+
+class Subscriber:
+    """Un WebSocket abonné, avec sa file d'envoi et sa tâche d'émission.
+
+    La file est bornée: un client trop lent pour la vider est déconnecté
+    plutôt que de retenir les autres abonnés ou le pipeline. Un
+    ``progress`` en attente est remplacé par le suivant de même étape.
+    """
+
+    def __init__(self, websocket: WebSocket, max_pending: int) -> None:
+        self.websocket = websocket
+        self.max_pending = max_pending
+        self._pending: Deque[Dict[str, Any]] = collections.deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False
+
+    def start(self, on_error) -> None:
+        self._task = asyncio.create_task(self._drain(on_error))
+
+    def put(self, message: Dict[str, Any]) -> bool:
+        """Ajoute un message; False si le client est trop en retard"""
+        key = _coalesce_key(message)
+        if key is not None:
+            for pending in self._pending:
+                if _coalesce_key(pending) == key:
+                    # Remplacé par le plus récent, placé après les autres
+                    self._pending.remove(pending)
+                    break
+        if len(self._pending) >= self.max_pending:
+            return False
+        self._pending.append(message)
+        self._wakeup.set()
+        return True
+
+    def stop(self) -> None:
+        self.closed = True
+        if self._task and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    async def _drain(self, on_error) -> None:
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while self._pending:
+                    message = self._pending.popleft()
+                    await asyncio.wait_for(
+                        self.websocket.send_json(message),
+                        settings.PROGRESS_SEND_TIMEOUT,
+                    )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            on_error(self)
+
 
 class ProgressManager:
-    """Centralise WebSocket subscriptions by job_id and broadcasts progress events."""
+    """Centralise WebSocket subscriptions by job_id and broadcasts progress events.
 
-    def __init__(self) -> None:
-        self._subscribers: Dict[str, Set[WebSocket]] = {}
+    ``send`` ne fait qu'alimenter la file de chaque abonné: l'envoi réseau
+    se fait dans une tâche par abonné, sans bloquer l'appelant. Le dernier
+    état connu de chaque job est rejoué aux abonnés qui arrivent en cours
+    de route. Les événements passent aussi par ``backend``, qui les remet
+    aux abonnés connectés à d'autres workers.
+    """
+
+    def __init__(
+        self,
+        max_pending: int = settings.PROGRESS_QUEUE_SIZE,
+        state_limit: int = settings.JOB_HISTORY_LIMIT,
+        backend: StateBackend = state_backend,
+    ) -> None:
+        self.max_pending = max_pending
+        self.state_limit = state_limit
+        self.backend = backend
+        self._subscribers: Dict[str, Dict[WebSocket, Subscriber]] = {}
+        # Par job, le dernier message de chaque clé d'état (ordre d'arrivée)
+        self._states: collections.OrderedDict = collections.OrderedDict()
+        self._closing: Set[asyncio.Task] = set()
+        backend.subscribe(self._on_event)
 
     async def connect(self, job_id: str, websocket: WebSocket) -> None:
         await websocket.accept()
-        if job_id not in self._subscribers:
-            self._subscribers[job_id] = set()
-        self._subscribers[job_id].add(websocket)
+        if job_id not in self._states:
+            # Job suivi par un autre worker avant le démarrage de celui-ci
+            for message in await run_in_thread(self.backend.job_events, job_id):
+                self._remember(job_id, message)
+        subscriber = Subscriber(websocket, self.max_pending)
+        for message in self.last_state(job_id):
+            subscriber.put(message)
+        subscriber.start(lambda sub: self._drop(job_id, sub))
+        self._subscribers.setdefault(job_id, {})[websocket] = subscriber
 
     def disconnect(self, job_id: str, websocket: WebSocket) -> None:
-        if job_id in self._subscribers:
-            self._subscribers[job_id].discard(websocket)
-            if not self._subscribers[job_id]:
-                del self._subscribers[job_id]
+        subscribers = self._subscribers.get(job_id)
+        if not subscribers:
+            return
+        subscriber = subscribers.pop(websocket, None)
+        if subscriber:
+            subscriber.stop()
+        if not subscribers:
+            del self._subscribers[job_id]
+
+    def has_subscribers(self, job_id: str) -> bool:
+        return bool(self._subscribers.get(job_id))
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def watched_jobs(self) -> int:
+        return len(self._subscribers)
+
+    def last_state(self, job_id: str) -> List[Dict[str, Any]]:
+        """Derniers messages connus du job, à rejouer à un nouvel abonné"""
+        state = self._states.get(job_id)
+        return list(state.values()) if state else []
 
     async def send(self, job_id: str, event: str, payload: Any | None = None) -> None:
-        if job_id not in self._subscribers:
-            return
         message = {"type": event}
         if payload is not None:
             message["data"] = payload
-        dead: Set[WebSocket] = set()
-        for ws in self._subscribers[job_id]:
-            try:
-                await ws.send_json(message)
-            except Exception:
-                dead.add(ws)
-        for ws in dead:
-            self.disconnect(job_id, ws)
+        self._deliver(job_id, message)
+        self.backend.publish(job_id, "progress", message)
+
+    def _on_event(self, channel: str, job_id: str, message: Dict[str, Any]) -> None:
+        """Événement émis par un autre worker"""
+        if channel == "progress":
+            self._deliver(job_id, message)
+
+    def _deliver(self, job_id: str, message: Dict[str, Any]) -> None:
+        self._remember(job_id, message)
+
+        for subscriber in list(self._subscribers.get(job_id, {}).values()):
+            if not subscriber.put(message):
+                print(f"⚠ Abonné trop lent déconnecté (job {job_id})")
+                self._drop(job_id, subscriber)
+
+    def _remember(self, job_id: str, message: Dict[str, Any]) -> None:
+        state = self._states.setdefault(job_id, collections.OrderedDict())
+        key = _state_key(message)
+        state.pop(key, None)
+        state[key] = message
+        self._states.move_to_end(job_id)
+        while len(self._states) > self.state_limit:
+            self._states.popitem(last=False)
+
+    def _drop(self, job_id: str, subscriber: Subscriber) -> None:
+        if subscriber.closed:
+            return
+        self.disconnect(job_id, subscriber.websocket)
+        task = asyncio.create_task(self._close(subscriber.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close(websocket: WebSocket) -> None:
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=1013), settings.PROGRESS_SEND_TIMEOUT
+            )
+        except Exception:
+            pass
 
 
 progress_manager = ProgressManager()
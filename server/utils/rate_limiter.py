@@ -0,0 +1,98 @@
+import asyncio
+import random
+import time
+from typing import Optional
+
+from config.settings import settings
+
+
+class TokenBucket:
+    """Seau à jetons rechargé en continu (capacité exprimée par minute)."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    def _refill(self, rate_factor: float) -> None:
+        now = time.monotonic()
+        rate = self.capacity * rate_factor / 60.0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, rate_factor: float) -> float:
+        """Secondes à attendre avant de pouvoir consommer ``amount`` jetons"""
+        self._refill(rate_factor)
+        # Une demande plus grosse que le seau n'attend que de le remplir
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / (self.capacity * rate_factor / 60.0)
+
+    def consume(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Limiteur requêtes/min et tokens/min partagé par tous les jobs du processus.
+
+    Sur un 429, tout le monde est mis en pause jusqu'au ``Retry-After`` et le
+    débit est réduit; il remonte progressivement après chaque succès.
+
+    Créé à l'import: son verrou n'est lié à une boucle asyncio qu'au premier
+    appel, et recréé si une autre boucle prend le relais (``asyncio.run``
+    appelé plusieurs fois par les benchmarks et la ligne de commande).
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int) -> None:
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.rate_factor = 1.0
+        self.paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _loop_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    async def acquire(self, tokens: int) -> None:
+        """Attend qu'une requête estimée à ``tokens`` tokens puisse partir"""
+        # Le verrou garantit un ordre FIFO entre les appelants
+        async with self._loop_lock():
+            while True:
+                pause = self.paused_until - time.monotonic()
+                wait = max(
+                    pause,
+                    self.requests.wait_time(1, self.rate_factor),
+                    self.tokens.wait_time(tokens, self.rate_factor),
+                )
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """Réagit à un 429: pause globale et réduction du débit"""
+        self.rate_factor = max(0.1, self.rate_factor * 0.5)
+        delay = retry_after if retry_after is not None else 1.0 / self.rate_factor
+        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+
+    def on_success(self) -> None:
+        self.rate_factor = min(1.0, self.rate_factor + 0.05)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Délai de retry exponentiel avec jitter complet"""
+    ceiling = min(settings.RETRY_MAX_DELAY, settings.RETRY_BASE_DELAY * 2**attempt)
+    return random.uniform(0, ceiling)
+
+
+translation_rate_limiter = RateLimiter(
+    settings.TRANSLATION_REQUESTS_PER_MINUTE, settings.TRANSLATION_TOKENS_PER_MINUTE
+)
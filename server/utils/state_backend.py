@@ -0,0 +1,735 @@
+import abc
+import asyncio
+import collections
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from config.settings import settings
+
+from .executors import run_in_thread
+
+# Reçoit (canal, job_id, message) publié par un autre worker
+EventListener = Callable[[str, str, Dict[str, Any]], None]
+
+
+class StateBackend(abc.ABC):
+    """État partagé entre workers: jobs, événements, emplacement des fichiers
+    et occupation de WORK_DIR (fichiers suivis, réservations, baux).
+
+    Les méthodes de lecture/écriture sont bloquantes (les appeler via
+    ``run_in_thread``), sauf ``publish`` qui ne fait que mettre le message
+    en attente. Un message publié est remis aux listeners des *autres*
+    workers: le worker émetteur le distribue lui-même localement.
+
+    Un bail (``kind``, ``key``) marque une ressource en cours d'utilisation
+    (job actif, point de reprise ouvert): aucun worker ne l'évince tant
+    qu'il est tenu.
+    """
+
+    def __init__(self) -> None:
+        self._listeners: List[EventListener] = []
+
+    def subscribe(self, listener: EventListener) -> None:
+        self._listeners.append(listener)
+
+    def _dispatch(self, channel: str, job_id: str, message: Dict[str, Any]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(channel, job_id, message)
+            except Exception as e:
+                print(f"⚠ Erreur dans un listener d'événements: {e}")
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    def publish(self, job_id: str, channel: str, message: Dict[str, Any]) -> None:
+        pass
+
+    @abc.abstractmethod
+    def job_events(self, job_id: str) -> List[Dict[str, Any]]:
+        """Événements ``progress`` encore conservés d'un job, dans l'ordre"""
+
+    @abc.abstractmethod
+    def save_job(self, record: Dict[str, Any]) -> None:
+        pass
+
+    @abc.abstractmethod
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abc.abstractmethod
+    def list_jobs(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        pass
+
+    @abc.abstractmethod
+    def trim_jobs(self, keep: int) -> None:
+        """Oublie les jobs terminés les plus anciens (et leurs fichiers) au-delà
+        de ``keep`` jobs"""
+
+    @abc.abstractmethod
+    def save_artifacts(self, job_id: str, filenames: List[str], url: str) -> None:
+        """Enregistre l'instance (``url``) qui détient les fichiers d'un job"""
+
+    @abc.abstractmethod
+    def mark_evicted(self, filename: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def get_artifact(self, filename: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abc.abstractmethod
+    def acquire_lease(self, kind: str, key: str, reserved_bytes: int = 0) -> None:
+        pass
+
+    @abc.abstractmethod
+    def release_lease(self, kind: str, key: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def leased(self, kind: str) -> Set[str]:
+        """Clés des baux ``kind`` tenus (par un worker encore en vie)"""
+
+    @abc.abstractmethod
+    def reserve_storage(
+        self, job_id: str, required_bytes: int, quota_bytes: int, free_bytes: int
+    ) -> bool:
+        """Prend le bail ``job`` avec ``required_bytes`` réservés, si
+        l'occupation reste sous ``quota_bytes`` et la réservation sous
+        ``free_bytes`` (disque libre) moins celles en attente. Atomique"""
+
+    @abc.abstractmethod
+    def save_file(
+        self,
+        name: str,
+        path: str,
+        job_id: Optional[str],
+        size: int,
+        last_access: float,
+        replace: bool = True,
+    ) -> None:
+        """Suit un fichier de WORK_DIR; ``replace=False`` garde l'existant"""
+
+    @abc.abstractmethod
+    def forget_file(self, name: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def touch_file(self, name: str) -> bool:
+        """Rafraîchit l'accès d'un fichier; False s'il n'est pas suivi"""
+
+    @abc.abstractmethod
+    def list_files(self) -> List[Dict[str, Any]]:
+        """Fichiers suivis: ``name``, ``path``, ``job_id``, ``size``,
+        ``last_access``"""
+
+    @abc.abstractmethod
+    def claim_file(self, name: str, last_access: float) -> bool:
+        """Retire un fichier à évincer s'il n'a pas été utilisé depuis
+        ``last_access`` et que son job est terminé; False sinon (un seul
+        worker le supprime)"""
+
+    @abc.abstractmethod
+    def storage_usage(self) -> Dict[str, int]:
+        """``files``, ``bytes``, ``reserved_bytes`` et ``active_jobs``"""
+
+
+class MemoryStateBackend(StateBackend):
+    """État local au processus: un seul worker, aucun autre à prévenir"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._artifacts: Dict[str, Dict[str, Any]] = {}
+        self._leases: Dict[Tuple[str, str], int] = {}  # octets réservés
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, job_id: str, channel: str, message: Dict[str, Any]) -> None:
+        pass  # Pas d'autre worker: la distribution locale suffit
+
+    def job_events(self, job_id: str) -> List[Dict[str, Any]]:
+        return []  # Le ProgressManager local a déjà tout vu
+
+    def save_job(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._jobs[record["job_id"]] = record
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        jobs.sort(key=lambda job: job["created_at"], reverse=True)
+        return [job for job in jobs if not status or job["status"] == status]
+
+    def trim_jobs(self, keep: int) -> None:
+        with self._lock:
+            excess = len(self._jobs) - keep
+            if excess <= 0:
+                return
+            finished = sorted(
+                (job for job in self._jobs.values() if job["finished_at"]),
+                key=lambda job: job["finished_at"],
+            )
+            for job in finished[:excess]:
+                del self._jobs[job["job_id"]]
+            self._artifacts = {
+                filename: artifact
+                for filename, artifact in self._artifacts.items()
+                if artifact["job_id"] in self._jobs
+            }
+
+    def save_artifacts(self, job_id: str, filenames: List[str], url: str) -> None:
+        with self._lock:
+            for filename in filenames:
+                self._artifacts[filename] = {
+                    "filename": filename,
+                    "job_id": job_id,
+                    "url": url,
+                    "evicted_at": None,
+                }
+
+    def mark_evicted(self, filename: str) -> None:
+        with self._lock:
+            if filename in self._artifacts:
+                self._artifacts[filename]["evicted_at"] = time.time()
+
+    def get_artifact(self, filename: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            artifact = self._artifacts.get(filename)
+            return dict(artifact) if artifact else None
+
+    def acquire_lease(self, kind: str, key: str, reserved_bytes: int = 0) -> None:
+        with self._lock:
+            self._leases[(kind, key)] = reserved_bytes
+
+    def release_lease(self, kind: str, key: str) -> None:
+        with self._lock:
+            self._leases.pop((kind, key), None)
+
+    def leased(self, kind: str) -> Set[str]:
+        with self._lock:
+            return {key for lease_kind, key in self._leases if lease_kind == kind}
+
+    def reserve_storage(
+        self, job_id: str, required_bytes: int, quota_bytes: int, free_bytes: int
+    ) -> bool:
+        with self._lock:
+            pending = self._pending_reservations()
+            usage = sum(f["size"] for f in self._files.values()) + pending
+            if usage + required_bytes > quota_bytes:
+                return False
+            if required_bytes > free_bytes - pending:
+                return False
+            self._leases[("job", job_id)] = required_bytes
+            return True
+
+    def save_file(
+        self,
+        name: str,
+        path: str,
+        job_id: Optional[str],
+        size: int,
+        last_access: float,
+        replace: bool = True,
+    ) -> None:
+        with self._lock:
+            if replace or name not in self._files:
+                self._files[name] = {
+                    "name": name,
+                    "path": path,
+                    "job_id": job_id,
+                    "size": size,
+                    "last_access": last_access,
+                }
+
+    def forget_file(self, name: str) -> None:
+        with self._lock:
+            self._files.pop(name, None)
+
+    def touch_file(self, name: str) -> bool:
+        with self._lock:
+            if name not in self._files:
+                return False
+            self._files[name]["last_access"] = time.time()
+            return True
+
+    def list_files(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(f) for f in self._files.values()]
+
+    def claim_file(self, name: str, last_access: float) -> bool:
+        with self._lock:
+            file = self._files.get(name)
+            if (
+                file is None
+                or file["last_access"] != last_access
+                or ("job", file["job_id"]) in self._leases
+            ):
+                return False
+            del self._files[name]
+            return True
+
+    def storage_usage(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "files": len(self._files),
+                "bytes": sum(f["size"] for f in self._files.values()),
+                "reserved_bytes": self._pending_reservations(),
+                "active_jobs": sum(1 for kind, _ in self._leases if kind == "job"),
+            }
+
+    def _pending_reservations(self) -> int:
+        """Espace réservé par les jobs actifs et pas encore écrit"""
+        written: Dict[str, int] = collections.defaultdict(int)
+        for file in self._files.values():
+            if file["job_id"]:
+                written[file["job_id"]] += file["size"]
+        return sum(
+            max(0, reserved - written[key])
+            for (kind, key), reserved in self._leases.items()
+            if kind == "job"
+        )
+
+
+class SQLiteStateBackend(StateBackend):
+    """État partagé par une base SQLite (WAL) entre les workers d'une machine.
+
+    Les événements publiés sont écrits par lots et relus par chaque worker
+    toutes les ``poll_interval`` secondes; ceux des autres workers sont
+    distribués aux listeners locaux. Les événements plus vieux que
+    ``retention`` secondes sont supprimés.
+
+    Chaque worker renouvelle ses baux pendant ce relevé: ceux d'un worker
+    arrêté brutalement expirent après ``lease_ttl`` secondes.
+    """
+
+    def __init__(
+        self, db_path: str, poll_interval: float, retention: int, lease_ttl: int
+    ) -> None:
+        super().__init__()
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.lease_ttl = lease_ttl
+        # Identifie les événements écrits par ce processus
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._outbox: List[Tuple[str, str, str]] = []
+        # Verrou propre à la file d'envoi: publish (boucle asyncio) n'attend
+        # jamais une écriture SQLite en cours
+        self._outbox_lock = threading.Lock()
+        self._last_event_id = 0
+        self._last_trim = 0.0
+        self._last_renewal = 0.0
+        self._poller: Optional[asyncio.Task] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            # WAL: lectures concurrentes entre workers uvicorn
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+                "created_at REAL NOT NULL, finished_at REAL, record TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, "
+                "channel TEXT NOT NULL, origin TEXT NOT NULL, "
+                "created_at REAL NOT NULL, message TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_events_job ON events (job_id, id)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts ("
+                "filename TEXT PRIMARY KEY, job_id TEXT NOT NULL, "
+                "url TEXT NOT NULL, evicted_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "kind TEXT NOT NULL, key TEXT NOT NULL, owner TEXT NOT NULL, "
+                "reserved_bytes INTEGER NOT NULL, renewed_at REAL NOT NULL, "
+                "PRIMARY KEY (kind, key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "name TEXT PRIMARY KEY, path TEXT NOT NULL, job_id TEXT, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    async def start(self) -> None:
+        """Ignore les événements passés et relève ensuite ceux des autres workers"""
+        if self._poller:
+            return
+
+        def last_id() -> int:
+            with self._lock:
+                row = (
+                    self._connection().execute("SELECT MAX(id) FROM events").fetchone()
+                )
+            return row[0] or 0
+
+        self._last_event_id = await run_in_thread(last_id)
+        self._poller = asyncio.create_task(self._poll_loop())
+
+    async def stop(self) -> None:
+        if self._poller:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+        # Derniers événements encore en attente d'écriture
+        await run_in_thread(self._exchange)
+        await run_in_thread(self._release_own_leases)
+
+    def _release_own_leases(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM leases WHERE owner = ?", (self.origin,))
+            conn.commit()
+
+    def publish(self, job_id: str, channel: str, message: Dict[str, Any]) -> None:
+        entry = (job_id, channel, json.dumps(message))
+        with self._outbox_lock:
+            self._outbox.append(entry)
+
+    def job_events(self, job_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = (
+                self._connection()
+                .execute(
+                    "SELECT message FROM events WHERE job_id = ? AND channel = ? "
+                    "ORDER BY id",
+                    (job_id, "progress"),
+                )
+                .fetchall()
+            )
+        return [json.loads(message) for (message,) in rows]
+
+    def save_job(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs "
+                "(job_id, status, created_at, finished_at, record) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    record["job_id"],
+                    record["status"],
+                    record["created_at"],
+                    record["finished_at"],
+                    json.dumps(record),
+                ),
+            )
+            conn.commit()
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = (
+                self._connection()
+                .execute("SELECT record FROM jobs WHERE job_id = ?", (job_id,))
+                .fetchone()
+            )
+        return json.loads(row[0]) if row else None
+
+    def list_jobs(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = "SELECT record FROM jobs"
+        args: Tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            args = (status,)
+        with self._lock:
+            rows = (
+                self._connection()
+                .execute(query + " ORDER BY created_at DESC", args)
+                .fetchall()
+            )
+        return [json.loads(record) for (record,) in rows]
+
+    def trim_jobs(self, keep: int) -> None:
+        with self._lock:
+            conn = self._connection()
+            (count,) = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()
+            if count <= keep:
+                return
+            conn.execute(
+                "DELETE FROM jobs WHERE job_id IN ("
+                "SELECT job_id FROM jobs WHERE finished_at IS NOT NULL "
+                "ORDER BY finished_at LIMIT ?)",
+                (count - keep,),
+            )
+            conn.execute(
+                "DELETE FROM artifacts WHERE job_id NOT IN (SELECT job_id FROM jobs)"
+            )
+            conn.commit()
+
+    def save_artifacts(self, job_id: str, filenames: List[str], url: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO artifacts (filename, job_id, url, evicted_at) "
+                "VALUES (?, ?, ?, NULL)",
+                [(filename, job_id, url) for filename in filenames],
+            )
+            conn.commit()
+
+    def mark_evicted(self, filename: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "UPDATE artifacts SET evicted_at = ? WHERE filename = ?",
+                (time.time(), filename),
+            )
+            conn.commit()
+
+    def get_artifact(self, filename: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT filename, job_id, url, evicted_at FROM artifacts "
+                    "WHERE filename = ?",
+                    (filename,),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        return dict(zip(("filename", "job_id", "url", "evicted_at"), row))
+
+    def acquire_lease(self, kind: str, key: str, reserved_bytes: int = 0) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO leases "
+                "(kind, key, owner, reserved_bytes, renewed_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, key, self.origin, reserved_bytes, time.time()),
+            )
+            conn.commit()
+
+    def release_lease(self, kind: str, key: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM leases WHERE kind = ? AND key = ?", (kind, key))
+            conn.commit()
+
+    def leased(self, kind: str) -> Set[str]:
+        with self._lock:
+            rows = (
+                self._connection()
+                .execute(
+                    "SELECT key FROM leases WHERE kind = ? AND renewed_at >= ?",
+                    (kind, self._alive_since()),
+                )
+                .fetchall()
+            )
+        return {key for (key,) in rows}
+
+    def reserve_storage(
+        self, job_id: str, required_bytes: int, quota_bytes: int, free_bytes: int
+    ) -> bool:
+        with self._lock:
+            conn = self._connection()
+            # Verrou d'écriture dès la lecture: deux workers ne peuvent pas
+            # réserver la même marge
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                (files_bytes,) = conn.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM files"
+                ).fetchone()
+                pending = self._pending_reservations(conn)
+                if (
+                    files_bytes + pending + required_bytes > quota_bytes
+                    or required_bytes > free_bytes - pending
+                ):
+                    conn.rollback()
+                    return False
+                conn.execute(
+                    "INSERT OR REPLACE INTO leases "
+                    "(kind, key, owner, reserved_bytes, renewed_at) "
+                    "VALUES ('job', ?, ?, ?, ?)",
+                    (job_id, self.origin, required_bytes, time.time()),
+                )
+                conn.commit()
+                return True
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def save_file(
+        self,
+        name: str,
+        path: str,
+        job_id: Optional[str],
+        size: int,
+        last_access: float,
+        replace: bool = True,
+    ) -> None:
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                f"{verb} INTO files (name, path, job_id, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (name, path, job_id, size, last_access),
+            )
+            conn.commit()
+
+    def forget_file(self, name: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM files WHERE name = ?", (name,))
+            conn.commit()
+
+    def touch_file(self, name: str) -> bool:
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                "UPDATE files SET last_access = ? WHERE name = ?", (time.time(), name)
+            )
+            conn.commit()
+        return cursor.rowcount > 0
+
+    def list_files(self) -> List[Dict[str, Any]]:
+        columns = ("name", "path", "job_id", "size", "last_access")
+        with self._lock:
+            rows = (
+                self._connection()
+                .execute(f"SELECT {', '.join(columns)} FROM files")
+                .fetchall()
+            )
+        return [dict(zip(columns, row)) for row in rows]
+
+    def claim_file(self, name: str, last_access: float) -> bool:
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                "DELETE FROM files WHERE name = ? AND last_access = ? AND ("
+                "job_id IS NULL OR job_id NOT IN (SELECT key FROM leases "
+                "WHERE kind = 'job' AND renewed_at >= ?))",
+                (name, last_access, self._alive_since()),
+            )
+            conn.commit()
+        return cursor.rowcount > 0
+
+    def storage_usage(self) -> Dict[str, int]:
+        with self._lock:
+            conn = self._connection()
+            files, files_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files"
+            ).fetchone()
+            (active_jobs,) = conn.execute(
+                "SELECT COUNT(*) FROM leases WHERE kind = 'job' AND renewed_at >= ?",
+                (self._alive_since(),),
+            ).fetchone()
+            pending = self._pending_reservations(conn)
+        return {
+            "files": files,
+            "bytes": files_bytes,
+            "reserved_bytes": pending,
+            "active_jobs": active_jobs,
+        }
+
+    def _alive_since(self) -> float:
+        """Date de renouvellement en deçà de laquelle un bail a expiré"""
+        return time.time() - self.lease_ttl
+
+    def _pending_reservations(self, conn: sqlite3.Connection) -> int:
+        """Espace réservé par les jobs actifs et pas encore écrit"""
+        (pending,) = conn.execute(
+            "SELECT COALESCE(SUM(MAX(0, reserved_bytes - COALESCE("
+            "(SELECT SUM(size) FROM files WHERE files.job_id = leases.key), 0))), 0) "
+            "FROM leases WHERE kind = 'job' AND renewed_at >= ?",
+            (self._alive_since(),),
+        ).fetchone()
+        return pending
+
+    def _exchange(self) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Écrit les événements en attente et lit ceux des autres workers"""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with self._outbox_lock:
+                outbox, self._outbox = self._outbox, []
+            if outbox:
+                conn.executemany(
+                    "INSERT INTO events (job_id, channel, origin, created_at, message) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (job_id, channel, self.origin, now, message)
+                        for job_id, channel, message in outbox
+                    ],
+                )
+            if now - self._last_trim > 60:
+                conn.execute(
+                    "DELETE FROM events WHERE created_at < ?", (now - self.retention,)
+                )
+                self._last_trim = now
+            if now - self._last_renewal > self.lease_ttl / 4:
+                conn.execute(
+                    "UPDATE leases SET renewed_at = ? WHERE owner = ?",
+                    (now, self.origin),
+                )
+                conn.execute(
+                    "DELETE FROM leases WHERE renewed_at < ?", (now - self.lease_ttl,)
+                )
+                self._last_renewal = now
+            conn.commit()
+
+            rows = conn.execute(
+                "SELECT id, job_id, channel, origin, message FROM events "
+                "WHERE id > ? ORDER BY id",
+                (self._last_event_id,),
+            ).fetchall()
+
+        received = []
+        for event_id, job_id, channel, origin, message in rows:
+            self._last_event_id = event_id
+            if origin != self.origin:
+                received.append((channel, job_id, json.loads(message)))
+        return received
+
+    async def _poll_loop(self) -> None:
+        while True:
+            try:
+                for channel, job_id, message in await run_in_thread(self._exchange):
+                    self._dispatch(channel, job_id, message)
+            except Exception as e:
+                print(f"⚠ Erreur de synchronisation de l'état partagé: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+
+def create_state_backend(kind: str) -> StateBackend:
+    if kind == "memory":
+        return MemoryStateBackend()
+    if kind == "sqlite":
+        return SQLiteStateBackend(
+            settings.STATE_DB_PATH,
+            settings.STATE_POLL_INTERVAL,
+            settings.STATE_EVENT_RETENTION,
+            settings.STATE_LEASE_TTL,
+        )
+    raise ValueError(f"STATE_BACKEND inconnu: {kind}")
+
+
+state_backend = create_state_backend(settings.STATE_BACKEND)
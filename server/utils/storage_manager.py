@@ -0,0 +1,252 @@
+import asyncio
+import collections
+import fnmatch
+import os
+import shutil
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import settings
+
+from .exceptions import StorageFullError
+from .executors import run_in_thread
+from .state_backend import StateBackend, state_backend
+
+# Fichiers que l'application écrit dans WORK_DIR (repris au démarrage). Ce
+# dossier lui est propre (``TEMP_DIR/dubsy`` par défaut): rien d'autre n'y
+# est adopté
+ARTIFACT_PATTERNS = (
+    "temp_*",
+    "audio_*",
+    "subtitles_*.srt",
+    "*_with_subtitles_*",
+    "*_with_soft_subs_*",
+)
+
+
+class Artifact:
+    """Fichier de WORK_DIR rattaché à un job"""
+
+    def __init__(self, path: str, job_id: Optional[str], size: int, last_access: float):
+        self.path = path
+        self.job_id = job_id
+        self.size = size
+        self.last_access = last_access
+
+
+class StorageManager:
+    """Cycle de vie des fichiers de WORK_DIR: quota disque, TTL et éviction LRU.
+
+    Chaque fichier produit est enregistré avec son job, sa taille et sa
+    date de dernier accès. Les fichiers des jobs actifs ne sont jamais
+    évincés; les autres expirent après ``ttl`` secondes sans accès et les
+    moins récemment utilisés sont supprimés au-delà de ``quota_bytes``.
+    Un balayage périodique applique ces règles en tâche de fond, et lance
+    les nettoyages ajoutés par ``add_sweeper`` (points de reprise).
+
+    Fichiers, réservations et jobs actifs sont tenus par ``backend``: avec
+    un état partagé, le quota est commun à tous les workers et aucun
+    n'évince les fichiers d'un job en cours chez un autre. Méthodes
+    bloquantes (les appeler via ``run_in_thread``).
+    """
+
+    def __init__(
+        self,
+        root: str,
+        quota_bytes: int,
+        ttl: int,
+        sweep_interval: int,
+        evicted_history: int = 10000,
+        backend: StateBackend = state_backend,
+    ) -> None:
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.evictions = 0
+        # Noms évincés récemment, pour répondre 410 plutôt que 404
+        self._evicted: collections.OrderedDict = collections.OrderedDict()
+        self._evicted_history = evicted_history
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._sweeper: Optional[asyncio.Task] = None
+        self._extra_sweepers: List[Callable[[], Any]] = []
+
+    async def start(self) -> None:
+        """Reprend les fichiers existants et lance le balayage périodique"""
+        if self._sweeper:
+            return
+        await run_in_thread(self.adopt_existing)
+        self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    def add_sweeper(self, sweeper: Callable[[], Any]) -> None:
+        """Nettoyage bloquant à lancer à chaque balayage périodique"""
+        self._extra_sweepers.append(sweeper)
+
+    async def stop(self) -> None:
+        if self._sweeper:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+
+    def adopt_existing(self) -> None:
+        """Enregistre les fichiers laissés par une exécution précédente.
+
+        Seul le dossier de travail de l'application est parcouru, jamais
+        TEMP_DIR qui peut le contenir. Un fichier déjà suivi
+        (job en cours d'un autre worker) garde son job; un fichier suivi
+        mais disparu du disque est oublié.
+        """
+        active = self.backend.leased("job")
+        for file in self.backend.list_files():
+            if file["job_id"] not in active and not os.path.exists(file["path"]):
+                self.backend.forget_file(file["name"])
+        if not os.path.isdir(self.root):
+            return
+        for entry in os.scandir(self.root):
+            if not entry.is_file() or not any(
+                fnmatch.fnmatch(entry.name, pattern) for pattern in ARTIFACT_PATTERNS
+            ):
+                continue
+            stat = entry.stat()
+            self.backend.save_file(
+                entry.name, entry.path, None, stat.st_size, stat.st_mtime, replace=False
+            )
+
+    def finish_job(self, job_id: str) -> None:
+        """Libère la réservation: les fichiers du job deviennent évinçables"""
+        self.backend.release_lease("job", job_id)
+
+    def register(self, path: str, job_id: Optional[str] = None) -> None:
+        """Enregistre (ou met à jour la taille d') un fichier produit"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        name = os.path.basename(path)
+        self.backend.save_file(name, path, job_id, size, time.time())
+        with self._lock:
+            self._evicted.pop(name, None)
+
+    def forget(self, path: str) -> None:
+        """Retire un fichier supprimé par le pipeline lui-même"""
+        self.backend.forget_file(os.path.basename(path))
+
+    def touch(self, filename: str) -> bool:
+        """Rafraîchit l'accès d'un fichier; False s'il n'est pas suivi"""
+        return self.backend.touch_file(filename)
+
+    def is_evicted(self, filename: str) -> bool:
+        with self._lock:
+            return filename in self._evicted
+
+    def admit(self, job_id: str, required_bytes: int) -> None:
+        """Réserve l'espace d'un nouveau job, en évinçant si besoin.
+
+        Lève ``StorageFullError`` si ni le quota ni le disque ne laissent
+        assez de marge une fois les fichiers évinçables supprimés.
+        """
+        if self._reserve(job_id, required_bytes):
+            return
+        self.sweep(target_bytes=self.quota_bytes - required_bytes)
+        if not self._reserve(job_id, required_bytes):
+            raise StorageFullError(
+                "Espace de stockage insuffisant, réessayez plus tard "
+                f"({required_bytes // (1024 * 1024)}MB nécessaires)"
+            )
+
+    def sweep(self, target_bytes: Optional[int] = None) -> None:
+        """Supprime les fichiers expirés puis les moins récents hors quota"""
+        now = time.time()
+        target = self.quota_bytes if target_bytes is None else target_bytes
+        active = self.backend.leased("job")
+        artifacts = [
+            Artifact(f["path"], f["job_id"], f["size"], f["last_access"])
+            for f in self.backend.list_files()
+        ]
+        evictable = sorted(
+            (artifact for artifact in artifacts if artifact.job_id not in active),
+            key=lambda artifact: artifact.last_access,
+        )
+        victims = [a for a in evictable if now - a.last_access > self.ttl]
+        usage = (
+            sum(a.size for a in artifacts)
+            + self.backend.storage_usage()["reserved_bytes"]
+            - sum(a.size for a in victims)
+        )
+        # Puis les moins récemment utilisés jusqu'à repasser sous la cible
+        for artifact in evictable[len(victims) :]:
+            if usage <= target:
+                break
+            victims.append(artifact)
+            usage -= artifact.size
+
+        for artifact in victims:
+            self._evict(artifact)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.backend.storage_usage(),
+            "quota_bytes": self.quota_bytes,
+            "evictions": self.evictions,
+        }
+
+    def _reserve(self, job_id: str, required_bytes: int) -> bool:
+        free = shutil.disk_usage(self.root).free
+        return self.backend.reserve_storage(
+            job_id, required_bytes, self.quota_bytes, free
+        )
+
+    def _evict(self, artifact: Artifact) -> None:
+        name = os.path.basename(artifact.path)
+        # Un seul worker supprime le fichier, et seulement s'il n'a pas
+        # été lu ni repris par un job depuis le choix des victimes
+        if not self.backend.claim_file(name, artifact.last_access):
+            return
+        try:
+            os.remove(artifact.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"⚠ Éviction impossible de {name}: {e}")
+            self.backend.save_file(
+                name,
+                artifact.path,
+                artifact.job_id,
+                artifact.size,
+                artifact.last_access,
+            )
+            return
+        with self._lock:
+            self._evicted[name] = time.time()
+            while len(self._evicted) > self._evicted_history:
+                self._evicted.popitem(last=False)
+            self.evictions += 1
+        try:
+            # Les autres workers répondront 410 eux aussi
+            self.backend.mark_evicted(name)
+        except Exception as e:
+            print(f"⚠ Éviction de {name} non partagée: {e}")
+        print(f"🧹 Fichier évincé: {name}")
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await run_in_thread(self.sweep)
+            except Exception as e:
+                print(f"⚠ Erreur lors du balayage de WORK_DIR: {e}")
+            for sweeper in self._extra_sweepers:
+                try:
+                    await run_in_thread(sweeper)
+                except Exception as e:
+                    print(f"⚠ Erreur lors du balayage: {e}")
+
+
+storage_manager = StorageManager(
+    settings.WORK_DIR,
+    settings.STORAGE_QUOTA_BYTES,
+    settings.STORAGE_TTL,
+    settings.STORAGE_SWEEP_INTERVAL,
+)
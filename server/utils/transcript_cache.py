@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Empreinte SHA-256 d'un fichier, lu par morceaux"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """Cache disque des transcriptions Whisper, adressé par contenu.
+
+    Une entrée est un fichier JSON nommé d'après l'empreinte de la source,
+    la langue et le modèle. La date de modification sert de date d'accès:
+    les entrées expirent après ``ttl`` secondes et les moins récemment
+    utilisées sont évincées au-delà de ``max_bytes``. Méthodes bloquantes.
+    """
+
+    def __init__(
+        self, cache_dir: str, ttl: int, max_bytes: int, enabled: bool = True
+    ) -> None:
+        self.enabled = enabled
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(source_hash: str, language: str, model: str) -> str:
+        raw = "\x00".join((source_hash, language, model))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Retourne la transcription en cache (et rafraîchit son accès)"""
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, "r", encoding="utf-8") as f:
+                transcript = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return transcript
+
+    def put(self, key: str, transcript: Dict) -> None:
+        """Enregistre une transcription puis applique le quota disque"""
+        if not self.enabled:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Écriture atomique: un lecteur concurrent ne voit jamais un JSON partiel
+        tmp_path = os.path.join(self.cache_dir, f".{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(transcript, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            self._remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Supprime les entrées expirées puis les plus anciennes hors quota.
+
+        Plusieurs jobs peuvent évincer en même temps: une entrée déjà
+        supprimée par un autre est ignorée.
+        """
+        entries = []
+        now = time.time()
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.ttl:
+                self._remove(entry.path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        entries, total = 0, 0
+        if self.enabled and os.path.isdir(self.cache_dir):
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".json"):
+                    entries += 1
+                    total += entry.stat().st_size
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+transcript_cache = TranscriptCache(
+    settings.TRANSCRIPT_CACHE_DIR,
+    settings.TRANSCRIPT_CACHE_TTL,
+    settings.TRANSCRIPT_CACHE_MAX_BYTES,
+    settings.TRANSCRIPT_CACHE_ENABLED,
+)
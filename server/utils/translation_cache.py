@@ -0,0 +1,141 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, Optional
+
+from config.settings import settings
+
+
+def normalize_text(text: str) -> str:
+    """Normalise un texte source (Unicode NFC, espaces compactés)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class TranslationCache:
+    """Mémoire de traduction persistante (SQLite) avec éviction LRU bornée.
+
+    Les clés combinent le texte source normalisé, la langue cible, le modèle
+    et la version du prompt. Les méthodes sont bloquantes (accès disque):
+    les appeler via ``run_in_thread`` depuis du code asynchrone.
+    """
+
+    def __init__(self, db_path: str, max_entries: int, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+        text: str, target_language: str, model: str, prompt_version: str
+    ) -> str:
+        raw = "\x00".join(
+            (normalize_text(text), target_language, model, prompt_version)
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            # WAL: lectures concurrentes entre workers uvicorn
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, translation TEXT NOT NULL, "
+                "last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_translations_last_access "
+                "ON translations (last_access)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Retourne les traductions connues et rafraîchit leur date d'accès"""
+        keys = list(keys)
+        if not keys or not self.enabled:
+            return {}
+
+        found: Dict[str, str] = {}
+        with self._lock:
+            conn = self._connection()
+            # Par paquets pour rester sous la limite de variables SQLite
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                found.update(rows)
+
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE translations SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                conn.commit()
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, str]) -> None:
+        """Enregistre des traductions puis évince les plus anciennes si besoin"""
+        if not items or not self.enabled:
+            return
+
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations (key, translation, last_access) "
+                "VALUES (?, ?, ?)",
+                [(key, translation, now) for key, translation in items.items()],
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM translations").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM translations WHERE key IN ("
+                    "SELECT key FROM translations ORDER BY last_access LIMIT ?)",
+                    (excess,),
+                )
+            conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        entries = 0
+        if self.enabled:
+            with self._lock:
+                (entries,) = (
+                    self._connection()
+                    .execute("SELECT COUNT(*) FROM translations")
+                    .fetchone()
+                )
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "deduplicated": self.deduplicated,
+            "translations_saved": self.hits + self.deduplicated,
+        }
+
+
+translation_cache = TranslationCache(
+    settings.TRANSLATION_CACHE_PATH,
+    settings.TRANSLATION_CACHE_MAX_ENTRIES,
+    settings.TRANSLATION_CACHE_ENABLED,
+)
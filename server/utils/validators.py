@@ -1,18 +1,31 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
 from pathlib import Path
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from config.settings import settings
-from fastapi import UploadFile
 
-from .exceptions import FileValidationError
+from . import profiler
+from .exceptions import FileTooLargeError, FileValidationError
+from .executors import run_in_thread
 
+if TYPE_CHECKING:
+    from fastapi import Request
 
-def validate_video_file(file: UploadFile) -> None:
-    """Valide un fichier vidéo uploadé"""
-    if not file.filename:
+# Taille maximum d'un champ texte du formulaire d'upload
+UPLOAD_FIELD_MAX_BYTES = 64 * 1024
+
+
+def validate_video_file(filename: str) -> None:
+    """Valide le nom d'un fichier vidéo uploadé"""
+    if not filename:
         raise FileValidationError("Nom de fichier manquant")
 
     # Vérifier l'extension
-    file_ext = Path(file.filename).suffix.lower()
+    file_ext = Path(filename).suffix.lower()
     if file_ext not in settings.ALLOWED_EXTENSIONS:
         raise FileValidationError(
             f"Format non supporté. Extensions autorisées: {', '.join(settings.ALLOWED_EXTENSIONS)}"
@@ -21,6 +34,232 @@ def validate_video_file(file: UploadFile) -> None:
     # Note: La taille sera vérifiée lors de la lecture du fichier
 
 
+async def probe_media(path: str) -> Optional[Dict]:
+    """Lit les métadonnées conteneur/flux avec ffprobe (None si illisible)"""
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-print_format",
+        "json",
+        "-show_format",
+        "-show_streams",
+        path,
+    ]
+    with profiler.span("FFprobe", "subprocess", argv=cmd) as span:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        stdout, _ = await process.communicate()
+        span["returncode"] = process.returncode
+    if process.returncode != 0:
+        return None
+    try:
+        info = json.loads(stdout)
+    except ValueError:
+        return None
+    return info if info.get("streams") else None
+
+
+def validate_media_info(info: Dict, complete: bool = True) -> Dict:
+    """Valide les flux d'un conteneur vidéo et retourne un résumé.
+
+    Avec ``complete=False`` (fichier partiel), une durée absente n'est pas
+    une erreur: elle sera vérifiée une fois le fichier entièrement reçu.
+    """
+    streams = info.get("streams", [])
+    audio_streams = [s for s in streams if s.get("codec_type") == "audio"]
+    video_streams = [s for s in streams if s.get("codec_type") == "video"]
+
+    if not video_streams:
+        raise FileValidationError("Aucune piste vidéo trouvée dans le fichier")
+    if not audio_streams:
+        raise FileValidationError("Aucune piste audio trouvée dans la vidéo")
+
+    duration = info.get("format", {}).get("duration")
+    duration = float(duration) if duration not in (None, "N/A") else None
+    if duration is None and complete:
+        raise FileValidationError("Durée de la vidéo indéterminée")
+    if duration is not None and duration > settings.MAX_VIDEO_DURATION:
+        raise FileValidationError(
+            f"Vidéo trop longue ({duration / 60:.0f} min). Durée maximum: {settings.MAX_VIDEO_DURATION // 60} min"
+        )
+
+    return {
+        "format": info.get("format", {}).get("format_name"),
+        "duration": duration,
+        "video_codec": video_streams[0].get("codec_name"),
+        "audio_codec": audio_streams[0].get("codec_name"),
+    }
+
+
+async def save_video_upload(
+    request: "Request",
+    open_file: Callable[[Dict[str, str], str], Awaitable[str]],
+) -> Tuple[Dict[str, str], str, Dict]:
+    """Reçoit un formulaire multipart en flux et enregistre sa vidéo (``file``).
+
+    Le corps est lu morceau par morceau depuis ``request.stream()``: rien
+    n'est mis en tampon par Starlette. À l'arrivée de la partie fichier,
+    ``open_file`` reçoit les champs déjà lus et le nom du fichier, et
+    retourne le chemin où l'écrire (il peut refuser l'upload en levant une
+    exception). La réception s'arrête dès que ``MAX_FILE_SIZE`` est dépassé,
+    sans lire la suite, et le conteneur est sondé avec ffprobe dès que son
+    en-tête est arrivé: un fichier sans piste audio ou trop long est rejeté
+    en cours d'envoi.
+
+    Retourne les champs texte, le chemin de la vidéo et le résumé de
+    ``validate_media_info`` avec l'empreinte SHA-256 calculée au fil de
+    l'écriture (``sha256``).
+    """
+    from python_multipart.exceptions import MultipartParseError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+    from starlette.requests import ClientDisconnect
+
+    content_type, options = parse_options_header(
+        request.headers.get("content-type", "")
+    )
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise FileValidationError("Formulaire multipart/form-data attendu")
+
+    can_probe = shutil.which("ffprobe") is not None
+    if not can_probe:
+        print("⚠ ffprobe introuvable: validation du conteneur ignorée")
+
+    # Les callbacks du parseur sont synchrones: leurs événements sont
+    # traités après chaque morceau, avec les écritures asynchrones
+    events: List[Tuple[str, bytes]] = []
+
+    def event(name: str) -> Callable[[], None]:
+        return lambda: events.append((name, b""))
+
+    def data_event(name: str) -> Callable[[bytes, int, int], None]:
+        return lambda data, start, end: events.append((name, data[start:end]))
+
+    parser = MultipartParser(
+        boundary,
+        {
+            "on_part_begin": event("part_begin"),
+            "on_part_data": data_event("part_data"),
+            "on_part_end": event("part_end"),
+            "on_header_field": data_event("header_field"),
+            "on_header_value": data_event("header_value"),
+            "on_header_end": event("header_end"),
+            "on_headers_finished": event("headers_finished"),
+            "on_end": event("end"),
+        },
+    )
+
+    fields: Dict[str, str] = {}
+    headers: Dict[bytes, bytes] = {}
+    header_field, header_value = bytearray(), bytearray()
+    field_name: Optional[str] = None
+    field_value = bytearray()
+    in_file = False
+    completed = False
+    saved = False
+
+    dest_path: Optional[str] = None
+    buffer = None
+    media = None
+    written = 0
+    # Seuils doublés après chaque sonde sans résultat: un MP4 dont l'index
+    # est en fin de fichier n'est pas sondé à chaque morceau
+    next_probe = settings.UPLOAD_PROBE_BYTES
+    digest = hashlib.sha256()
+    try:
+        async for chunk in request.stream():
+            try:
+                parser.write(chunk)
+            except MultipartParseError as e:
+                raise FileValidationError(f"Formulaire multipart invalide: {e}")
+
+            for name, data in events:
+                if name == "part_begin":
+                    headers.clear()
+                elif name == "header_field":
+                    header_field += data
+                elif name == "header_value":
+                    header_value += data
+                elif name == "header_end":
+                    headers[bytes(header_field).lower()] = bytes(header_value)
+                    header_field.clear()
+                    header_value.clear()
+                elif name == "headers_finished":
+                    _, disposition = parse_options_header(
+                        headers.get(b"content-disposition", b"")
+                    )
+                    field_name = disposition.get(b"name", b"").decode("utf-8")
+                    filename = disposition.get(b"filename")
+                    in_file = filename is not None
+                    if not in_file:
+                        field_value.clear()
+                        continue
+                    if field_name != "file" or dest_path is not None:
+                        raise FileValidationError("Un seul fichier attendu (file)")
+                    dest_path = await open_file(
+                        dict(fields), filename.decode("utf-8", "replace")
+                    )
+                    buffer = open(dest_path, "wb")
+                elif name == "part_data" and in_file:
+                    written += len(data)
+                    if written > settings.MAX_FILE_SIZE:
+                        raise FileTooLargeError(
+                            f"Fichier trop volumineux. Taille maximum: {settings.MAX_FILE_SIZE // (1024 * 1024)}MB"
+                        )
+                    await run_in_thread(buffer.write, data)
+                    digest.update(data)
+                elif name == "part_data":
+                    field_value += data
+                    if len(field_value) > UPLOAD_FIELD_MAX_BYTES:
+                        raise FileValidationError(f"Champ trop long: {field_name}")
+                elif name == "part_end" and not in_file:
+                    fields[field_name] = field_value.decode("utf-8", "replace")
+                elif name == "end":
+                    completed = True
+            events.clear()
+
+            # Sonde anticipée dès que l'en-tête du conteneur est disponible
+            if buffer and can_probe and media is None and written >= next_probe:
+                next_probe = max(next_probe, written) * 2
+                await run_in_thread(buffer.flush)
+                info = await probe_media(dest_path)
+                if info:
+                    media = validate_media_info(info, complete=False)
+
+        if not completed:
+            raise FileValidationError("Formulaire incomplet")
+        if dest_path is None:
+            raise FileValidationError("Fichier manquant (champ file)")
+        await run_in_thread(buffer.close)
+        if not written:
+            raise FileValidationError("Fichier vide")
+
+        # Conteneurs dont l'index est en fin de fichier (moov MP4): sonde finale
+        if can_probe and (media is None or media["duration"] is None):
+            info = await probe_media(dest_path)
+            if not info:
+                raise FileValidationError("Fichier vidéo illisible ou corrompu")
+            media = validate_media_info(info)
+
+        media = media or {}
+        media["sha256"] = digest.hexdigest()
+        saved = True
+        return fields, dest_path, media
+
+    except ClientDisconnect:
+        raise FileValidationError("Upload interrompu par le client")
+    finally:
+        # Échec, rejet ou annulation: pas de fichier partiel dans WORK_DIR
+        if buffer and not buffer.closed:
+            buffer.close()
+        if not saved and dest_path and os.path.exists(dest_path):
+            os.remove(dest_path)
+
+
 def validate_language_code(lang_code: str) -> bool:
     """Valide un code de langue"""
     valid_languages = {
@@ -45,6 +284,16 @@ def validate_language_code(lang_code: str) -> bool:
     return lang_code in valid_languages
 
 
+def parse_language_list(value: str) -> List[str]:
+    """Découpe une liste de langues séparées par des virgules (sans doublons)"""
+    languages: List[str] = []
+    for lang in value.split(","):
+        lang = lang.strip().lower()
+        if lang and lang not in languages:
+            languages.append(lang)
+    return languages
+
+
 def sanitize_filename(filename: str) -> str:
     """Nettoie un nom de fichier"""
     # Remplacer les caractères dangereux